@@ -0,0 +1,383 @@
+# dependencies
+# numpy
+# globalAlignment (this repository)
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import numpy as np
+from globalAlignment import *
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000) # lengths of the sequences of the corpus, in bases
+KINDS = ("random", "similar", "repetitive")
+SIMILAR_DIVERGENCE = 0.01 # fraction of the positions of a similar pair that are substituted, inserted or deleted
+REPEAT_SHORTENING = 0.1 # fraction of the repeats missing from the second sequence of a repetitive pair
+
+# modes measured for every pair: the fill engines work on the full matrices, the others in linear memory
+FULL_MODES = tuple(FILL_ENGINES)
+LINEAR_MODES = ("scoreOnly", "hirschberg", "banded")
+
+FULL_MAX_CELLS = 1 << 25 # the full matrices of bigger pairs (about 5800 x 5800) are not allocated
+LINEAR_MAX_CELLS = 1 << 31 # bigger pairs are too slow for the linear-memory modes (banded on similar pairs excepted)
+PROCESS_MAX_CELLS = 1 << 10 # the process engine starts a process per cell
+BENCH_MAX_ALIGNMENTS = 100 # alignments enumerated by the traceback phase, repetitive pairs have too many to list them all
+
+DEFAULT_THRESHOLD = 0.10 # relative slowdown (or growth of peak memory) reported as a regression
+NOISE_SECONDS = 0.005 # smaller differences of wall time are never regressions
+NOISE_BYTES = 1 << 20 # smaller differences of the memory added by a phase are never regressions
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def makePair(kind: str, length: int, seed: int) -> tuple[str, str]:
+    """Generates a pair of the benchmark corpus.
+
+    Each pair depends only on its kind, length and seed, so the corpus is the same whichever sizes are run.
+
+    Args:
+        kind (str): "random" for two unrelated sequences, "similar" for a sequence and a copy with
+                    SIMILAR_DIVERGENCE edits, "repetitive" for two tandem repeats of the same short unit,
+                    the second one shorter (their optimal alignments are countless, stressing the traceback).
+        length (int): the length of the first sequence.
+        seed (int): the seed of the corpus.
+
+    Returns:
+        tuple[str, str]: the two sequences.
+
+    Raises:
+        ValueError: if kind is unknown.
+    """
+    generator = random.Random(f"{seed}-{kind}-{length}")
+    seq1 = "".join(generator.choices("ACGT", k=length))
+
+    if kind == "random":
+        return seq1, "".join(generator.choices("ACGT", k=length))
+
+    if kind == "similar":
+        seq2 = list(seq1)
+        for _ in range(max(1, round(length * SIMILAR_DIVERGENCE))):
+            position = generator.randrange(len(seq2))
+            edit = generator.choice(("substitution", "insertion", "deletion"))
+            if edit == "substitution":
+                seq2[position] = generator.choice("ACGT".replace(seq2[position], ""))
+            elif edit == "insertion":
+                seq2.insert(position, generator.choice("ACGT"))
+            elif len(seq2) > 1:
+                del seq2[position]
+        return seq1, "".join(seq2)
+
+    if kind == "repetitive":
+        unit = "".join(generator.choices("ACGT", k=generator.randint(2, 4)))
+        repeats = unit * (length // len(unit) + 1)
+        return repeats[:length], repeats[:max(1, length - round(length * REPEAT_SHORTENING))]
+
+    raise ValueError(f"Unknown kind of pair: {kind}")
+
+
+def measure(phase: str, function, cells: int | None = None) -> tuple[dict, object]:
+    """Runs a phase and measures its wall time, CPU time (including the worker processes it waited for) and how much it raised the peak memory.
+
+    Args:
+        phase (str): the name of the phase.
+        function: the phase, called without arguments.
+        cells (int | None): the cells the phase computes, to report its throughput.
+
+    Returns:
+        tuple[dict, object]: the measures of the phase and the value returned by function.
+    """
+    gc.collect()
+    before, beforeChildren = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    result = function()
+    wall = time.perf_counter() - start
+    after, afterChildren = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu = sum(getattr(end, field) - getattr(begin, field)
+              for begin, end in ((before, after), (beforeChildren, afterChildren)) for field in ("ru_utime", "ru_stime"))
+    return {
+        "phase": phase,
+        "wall": wall,
+        "cpu": cpu,
+        "cells": cells,
+        "cellsPerSecond": cells / wall if cells and wall > 0 else None,
+        "peakRss": after.ru_maxrss * RSS_UNIT, # the peak of the process so far, the phases run in order
+        # the peak only grows, so a phase is compared on how much it raised it: a bigger earlier phase doesn't flag the later ones
+        "peakRssIncrease": (after.ru_maxrss - before.ru_maxrss) * RSS_UNIT,
+        "workersPeakRss": afterChildren.ru_maxrss * RSS_UNIT,
+    }, result
+
+
+def runMode(kind: str, length: int, seed: int, mode: str, settings: dict) -> list[dict]:
+    """Measures the phases of a mode on a pair of the corpus, in the current process.
+
+    Args:
+        kind (str): the kind of the pair (see makePair).
+        length (int): the length of the pair.
+        seed (int): the seed of the corpus.
+        mode (str): a fill engine (see FILL_ENGINES) or one of LINEAR_MODES.
+        settings (dict): the alignment parameters (match, misMatch, gapPenalty, workers).
+
+    Returns:
+        list[dict]: the measures of each phase.
+    """
+    seq1, seq2 = makePair(kind, length, seed)
+    args = argparse.Namespace(seq1=seq1, seq2=seq2, shape=(len(seq2) + 1, len(seq1) + 1), **settings)
+    cells = args.shape[0] * args.shape[1]
+    records = []
+
+    def phase(name: str, function, phaseCells: int | None = None):
+        record, result = measure(name, function, phaseCells)
+        records.append(record)
+        return result
+
+    if mode == "scoreOnly":
+        phase("calculateScoreOnly", lambda: calculateScoreOnly(args), cells)
+    elif mode == "hirschberg":
+        phase("hirschberg", lambda: hirschberg(args), cells)
+    elif mode == "banded":
+        _, _, directionMatrix, bandWidth = phase("alignBanded", lambda: alignBanded(args))
+        records[-1]["cells"] = directionMatrix.data.size # only the cells of the final band are stored
+        records[-1]["cellsPerSecond"] = directionMatrix.data.size / records[-1]["wall"]
+        records[-1]["bandWidth"] = bandWidth
+        phase("traceback", lambda: traceback(directionMatrix, args, BENCH_MAX_ALIGNMENTS))
+    else:
+        shared = mode in SHARED_ENGINES
+        scoreMatrix, directionMatrix = phase("createMatrix", lambda: (createMatrix(args, isDirectionMatrix=False, shared=shared),
+                                                                      createMatrix(args, isDirectionMatrix=True, shared=shared)), cells)
+        antiDiagonals = phase("calculateAntidiagonals", lambda: calculateAntidiagonals(args), cells)
+        scoreMatrix, directionMatrix = phase("fillMatrix", lambda: FILL_ENGINES[mode](antiDiagonals, args, scoreMatrix, directionMatrix), cells)
+        alignments = phase("traceback", lambda: traceback(directionMatrix, args, BENCH_MAX_ALIGNMENTS))
+        records[-1]["alignments"] = len(alignments)
+        phase("countAlignments", lambda: countAlignments(directionMatrix), cells)
+
+    return records
+
+
+def runIsolated(connection, kind: str, length: int, seed: int, mode: str, settings: dict) -> None:
+    """Runs runMode in a child process and sends back its records, or the error that stopped it."""
+    try:
+        connection.send(runMode(kind, length, seed, mode, settings))
+    except Exception as error:
+        connection.send(f"{type(error).__name__}: {error}")
+    finally:
+        connection.close()
+
+
+def isMeasured(kind: str, length: int, mode: str, maxCells: int, maxLinearCells: int) -> bool:
+    """Tells if a mode is run on a pair, the others would take too much memory or time.
+
+    Args:
+        kind (str): the kind of the pair.
+        length (int): the length of the pair.
+        mode (str): the mode.
+        maxCells (int): the largest pair, in cells, aligned with the full matrices.
+        maxLinearCells (int): the largest pair, in cells, aligned by the linear-memory modes.
+
+    Returns:
+        bool: True if the mode is run on the pair.
+    """
+    cells = (length + 1) ** 2
+    if mode == "process":
+        return cells <= min(maxCells, PROCESS_MAX_CELLS)
+    if mode in FULL_MODES:
+        return cells <= maxCells
+    if mode == "banded" and kind != "similar": # the band of an unrelated pair widens to the whole matrix
+        return cells <= maxCells
+    return mode == "banded" or cells <= maxLinearCells
+
+
+def runBenchmarks(sizes: list[int], kinds: list[str], modes: list[str], settings: dict, seed: int = 0, repeat: int = 1,
+                  maxCells: int = FULL_MAX_CELLS, maxLinearCells: int = LINEAR_MAX_CELLS, log = None) -> dict:
+    """Runs the benchmarks, each mode of each pair in a new process so its peak memory is its own.
+
+    Args:
+        sizes (list[int]): the lengths of the pairs.
+        kinds (list[str]): the kinds of the pairs (see makePair).
+        modes (list[str]): the modes measured (see runMode).
+        settings (dict): the alignment parameters (match, misMatch, gapPenalty, workers).
+        seed (int): the seed of the corpus.
+        repeat (int): how many times each mode is run, the fastest run is kept.
+        maxCells (int): the largest pair, in cells, aligned with the full matrices.
+        maxLinearCells (int): the largest pair, in cells, aligned by the linear-memory modes.
+        log: if set, a file where the progress is written.
+
+    Returns:
+        dict: the results, with the description of the machine under "meta" and a record per phase under "results".
+    """
+    context = multiprocessing.get_context("spawn") # a forked child would start with the memory of this process
+    results = []
+    for kind in kinds:
+        for length in sizes:
+            for mode in modes:
+                if not isMeasured(kind, length, mode, maxCells, maxLinearCells):
+                    continue
+
+                runs = []
+                for _ in range(repeat):
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(target=runIsolated, args=(sender, kind, length, seed, mode, settings))
+                    process.start()
+                    sender.close()
+                    try:
+                        runs.append(receiver.recv())
+                    except EOFError: # killed, for instance by the out-of-memory killer
+                        runs.append(None)
+                    process.join()
+                    if runs[-1] is None:
+                        runs[-1] = f"the process exited with code {process.exitcode}"
+
+                case = {"case": f"{kind}-{length}", "kind": kind, "length": length, "mode": mode}
+                errors = [run for run in runs if isinstance(run, str)]
+                if errors:
+                    results.append({**case, "error": errors[0]})
+                else:
+                    best = min(runs, key=lambda records: sum(record["wall"] for record in records))
+                    results += [{**case, **record} for record in best]
+
+                if log:
+                    print(f"{case['case']:<18} {mode:<11}", errors[0] if errors else f"{sum(record['wall'] for record in best):.4f} s", file=log, flush=True)
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.process_cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+        "settings": settings,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compareResults(old: dict, new: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Compares two result files phase by phase.
+
+    A phase regresses if its wall time grew by more than threshold (and more than NOISE_SECONDS)
+    or the increase of the peak memory it caused grew by more than threshold (and more than NOISE_BYTES).
+    A mode that failed in new is compared as a whole, on its case and mode: it regresses if it had phases in old.
+
+    Args:
+        old (dict): the reference results (see runBenchmarks).
+        new (dict): the results to check.
+        threshold (float): the relative growth tolerated.
+
+    Returns:
+        list[dict]: for each phase in either file (or each mode that failed in new) its case, mode and phase,
+                    the old and new wall times, their ratio and a status: "ok", "faster", "regression",
+                    "error" (a mode that failed without a reference to regress from), "missing" or "new".
+    """
+    def index(results: dict) -> dict:
+        return {(record["case"], record["mode"], record.get("phase")): record for record in results["results"]}
+
+    oldRecords, newRecords = index(old), index(new)
+    # a failed mode has a single record, with no phase, so the phases of the other file can't be matched with it
+    newFailures = {key[:2]: record["error"] for key, record in newRecords.items() if "error" in record}
+    oldFailures = {key[:2] for key, record in oldRecords.items() if "error" in record}
+    newModes = {key[:2] for key in newRecords}
+    comparisons = []
+    for key in list(oldRecords) + [key for key in newRecords if key not in oldRecords]:
+        oldRecord, newRecord = oldRecords.get(key), newRecords.get(key)
+        comparison = {"case": key[0], "mode": key[1], "phase": key[2],
+                      "old": oldRecord and oldRecord.get("wall"), "new": newRecord and newRecord.get("wall"), "ratio": None}
+
+        if key[:2] in newFailures:
+            if any(other["case"] == key[0] and other["mode"] == key[1] for other in comparisons):
+                continue # already reported with the first phase of the mode
+            oldWalls = [record["wall"] for other, record in oldRecords.items() if other[:2] == key[:2] and "error" not in record]
+            comparison.update(phase=None, old=sum(oldWalls) if oldWalls else None, new=None, error=newFailures[key[:2]])
+            comparison["status"] = "regression" if oldWalls else "error"
+        elif key[:2] in oldFailures and key[:2] in newModes and newRecord is None:
+            continue # the mode failed in old and has phases in new, which are reported as new
+        elif newRecord is None:
+            comparison["status"] = "missing"
+        elif oldRecord is None:
+            comparison["status"] = "new"
+        else:
+            comparison["ratio"] = newRecord["wall"] / oldRecord["wall"] if oldRecord["wall"] > 0 else None
+            slower = newRecord["wall"] > oldRecord["wall"] * (1 + threshold) and newRecord["wall"] - oldRecord["wall"] > NOISE_SECONDS
+            oldBytes, newBytes = oldRecord["peakRssIncrease"], newRecord["peakRssIncrease"]
+            bigger = newBytes > oldBytes * (1 + threshold) and newBytes - oldBytes > NOISE_BYTES
+            faster = oldRecord["wall"] > newRecord["wall"] * (1 + threshold) and oldRecord["wall"] - newRecord["wall"] > NOISE_SECONDS
+            comparison["status"] = "regression" if slower or bigger else "faster" if faster else "ok"
+            if bigger:
+                comparison["peakRssIncrease"] = (oldBytes, newBytes)
+
+        comparisons.append(comparison)
+
+    return comparisons
+
+
+def printComparisons(comparisons: list[dict]) -> None:
+    """Prints the comparisons of compareResults as a table."""
+    print(f"{'case':<18} {'mode':<11} {'phase':<22} {'old (s)':>10} {'new (s)':>10} {'ratio':>7}  status")
+    for comparison in comparisons:
+        old = "" if comparison["old"] is None else f"{comparison['old']:.4f}"
+        new = "" if comparison["new"] is None else f"{comparison['new']:.4f}"
+        ratio = "" if comparison["ratio"] is None else f"{comparison['ratio']:.2f}x"
+        status = comparison["status"].upper() if comparison["status"] in ("regression", "error") else comparison["status"]
+        if "error" in comparison:
+            status += f" ({comparison['error']})"
+        if "peakRssIncrease" in comparison:
+            status += f" (peak memory increase {comparison['peakRssIncrease'][0]} -> {comparison['peakRssIncrease'][1]} bytes)"
+        print(f"{comparison['case']:<18} {comparison['mode']:<11} {comparison['phase'] or '':<22} {old:>10} {new:>10} {ratio:>7}  {status}")
+
+
+def main():
+    """Runs the benchmarks or compares two result files"""
+
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Benchmarks the alignment engines and phases, and tracks regressions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run.add_argument("-o", "--output",       type=str, required=True, help="Write the path of the JSON file of the results")
+    run.add_argument("--sizes",              type=int, nargs="+", default=DEFAULT_SIZES, help=f"Write the lengths of the pairs (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    run.add_argument("--kinds",              choices=KINDS, nargs="+", default=KINDS, help="Choose the kinds of pairs (default: all)")
+    run.add_argument("--modes",              choices=FULL_MODES + LINEAR_MODES, nargs="+", default=FULL_MODES + LINEAR_MODES, help="Choose the engines and modes measured (default: all)")
+    run.add_argument("--seed",               type=int, default=0, help="Write the seed of the corpus (default: 0)")
+    run.add_argument("--repeat",             type=int, default=1, help="Write how many times each mode is run, the fastest run is kept (default: 1)")
+    run.add_argument("-w", "--workers",      type=int, help="Write the number of worker processes (default: all the available cores)")
+    run.add_argument("-gp", "--gapPenalty",  type=int, default=-2, help="Write the gap penalty (default: -2)")
+    run.add_argument("-m", "--match",        type=int, default=1, help="Write the match score (default: 1)")
+    run.add_argument("-mm", "--misMatch",    type=int, default=-1, help="Write the mismatch score (default: -1)")
+    run.add_argument("--maxCells",           type=int, default=FULL_MAX_CELLS, help=f"Write the largest pair, in cells, aligned with the full matrices (default: {FULL_MAX_CELLS})")
+    run.add_argument("--maxLinearCells",     type=int, default=LINEAR_MAX_CELLS, help=f"Write the largest pair, in cells, aligned by the linear-memory modes (default: {LINEAR_MAX_CELLS})")
+
+    compare = commands.add_parser("compare", help="Compare two result files and flag the regressions")
+    compare.add_argument("old",              type=str, help="Write the path of the reference results")
+    compare.add_argument("new",              type=str, help="Write the path of the results to check")
+    compare.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Write the relative growth of time or memory reported as a regression (default: {DEFAULT_THRESHOLD})")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.repeat < 1:
+            parser.error("the number of repetitions must be positive")
+        settings = {"match": args.match, "misMatch": args.misMatch, "gapPenalty": args.gapPenalty, "workers": args.workers}
+        results = runBenchmarks(args.sizes, args.kinds, args.modes, settings, args.seed, args.repeat, args.maxCells, args.maxLinearCells, log=sys.stderr)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+        return
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    comparisons = compareResults(old, new, args.threshold)
+    printComparisons(comparisons)
+    if any(comparison["status"] in ("regression", "error") for comparison in comparisons):
+        sys.exit(1)
+
+
+
+if __name__ == "__main__":
+    main()
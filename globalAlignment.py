@@ -2,15 +2,42 @@
 # numpy
 
 import argparse
-from ctypes import c_char, c_int
+import contextlib
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
 import numpy as np
-from multiprocessing import Process, Array
-
-# will be used later for direction matrix
+from multiprocessing import Process, Barrier, Pool, shared_memory
+from multiprocessing.connection import wait
+
+# will be used later for direction matrix: each cell is a uint8 holding one bit flag per direction
+DIAG_FLAG = 1
+UP_FLAG   = 2
+LEFT_FLAG = 4
+
+# 2-bit codes of the nucleotides, used by the engines to compare them (see sequenceCodes)
+NUCLEOTIDES = b"ACGT"
+INVALID_CODE = 255 # code of every other character
+NUCLEOTIDE_CODES = np.full(256, INVALID_CODE, dtype=np.uint8)
+for code, nucleotide in enumerate(NUCLEOTIDES):
+    NUCLEOTIDE_CODES[nucleotide] = NUCLEOTIDE_CODES[nucleotide + 32] = code # upper and lowercase
+
+# arrows used to display the directions
 LEFT_DIR = '←'.encode('utf-8')
 UP_DIR   = '↑'.encode('utf-8')
 DIAG_DIR = '↖'.encode('utf-8')
 
+type Sequence = str | np.ndarray
+"""A nucleotide sequence, either as a string or as a uint8 array of ASCII codes (see readFasta)."""
+
 type Params = object
 """
 Object containing all the parameters needed for the sequence alignment process.
@@ -19,24 +46,151 @@ Attributes:
     match (int): score awarded for a matching pair of nucleotides.
     misMatch (int): penalty for a mismatching pair of nucleotides.
     gapPenalty (int): penalty for introducing a gap in the alignment.
-    seq1 (str): the first input sequence to be aligned.
-    seq2 (str): the second input sequence to be aligned.
+    seq1 (Sequence): the first input sequence to be aligned.
+    seq2 (Sequence): the second input sequence to be aligned.
     shape (tuple[int, int]): the dimensions of the matrices.
+    engine (str, optional): the name of the fill engine used by main (see FILL_ENGINES).
+    workers (int, optional): the number of worker processes used by the parallel engines,
+                                defaults to the number of available cores.
+    tileSize (int, optional): the side of the tiles used by the tiled engine, defaults to a size chosen
+                                from the L2 cache size (see autoTileSize).
+    checkpoint (str, optional): the path of the file where the tiled engine saves its progress
+                                on memory-mapped matrices (see TileCheckpoint).
+    resume (bool, optional): if True, the tiled engine continues from the progress saved in args.checkpoint.
 """
 
-class EmptyLabelException(Exception):
+class RunStats:
+    """Wall and CPU time per phase and counters of the work done, for finding where a run spends its time (see --profile).
+
+    The phases are exclusive: the time of a phase run inside another one (the traceback while the alignments
+    are printed) is only counted in the inner one, so the phases add up to the whole run.
+    The CPU time includes the worker processes that were waited for. The counters only see the work
+    of this process: what the workers of a pool compute is counted when it's dispatched (cells, tasks).
+    When disabled, the default, phase returns a shared no-op context manager and count returns at once.
+    """
+    def __init__(self, enabled: bool = False):
+        """Creates the stats, with no phase and no counter.
+
+        Args:
+            enabled (bool): if False nothing is recorded.
+        """
+        self.reset(enabled)
+
+    def reset(self, enabled: bool | None = None) -> None:
+        """Forgets the phases and the counters recorded so far.
+
+        Args:
+            enabled (bool | None): if set, enables or disables the stats.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        self.phases = {} # name -> {"wall", "cpu", "calls"}
+        self.counters = {}
+        self.running = [] # the [wall, cpu] time of the phases nested in each running phase
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager:
+        """Returns a context manager that adds the time spent in it to the phase name."""
+        return self.timedPhase(name) if self.enabled else NO_PHASE
+
+    @contextlib.contextmanager
+    def timedPhase(self, name: str) -> Iterator[None]:
+        """Times the code run inside it as the phase name, without the phases nested in it (used by phase when enabled)."""
+        nested = [0.0, 0.0]
+        self.running.append(nested)
+        wallStart, cpuStart = time.perf_counter(), cpuTime()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wallStart, cpuTime() - cpuStart
+            self.running.pop()
+            if self.running:
+                self.running[-1][0] += wall
+                self.running[-1][1] += cpu
+
+            phase = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            phase["wall"] += wall - nested[0]
+            phase["cpu"] += cpu - nested[1]
+            phase["calls"] += 1
+
+    def iterate(self, name: str, iterator: Iterator) -> Iterator:
+        """Returns the iterator, adding the time spent computing each item to the phase name (for lazy phases like the traceback)."""
+        return self.timedItems(name, iterator) if self.enabled else iterator
+
+    def timedItems(self, name: str, iterator: Iterator) -> Iterator:
+        """Yields the items of iterator, timing each next call as the phase name (used by iterate when enabled)."""
+        iterator = iter(iterator)
+        while True:
+            with self.phase(name):
+                item = next(iterator, NO_ITEM)
+            if item is NO_ITEM:
+                return
+            yield item
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Adds amount to the counter name."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def asDict(self) -> dict:
+        """Returns the phases and the counters, as they are written in JSON."""
+        return {"phases": {name: dict(phase) for name, phase in self.phases.items()}, "counters": dict(self.counters)}
+
+    def toJson(self) -> str:
+        """Returns the phases and the counters as a JSON document."""
+        return json.dumps(self.asDict(), indent=1)
+
+    def report(self, file = None) -> None:
+        """Prints the phases, from the slowest, and the counters.
+
+        Args:
+            file: where the report is printed, defaults to the standard error.
+        """
+        file = file or sys.stderr
+        print(f"{'Phase':<24} {'Wall (s)':>10} {'CPU (s)':>10} {'Calls':>8}", file=file)
+        for name, phase in sorted(self.phases.items(), key=lambda item: item[1]["wall"], reverse=True):
+            print(f"{name:<24} {phase['wall']:>10.4f} {phase['cpu']:>10.4f} {phase['calls']:>8}", file=file)
+        if self.counters:
+            print(f"{'Counter':<24} {'Value':>10}", file=file)
+        for name, value in self.counters.items():
+            print(f"{name:<24} {value:>10}", file=file)
+
+
+def cpuTime() -> float:
+    """Returns the CPU time used by this process and by the children it waited for, in seconds."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+NO_PHASE = contextlib.nullcontext() # returned by RunStats.phase when the stats are disabled
+NO_ITEM = object() # marks the end of the items of RunStats.timedItems
+
+# the stats of this process, enabled by --profile
+runStats = RunStats()
+
+
+class InputException(Exception):
+    """Base of the exceptions raised by checkSequence.
+
+    Their constructors build the message from other arguments, so they are pickled with the message only
+    and rebuilt without calling __init__: this way they can cross the pipes of the worker processes.
+    """
+    def __reduce__(self):
+        return (Exception.__new__, (type(self), *self.args), self.__dict__)
+
+
+class EmptyLabelException(InputException):
     """Custom exception raised when the inserted label is empty."""
-    def __init__(self, sequence: str):
+    def __init__(self, sequence: Sequence):
         """Initialize the EmptyLabelException with a detailed error message.
 
         Args:
-            sequence (str): the sequence with the empty label.
+            sequence (Sequence): the sequence with the empty label, only its start is shown (see sequenceExcerpt).
         """
-        message = f"Insertion error in {sequence}: the label can't be empty"
+        message = f"Insertion error in {sequenceExcerpt(sequence)}: the label can't be empty"
         super().__init__(message)
 
 
-class EmptySequenceException(Exception):
+class EmptySequenceException(InputException):
     """Custom exception raised when the inserted sequence is empty."""
     def __init__(self, label: str):
         """Initialize the EmptySequenceException with a detailed error message.
@@ -48,166 +202,492 @@ class EmptySequenceException(Exception):
         super().__init__(message)
 
 
-class NucleotideException(Exception):
+class NucleotideException(InputException):
     """Custom exception raised when an invalid nucleotide is found in a sequence.
 
     This exception is used to signal that a sequence contains characters other than
     the allowed nucleotides: A, C, T, or G.
 
     """
-    def __init__(self, character: str, sequence: str, label: str):
+    def __init__(self, character: str, sequence: Sequence, label: str, position: int | None = None):
         """Initialize the NucleotideException with a detailed error message.
 
+        The message shows only the part of the sequence around the invalid character (see
+        sequenceExcerpt), with its position when the sequence is too long to be shown whole.
+
         Args:
             character (str): the invalid nucleotide character found in the sequence.
-            sequence (str): the sequence containing the invalid character.
+            sequence (Sequence): the sequence containing the invalid character, it isn't kept.
             label (str): a label to identify the sequence.
+            position (int | None): the 0-based position of the first invalid character in the sequence.
         """
-        message = f"Insertion error in the {label} ('{sequence}'): invalid nucleotide '{character}'. Sequences must contain only A, C, T, or G."
+        self.character = character
+        self.position = position
+        context = sequenceExcerpt(sequence, position or 0)
+        where = f", position {position + 1}" if position is not None and len(sequence) > 2 * ERROR_CONTEXT + 1 else ""
+        message = f"Insertion error in the {label} ('{context}'{where}): invalid nucleotide '{character}'. Sequences must contain only A, C, T, or G."
         super().__init__(message)
 
 
-def checkSequence(sequence: str, label: str) -> str:
+def checkSequence(sequence: Sequence, label: str) -> Sequence:
     """Checks if the inserted sequence contains acceptable nucleotides.
 
+    The whole sequence is checked at once with the NUCLEOTIDE_CODES table.
+
     Args:
-        sequence (str): the sequence you want to check.
+        sequence (Sequence): the sequence you want to check, a string or an array read by readFasta
+                                (already stripped and uppercase).
         label (str): a label to identify the sequence.
 
     Raises:
         NucleotideException: insertion error if a sequence contains invalid characters.
     """
     if not label: raise EmptyLabelException(sequence)
-    
-    sequence = sequence.strip().upper() # so it's possible to write actg without errors
-    
-    if not sequence: raise EmptySequenceException(label)
 
-    for nucleotide in sequence:
-        if nucleotide not in "ACTG": 
-            raise NucleotideException(nucleotide, sequence, label)
+    if not isinstance(sequence, np.ndarray):
+        sequence = sequence.strip().upper() # so it's possible to write actg without errors
+
+    if not len(sequence): raise EmptySequenceException(label)
+
+    invalid = np.flatnonzero(NUCLEOTIDE_CODES[asciiCodes(sequence)] == INVALID_CODE)
+    if len(invalid):
+        position = int(invalid[0])
+        raise NucleotideException(sequenceText(sequence[position:position + 1]), sequence, label, position)
+
+    return sequence
+
+
+def asciiCodes(sequence: Sequence) -> np.ndarray:
+    """Returns the characters of a sequence as a uint8 array, one per character.
+
+    Args:
+        sequence (Sequence): a string or an array of ASCII codes, returned as it is.
+
+    Returns:
+        np.ndarray: the codes of the characters, the ones that are not Latin-1 become '?'.
+    """
+    if isinstance(sequence, np.ndarray):
+        return sequence
+    return np.frombuffer(sequence.encode("latin-1", errors="replace"), dtype=np.uint8)
+
+
+def sequenceText(sequence: Sequence) -> str:
+    """Returns a sequence as a string.
+
+    Args:
+        sequence (Sequence): a string or an array of ASCII codes.
+
+    Returns:
+        str: the sequence as a string.
+    """
+    return sequence if isinstance(sequence, str) else sequence.tobytes().decode("latin-1")
+
+
+ERROR_CONTEXT = 20 # characters shown on each side of an invalid one in the error messages
+
+def sequenceExcerpt(sequence: Sequence, position: int = 0) -> str:
+    """Returns the part of a sequence around a position, so error messages stay short for long sequences.
+
+    Args:
+        sequence (Sequence): a string or an array of ASCII codes.
+        position (int): the 0-based position to show.
+
+    Returns:
+        str: at most ERROR_CONTEXT characters on each side of the position, "..." marks the cut ends.
+    """
+    start, stop = max(0, position - ERROR_CONTEXT), min(len(sequence), position + ERROR_CONTEXT + 1)
+    return ("..." if start else "") + sequenceText(sequence[start:stop]) + ("..." if stop < len(sequence) else "")
+
+
+FASTA_BLOCK_SIZE = 1 << 24 # bytes of a record cleaned at a time, bounds the temporary masks of readFasta
+
+def cleanFastaBody(data: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Copies the sequence of a FASTA record without whitespace and in uppercase.
+
+    Args:
+        data (np.ndarray): the bytes of the whole file.
+        start (int): the position where the sequence lines start.
+        stop (int): the position where the record ends.
+
+    Returns:
+        np.ndarray: the sequence as a uint8 array of ASCII codes.
+    """
+    sequence = np.empty(max(stop - start, 0), dtype=np.uint8)
+    length = 0
+    for blockStart in range(start, stop, FASTA_BLOCK_SIZE):
+        block = data[blockStart:min(blockStart + FASTA_BLOCK_SIZE, stop)]
+        kept = block[block > 32] # drops line breaks, carriage returns, spaces and tabs
+        sequence[length:length + len(kept)] = kept
+        length += len(kept)
+
+    sequence = sequence[:length]
+    sequence[(sequence >= ord('a')) & (sequence <= ord('z'))] -= 32 # so it's possible to write actg without errors
+    return sequence
+
 
-    return sequence          
+def readFasta(path: str) -> Iterator[tuple[str, np.ndarray]]:
+    """Reads the records of a (multi-)FASTA file without building Python strings of the sequences.
 
+    The file is memory-mapped and each record is cleaned block by block with numpy: line breaks and
+    other whitespace are dropped and lowercase letters are turned to uppercase.
 
-def createMatrix(args: Params, *, isDirectionMatrix: bool) -> np.ndarray:
+    Args:
+        path (str): the path of the FASTA file.
+
+    Yields:
+        tuple[str, np.ndarray]: the header of each record (without '>') and its sequence as a uint8 array of ASCII codes.
+
+    Raises:
+        ValueError: if the file doesn't start with a '>' header.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    try:
+        start = 0
+        while start < len(data) and data[start] <= 32: # blank lines before the first header
+            start += 1
+        if start == len(data):
+            return
+        if mapped[start:start + 1] != b'>':
+            raise ValueError(f"{path}: a FASTA file must start with a '>' header")
+
+        while start != -1:
+            headerEnd = mapped.find(b'\n', start)
+            if headerEnd == -1:
+                headerEnd = len(data)
+            nextStart = mapped.find(b'\n>', headerEnd)
+            bodyEnd = len(data) if nextStart == -1 else nextStart
+
+            yield mapped[start + 1:headerEnd].decode().strip(), cleanFastaBody(data, headerEnd + 1, bodyEnd)
+            start = nextStart if nextStart == -1 else nextStart + 1
+    finally:
+        del data # the map can't be closed while numpy views on it exist
+        mapped.close()
+
+
+def createMatrix(args: Params, *, isDirectionMatrix: bool, shared: bool = False, path: str | None = None) -> np.ndarray:
     """Creates and initialize a matrix for sequence alignment.
 
     Args:
         args (Params): an object containing matrix dimensions and alignment parameters.
         isDirectionMatrix (bool): if True, initializes a direction matrix, if False, 
                                     initializes a score matrix.
+        shared (bool): if True, the matrix is allocated in shared memory (see sharedMatrix),
+                        so the parallel engines fill it in place.
+        path (str | None): if set, the matrix is a memory-mapped file at this path (see mappedMatrix).
 
     Returns:
         np.ndArray: the initialized score matrix or direction matrix
     """
-    matrix = np.zeros(args.shape, dtype = "S9" if isDirectionMatrix else np.int32) 
+    dtype = np.uint8 if isDirectionMatrix else np.int32
+    if path is not None:
+        matrix = mappedMatrix(path, args.shape, dtype)
+    else:
+        matrix = sharedMatrix(args.shape, dtype) if shared else np.zeros(args.shape, dtype = dtype)
     # seq1 = x = columns, seq2 = y = rows
-    
-    for x in range(1, args.shape[1]):
-        matrix[0][x] = LEFT_DIR if isDirectionMatrix else x * args.gapPenalty
-        # first row of the matrix, for each column add the gap penalty from the cell before
 
-    for y in range(1, args.shape[0]):
-        matrix[y][0] = UP_DIR if isDirectionMatrix else y * args.gapPenalty
-        # for each row, in position 0 (first column), add the gap penalty from the cell above
+    # first row of the matrix, for each column add the gap penalty from the cell before
+    matrix[0, 1:] = LEFT_FLAG if isDirectionMatrix else np.arange(1, args.shape[1]) * args.gapPenalty
 
-    return matrix   
+    # for each row, in position 0 (first column), add the gap penalty from the cell above
+    matrix[1:, 0] = UP_FLAG if isDirectionMatrix else np.arange(1, args.shape[0]) * args.gapPenalty
+
+    return matrix
  
 
-def calculateAntidiagonals(args: Params) -> list:
-    """Computes the list of anti-diagonals for a matrix of a given shape.
+class SharedSegment:
+    """A multiprocessing.shared_memory segment that numpy arrays can be built on.
+
+    The arrays keep the segment alive: it's closed when the last one is freed, and unlinked too
+    if this process created it, so the matrices can be returned by the engines without copying them.
+    """
+    def __init__(self, size: int = 0, name: str | None = None):
+        """Creates a new segment, or attaches to an existing one if name is given.
+
+        Args:
+            size (int): the size in bytes of the new segment.
+            name (str | None): the name of the segment to attach to.
+        """
+        self.isOwner = name is None
+        if self.isOwner:
+            runStats.count("sharedBytes", size)
+        # the workers don't register the segment with the resource tracker, only its creator unlinks it
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, size)) if self.isOwner else shared_memory.SharedMemory(name=name, track=False)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self.memory.buf)
+
+    def __release_buffer__(self, view: memoryview) -> None:
+        view.release()
+
+    def __del__(self):
+        self.memory.close()
+        if self.isOwner:
+            self.memory.unlink()
+
+
+type SharedHandle = tuple[str, str, tuple[int, int], str]
+"""
+The (kind, name, shape, dtype) of a matrix that other processes can attach to (see attachShared):
+kind is "memory" for a shared memory segment (see sharedMatrix) and "file" for a memory-mapped file (see mappedMatrix).
+"""
+
+def sharedMatrix(shape: tuple[int, int], dtype: np.dtype) -> np.ndarray:
+    """Allocates a matrix of zeros in a new shared memory segment.
+
+    Args:
+        shape (tuple[int, int]): the dimensions of the matrix.
+        dtype (np.dtype): the type of the cells.
+
+    Returns:
+        np.ndarray: the matrix, its segment is freed together with it.
+    """
+    dtype = np.dtype(dtype)
+    # a new segment is always filled with zeros
+    return np.ndarray(shape, dtype=dtype, buffer=SharedSegment(shape[0] * shape[1] * dtype.itemsize))
+
+
+def mappedMatrix(path: str, shape: tuple[int, int], dtype: np.dtype) -> np.memmap:
+    """Creates a matrix of zeros in a memory-mapped file, so it can be larger than the RAM.
+
+    Args:
+        path (str): the path of the file, overwritten if it exists.
+        shape (tuple[int, int]): the dimensions of the matrix.
+        dtype (np.dtype): the type of the cells.
+
+    Returns:
+        np.memmap: the matrix, only the pages in use are kept in memory by the page cache.
+    """
+    runStats.count("mappedBytes", shape[0] * shape[1] * np.dtype(dtype).itemsize)
+    return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+
+def sharedHandle(matrix: np.ndarray) -> SharedHandle | None:
+    """Returns the handle of a matrix allocated by sharedMatrix or mappedMatrix.
+
+    Args:
+        matrix (np.ndarray): the matrix.
+
+    Returns:
+        SharedHandle | None: the handle, or None if the matrix isn't a whole shared memory segment or mapped file.
+    """
+    root = matrix
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+
+    # a view that doesn't start at the beginning of the matrix can't be attached to
+    if not matrix.flags.c_contiguous or matrix.__array_interface__["data"][0] != root.__array_interface__["data"][0]:
+        return None
+
+    if isinstance(root.base, SharedSegment):
+        return "memory", root.base.memory.name, matrix.shape, matrix.dtype.str
+    if isinstance(root, np.memmap) and isinstance(root.base, mmap.mmap) and root.offset == 0:
+        return "file", root.filename, matrix.shape, matrix.dtype.str
+    return None
+
+
+def toShared(matrix: np.ndarray) -> np.ndarray:
+    """Returns the matrix if other processes can attach to it (see sharedHandle), otherwise a copy of it in shared memory.
+
+    Args:
+        matrix (np.ndarray): the matrix.
+
+    Returns:
+        np.ndarray: a matrix with the same content that sharedHandle accepts.
+    """
+    if sharedHandle(matrix) is not None:
+        return matrix
+
+    copy = sharedMatrix(matrix.shape, matrix.dtype)
+    copy[:] = matrix
+    return copy
+
+
+def attachShared(handle: SharedHandle) -> np.ndarray:
+    """Attaches a worker to a matrix in shared memory or in a mapped file, the returned array is a view on the same memory.
+
+    Args:
+        handle (SharedHandle): the handle of the matrix (see sharedHandle).
+
+    Returns:
+        np.ndarray: the matrix, writes are seen by every process attached to it.
+    """
+    kind, name, shape, dtype = handle
+    if kind == "file":
+        return np.memmap(name, dtype=dtype, mode="r+", shape=shape)
+    return np.ndarray(shape, dtype=dtype, buffer=SharedSegment(name=name))
+
+
+class AntiDiagonals:
+    """The anti-diagonals of a matrix, computed on demand instead of being stored as lists of cells.
+
+    It behaves like the list of anti-diagonals (indexing, iteration, len and comparison with a list),
+    where each anti-diagonal is a list of (x, y) tuples going down-left, but only the diagonal that is
+    asked for is built. The engines use bounds, interior or indices, which never build the tuples.
+    """
+    def __init__(self, shape: tuple[int, int]):
+        """Initialize the anti-diagonals of a matrix.
+
+        Args:
+            shape (tuple[int, int]): the dimensions of the matrix.
+        """
+        self.shape = tuple(shape)
+
+    def __len__(self) -> int:
+        return self.shape[0] + self.shape[1] - 1 if self.shape[0] and self.shape[1] else 0
+
+    def bounds(self, index: int) -> tuple[int, int, int]:
+        """Returns where an anti-diagonal starts and how long it is.
+
+        Args:
+            index (int): the index of the anti-diagonal (x + y of its cells).
+
+        Returns:
+            tuple[int, int, int]: the (x, y) coordinates of its top-right cell and its number of cells.
+        """
+        rows, columns = self.shape
+        if index < columns: # diagonals starting on the first row
+            return index, 0, min(rows, index + 1)
+
+        y = index - columns + 1 # diagonals starting on the last column
+        return columns - 1, y, min(columns, rows - y)
+
+    def interior(self, index: int) -> tuple[int, int]:
+        """Returns the columns of the cells of an anti-diagonal that are not on the first row or column.
+
+        Args:
+            index (int): the index of the anti-diagonal.
+
+        Returns:
+            tuple[int, int]: the (start, stop) bounds of the x coordinates, stop excluded.
+        """
+        return interiorBounds(self.shape, index)
+
+    def indices(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the coordinates of the cells of an anti-diagonal as numpy arrays.
+
+        Args:
+            index (int): the index of the anti-diagonal.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: the x and y coordinates, in the same order as the tuples.
+        """
+        x, y, length = self.bounds(index)
+        return np.arange(x, x - length, -1), np.arange(y, y + length)
+
+    def __getitem__(self, index: int) -> list[tuple[int, int]]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("anti-diagonal index out of range")
+
+        x, y, length = self.bounds(index)
+        return [(x - step, y + step) for step in range(length)]
+
+    def __iter__(self) -> Iterator[list[tuple[int, int]]]:
+        return (self[index] for index in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, AntiDiagonals):
+            return self.shape == other.shape
+        if isinstance(other, list):
+            return len(self) == len(other) and all(diagonal == otherDiagonal for diagonal, otherDiagonal in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AntiDiagonals(shape={self.shape})"
+
+
+def calculateAntidiagonals(args: Params) -> AntiDiagonals:
+    """Computes the anti-diagonals for a matrix of a given shape.
 
     Args:
         args (Params): an object containing matrix dimensions and alignment parameters.
 
     Returns:
-        list: a list of anti-diagonals, where each anti-diagonal is a list of (x, y) tuples.
+        AntiDiagonals: the anti-diagonals, each one (built on demand) is a list of (x, y) tuples.
     """
-    rows, columns = args.shape 
-    antiDiagonals = [] # each singleDiagList is inserted in this list with the last 'append'
-    for index in range(columns):
-        startAtTopDiagonals = [] # each diagonal is inserted in this list with the first 'append'
-        x = index
-        y = 0
-        for _ in range(min(rows, index + 1)): 
-            startAtTopDiagonals.append((x, y)) # here because I want to append the first cell too
-            x -= 1
-            y += 1
-        
-        antiDiagonals.append(startAtTopDiagonals)
-
-    for j in range(1, rows):
-        startAtRightDiagonals = []
-        x = columns - 1
-        y = j
-        for _ in range(min(columns, rows - j)):
-            startAtRightDiagonals.append((x, y))
-            x -= 1
-            y += 1
-
-        antiDiagonals.append(startAtRightDiagonals)
-    
-    return antiDiagonals
+    return AntiDiagonals(args.shape)
 
 
-def calculateSingleCellScore(cell: tuple[int,int], args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> None:
+def calculateSingleCellScore(cell: tuple[int,int], args: Params, codes: tuple[int, int], scoreHandle: SharedHandle, directionHandle: SharedHandle) -> None:
     """Computes the score and direction for a single cell in the alignment matrix.
 
     Args:
         cell (tuple[int,int]): the (x, y) coordinates of the cell to compute.
         args (Params): an object containing matrix dimensions and alignment parameters.
-        scoreMatrix (np.ndarray): the scoring matrix.
-        directionMatrix (np.ndarray): the direction matrix.
+        codes (tuple[int, int]): the codes of the nucleotides of the cell, seq1[x - 1] and seq2[y - 1] (see sequenceCodes).
+        scoreHandle (SharedHandle): the shared scoring matrix.
+        directionHandle (SharedHandle): the shared direction matrix.
     """
-    x, y = cell
+    scoreMatrix = attachShared(scoreHandle)
+    directionMatrix = attachShared(directionHandle)
 
-    scoreMatrix = np.frombuffer(scoreMatrix.get_obj(), dtype=np.int32).reshape(args.shape)
-    directionMatrix = np.frombuffer(directionMatrix.get_obj(), dtype='S9').reshape(args.shape)
+    updateCell(cell, args, *codes, scoreMatrix, directionMatrix)
+
+
+def updateCell(cell: tuple[int,int], args: Params, code1: int, code2: int, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> None:
+    """Computes the score and direction for a single cell, writing them into numpy matrices.
+
+    Args:
+        cell (tuple[int,int]): the (x, y) coordinates of the cell to compute.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        code1 (int): the code of the nucleotide of the column, seq1[x - 1] (see sequenceCodes).
+        code2 (int): the code of the nucleotide of the row, seq2[y - 1].
+        scoreMatrix (np.ndarray): the scoring matrix (already a numpy view).
+        directionMatrix (np.ndarray): the direction matrix (already a numpy view).
+    """
+    x, y = cell
 
     upScore = scoreMatrix[y-1][x] + args.gapPenalty
     leftScore = scoreMatrix[y][x-1] + args.gapPenalty
     
     # diagonal move
-    if args.seq1[x-1] == args.seq2[y-1]:
+    if code1 == code2:
         diagScore = scoreMatrix[y-1][x-1] + args.match
     else:
         diagScore = scoreMatrix[y-1][x-1] + args.misMatch
     
     scoreMatrix[y][x] = max(upScore, leftScore, diagScore) # pick the highest
 
-    cellDirections = b""
+    cellDirections = 0
 
     # you can have multiple directions (same score)
     if scoreMatrix[y][x] == diagScore:
-        cellDirections += DIAG_DIR
+        cellDirections |= DIAG_FLAG
 
     if scoreMatrix[y][x] == upScore:
-        cellDirections += UP_DIR
+        cellDirections |= UP_FLAG
  
     if scoreMatrix[y][x] == leftScore:
-        cellDirections += LEFT_DIR
+        cellDirections |= LEFT_FLAG
 
     directionMatrix[y][x] = cellDirections
 
 
-def fillMatrix(antiDiagonals: list, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+def fillMatrix(antiDiagonals: AntiDiagonals, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """Fills the score and direction matrices using parallel processing.
 
     The function returns the filled matrices after computing alignment scores cell-by-cell.
 
     Args:
-        antiDiagonals (list): a list of anti-diagonals, where each anti-diagonal is a list 
+        antiDiagonals (AntiDiagonals): the anti-diagonals, where each anti-diagonal is a list 
                                 of (column, row) positions to process.
         args (Params): an object containing matrix dimensions and alignment parameters.
         scoreMatrix (np.ndarray): the scoring matrix you want to fill.
         directionMatrix (np.ndarray): the direction matrix you want to fill.
 
     Returns:
-        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix.
+        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix,
+                                        in shared memory (the same arrays if they already were).
     """
-    directionMatrix = Array(c_char, directionMatrix.tobytes())
-    scoreMatrix = Array(c_int, scoreMatrix.flatten())
+    scoreMatrix, directionMatrix = toShared(scoreMatrix), toShared(directionMatrix)
+    handles = (sharedHandle(scoreMatrix), sharedHandle(directionMatrix))
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
 
     # multiprocessing
     for diag in antiDiagonals:
@@ -217,196 +697,2811 @@ def fillMatrix(antiDiagonals: list, args: Params, scoreMatrix: np.ndarray, direc
             x, y = cell
             if y == 0 or x == 0:  # optimization -> putting the check here avoids creating useless processes
                 continue
-            p = Process(target=calculateSingleCellScore, args=(cell, args, scoreMatrix, directionMatrix))
+            p = Process(target=calculateSingleCellScore, args=(cell, args, (codes1[x - 1], codes2[y - 1]), *handles))
             p.daemon = True
             p.start()
+            runStats.count("processesStarted")
             processes.append(p)
        
         # Wait for all processes in the current anti-diagonal to finish before moving on
         list(map(lambda p: p.join(), processes))
 
-    return np.frombuffer(scoreMatrix.get_obj(), dtype=np.int32).reshape(args.shape), np.frombuffer(directionMatrix.get_obj(), dtype='S9').reshape(args.shape)
-
+    return scoreMatrix, directionMatrix
 
 
-def getScore(args: Params, scoreMatrix: np.ndarray) -> int:
-    """Returns the alignment score.
+def countWorkers(args: Params) -> int:
+    """Returns how many worker processes a parallel engine should start.
 
     Args:
         args (Params): an object containing matrix dimensions and alignment parameters.
-        scoreMatrix (np.ndarray): the filled score matrix.
 
     Returns:
-        int: the alignment score.
+        int: args.workers if it was set, otherwise the number of cores available to this process.
+
+    Raises:
+        ValueError: if args.workers is not positive.
     """
-    return scoreMatrix[args.shape[0] - 1, args.shape[1] - 1] 
+    workers = getattr(args, "workers", None)
+    if workers is None:
+        workers = os.process_cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"The number of workers must be positive, got {workers}")
 
+    return workers
 
 
-def traceback(directionMatrix: np.ndarray, args: Params) -> list[tuple[str, str]]:
-    """Reconstructs all optimal alignments by following the traceback paths.
+def chunkBounds(length: int, workerId: int, workersAmount: int) -> tuple[int, int]:
+    """Splits a range of the given length into contiguous chunks and returns the one of a worker.
 
-    Starting from the bottom-right cell of the direction matrix, this function explores
-    all possible paths back to the top-left, building aligned sequences along the way.
-    It returns all optimal alignments according to the directions encoded in the matrix.
+    The first (length % workersAmount) workers get one extra element, so chunk sizes differ by one at most.
 
     Args:
-        directionMatrix (np.ndarray): the direction matrix
-        args (Params): an object containing matrix dimensions and alignment parameters.
+        length (int): the number of elements to split.
+        workerId (int): the index of the worker (0-based).
+        workersAmount (int): the total number of workers.
 
     Returns:
-        list: a list of tuples, each containing a pair of aligned sequences.
+        tuple[int, int]: the (start, stop) bounds of the chunk, stop excluded.
     """
-    x = args.shape[1] - 1
-    y = args.shape[0] - 1
+    size, extra = divmod(length, workersAmount)
+    start = workerId * size + min(workerId, extra)
+    return start, start + size + (workerId < extra)
 
-    stack = [(y, x, "", "")] # starting from the last cell 
-    possibleAlignments = [] # where all the alignments are saved (as tuples of two strings)
 
-    while stack: # until the stack is not empty (until we have paths)
-        y, x, wipSequence1, wipSequence2 = stack.pop() # removes the last element
-
-        if y == 0 or x == 0: # when you touch one of the two edges (top or left) you add all the remaining sequence (last thing you do, only if the path does not end in 0,0)
-            finalSequence1 = '-' * y + args.seq1[:x] + wipSequence1 
-            finalSequence2 = '-' * x + args.seq2[:y] + wipSequence2
-            possibleAlignments.append((finalSequence1, finalSequence2))
-            continue
-        
-        # defining your current position (remember that the length of the matrix is len(seq)+1) -> last cell 
-        nuclLeft = args.seq2[y - 1]
-        nuclUp = args.seq1[x - 1]
+def poolWorker(workerId: int, workersAmount: int, antiDiagonals: AntiDiagonals, args: Params, scoreHandle: SharedHandle, directionHandle: SharedHandle, barrier: Barrier) -> None:
+    """Body of a long-lived worker of fillMatrixPool.
 
-        directions = directionMatrix[y][x]
+    The worker attaches to the shared matrices once, then fills its own chunk of every anti-diagonal
+    with numpy (see fillAntidiagonalSegment) and waits on the barrier, so no one starts a diagonal
+    before the previous one is complete.
 
-        if DIAG_DIR in directions:
-            newPosition = [y - 1, x - 1] # diagonal move
-            alignedSequences = [nuclUp + wipSequence1, nuclLeft + wipSequence2] # you have to add the nucleotides on both sequences 
+    Args:
+        workerId (int): the index of this worker (0-based).
+        workersAmount (int): the total number of workers sharing the barrier.
+        antiDiagonals (AntiDiagonals): the anti-diagonals of the matrices.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreHandle (SharedHandle): the shared scoring matrix.
+        directionHandle (SharedHandle): the shared direction matrix.
+        barrier (Barrier): the barrier shared by all the workers.
+    """
+    scoreMatrix = attachShared(scoreHandle)
+    directionMatrix = attachShared(directionHandle)
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
 
-            stack.append((*newPosition, *alignedSequences)) # '*' because you have to add everything inside these variables
+    for index in range(len(antiDiagonals)):
+        start, stop = antiDiagonals.interior(index) # the first row and column are already initialized
+        if start == stop:
+            continue # every worker skips the same diagonals, so the barrier stays aligned
 
-        if LEFT_DIR in directions:
-            newPosition = [y, x - 1] # same row, different column
-            alignedSequences = [nuclUp + wipSequence1, '-' + wipSequence2]
-            # you have to add the nucleotide in the horizontal sequence, in the other you have a gap
-        
-            stack.append((*newPosition, *alignedSequences)) # '*' because you have to add everything inside these variables
+        chunkStart, chunkStop = chunkBounds(stop - start, workerId, workersAmount)
+        fillAntidiagonalSegment(index, start + chunkStart, start + chunkStop, args, codes1, codes2, scoreMatrix, directionMatrix)
 
-        if UP_DIR in directions:
-            newPosition = [y - 1, x] # same column, different row
-            alignedSequences = ['-' + wipSequence1, nuclLeft + wipSequence2]
-        
-            stack.append((*newPosition, *alignedSequences)) # '*' because you have to add everything inside these variables
+        barrier.wait()
 
-    return possibleAlignments
 
+def fillMatrixPool(antiDiagonals: AntiDiagonals, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fills the score and direction matrices using a fixed pool of long-lived processes.
 
-def printPossibleAlignments(possibleAlignments: list[tuple[str, str]]) -> None:
-    """Prints all possible pairwise alignments between two sequences, highlighting matches, 
-    mismatches, and gaps.
+    Instead of starting one process per cell, the workers are started once. Each anti-diagonal is split
+    into contiguous chunks (one per worker) and the workers synchronize on a barrier between diagonals.
 
     Args:
-        possibleAlignments (list[tuple[str, str]]): a list of tuples, each containing two equal-length strings 'seq1' and 'seq2'
-                                                    (with '-' characters representing gaps).
+        antiDiagonals (AntiDiagonals): the anti-diagonals, each one is split into chunks by its bounds.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix,
+                                        in shared memory (the same arrays if they already were).
+
+    Raises:
+        RuntimeError: if one of the workers terminates with an error.
     """
-    for seq1, seq2 in possibleAlignments:
-        matchLine = ""
-        for nuc1, nuc2 in zip(seq1, seq2):
-            if nuc1 == nuc2: # it's never possible for both sequences to have a gap at the same position
-                matchLine += '|'
-            elif nuc1 == '-' or nuc2 == '-':
-                matchLine += ' '
-            else:
-                matchLine += '·'
-        
-        print(seq1, matchLine, seq2, sep='\n', end='\n'*2)
+    scoreMatrix, directionMatrix = toShared(scoreMatrix), toShared(directionMatrix)
 
+    # there is no point in having more workers than cells on the longest diagonal
+    workersAmount = max(1, min(countWorkers(args), min(args.shape) - 1))
+    barrier = Barrier(workersAmount)
 
-# The configuration for these Unicode characters is taken from an open-source repository that I also contribute to (https://github.com/M1keCodingProjects/PyChess)
-TOP    = "┌┬┐"
-MIDDLE = "├┼┤"
-BOTTOM = "└┴┘"
-WALL   = '─'
+    processes = []
+    for workerId in range(workersAmount):
+        p = Process(target=poolWorker, args=(workerId, workersAmount, antiDiagonals, args, sharedHandle(scoreMatrix), sharedHandle(directionMatrix), barrier))
+        p.daemon = True
+        p.start()
+        runStats.count("processesStarted")
+        processes.append(p)
+
+    running = {p.sentinel: p for p in processes}
+    while running:
+        for sentinel in wait(list(running)):
+            p = running.pop(sentinel)
+            p.join()
+            if p.exitcode != 0:
+                barrier.abort() # wakes up the workers waiting for the failed one
+                for other in running.values():
+                    other.terminate()
+                raise RuntimeError(f"A fill worker terminated with exit code {p.exitcode}")
+
+    return scoreMatrix, directionMatrix
 
-def generateLine(corners: str, cellsAmount: int) -> str:
-    """Constructs a line using corner characters and wall segments. 
+
+def sequenceCodes(sequence: Sequence) -> np.ndarray:
+    """Converts a sequence into an array of integer codes, so that nucleotides can be compared by numpy.
 
     Args:
-        corners (str): A string containing:
-                            corners[0] - Left corner character
-                            corners[1] - Between-cells character
-                            corners[-1] - Right corner character
-        cellsAmount (int): Number of cells in the row
+        sequence (Sequence): the sequence to convert, a string or an array read by readFasta.
 
     Returns:
-        str: The constructed line
+        np.ndarray: a uint8 array with one 2-bit code per nucleotide (see NUCLEOTIDE_CODES).
     """
-    return corners[0] + (WALL * 3 + corners[1]) * (cellsAmount - 1) + WALL * 3 + corners[-1]
+    return NUCLEOTIDE_CODES[asciiCodes(sequence)]
 
 
-def printDirectionMatrix(directionMatrix: np.ndarray) -> None:
-    """Formats and prints the direction matrix.
+def packSequence(codes: np.ndarray) -> tuple[np.ndarray, int]:
+    """Packs the 2-bit codes of a sequence four to a byte, so it takes a quarter of the memory to store or send to a worker.
 
     Args:
-        directionMatrix (np.ndarray): the filled direction matrix.
-    """
-    cellsAmount = directionMatrix.shape[1]
-    
-    topSeparator    = generateLine(TOP,    cellsAmount)
-    middleSeparator = generateLine(MIDDLE, cellsAmount)
-    bottomSeparator = generateLine(BOTTOM, cellsAmount)
+        codes (np.ndarray): the codes of the sequence (see sequenceCodes).
 
-    print(topSeparator)
-    
-    # Loop over twice the number of rows because each cell is printed in two lines (for different directions)
-    for y in range(0, 2 * directionMatrix.shape[0]):
-        isFirstLine = y % 2 == 0
-        rowBuff     = "│"
-        
-        # Loop over each column in the matrix
-        for x in range(directionMatrix.shape[1]):
-            if isFirstLine:
-                rowBuff += DIAG_DIR.decode() + ' '  if DIAG_DIR in directionMatrix[y // 2, x] else '  '
-                rowBuff += UP_DIR.decode()          if UP_DIR   in directionMatrix[y // 2, x] else ' '
-            else:
-                rowBuff += LEFT_DIR.decode() + '  ' if LEFT_DIR in directionMatrix[y // 2, x] else '   '
-        
-            rowBuff += '│'
+    Returns:
+        tuple[np.ndarray, int]: the packed bytes, the first code in the lowest bits, and the length of the sequence.
+    """
+    padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8) # ceiling to a multiple of 4
+    padded[:len(codes)] = codes
+    return padded[0::4] | padded[1::4] << 2 | padded[2::4] << 4 | padded[3::4] << 6, len(codes)
 
-        print((middleSeparator + '\n') * isFirstLine * (y != 0) + rowBuff)
-    print(bottomSeparator)
 
+def unpackSequence(packed: tuple[np.ndarray, int]) -> np.ndarray:
+    """Unpacks a sequence packed by packSequence.
 
-def main():
-    """Executes the main script"""
+    Args:
+        packed (tuple[np.ndarray, int]): the packed bytes and the length of the sequence.
+
+    Returns:
+        np.ndarray: the codes of the sequence.
+    """
+    data, length = packed
+    return ((data[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).ravel()[:length]
+
+
+def interiorBounds(shape: tuple[int, int], diagonal: int) -> tuple[int, int]:
+    """Returns the columns of the cells of an anti-diagonal that are not on the first row or column.
+
+    Args:
+        shape (tuple[int, int]): the dimensions of the matrices.
+        diagonal (int): the index of the anti-diagonal (x + y of its cells).
+
+    Returns:
+        tuple[int, int]: the (start, stop) bounds of the x coordinates, stop excluded (start == stop if there are none).
+    """
+    rows, columns = shape
+    start = max(1, diagonal - (rows - 1))
+    stop = min(columns - 1, diagonal - 1) + 1
+    return start, max(start, stop)
+
+
+def diagonalView(matrix: np.ndarray, y: int, x: int, length: int) -> np.ndarray:
+    """Returns a view on consecutive cells of an anti-diagonal, starting at (x, y) and moving down-left.
+
+    Args:
+        matrix (np.ndarray): a C-contiguous matrix.
+        y (int): the row of the first cell.
+        x (int): the column of the first cell.
+        length (int): the number of cells in the view.
+
+    Returns:
+        np.ndarray: a strided view (no copy), writing into it updates the matrix.
+    """
+    if not matrix.flags.c_contiguous:
+        raise ValueError("diagonalView needs a C-contiguous matrix")
+
+    step = matrix.shape[1] - 1
+    start = y * matrix.shape[1] + x
+    return matrix.reshape(-1)[start : start + (length - 1) * step + 1 : step]
+
+
+def fillAntidiagonalSegment(diagonal: int, start: int, stop: int, args: Params, codes1: np.ndarray, codes2: np.ndarray, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> None:
+    """Computes, with numpy operations, the scores and directions of a segment of an anti-diagonal.
+
+    The cells are the ones with start <= x < stop and y = diagonal - x, the two previous anti-diagonals
+    must already be filled. The scores and directions are the same that calculateSingleCellScore would compute.
+
+    Args:
+        diagonal (int): the index of the anti-diagonal (x + y of its cells).
+        start (int): the first column of the segment.
+        stop (int): the column after the last one of the segment.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        codes1 (np.ndarray): the codes of the first sequence (see sequenceCodes).
+        codes2 (np.ndarray): the codes of the second sequence.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+    """
+    length = stop - start
+    if length <= 0:
+        return
+
+    # the views start from the rightmost cell of the segment and go down-left
+    y, x = diagonal - (stop - 1), stop - 1
+
+    upScore = diagonalView(scoreMatrix, y - 1, x, length) + args.gapPenalty
+    leftScore = diagonalView(scoreMatrix, y, x - 1, length) + args.gapPenalty
+    isMatch = codes1[start - 1 : stop - 1][::-1] == codes2[y - 1 : y - 1 + length]
+    diagScore = diagonalView(scoreMatrix, y - 1, x - 1, length) + np.where(isMatch, args.match, args.misMatch)
+
+    bestScore = np.maximum(np.maximum(upScore, leftScore), diagScore)
+    diagonalView(scoreMatrix, y, x, length)[:] = bestScore
+
+    diagonalView(directionMatrix, y, x, length)[:] = (diagScore == bestScore) * DIAG_FLAG | (upScore == bestScore) * UP_FLAG | (leftScore == bestScore) * LEFT_FLAG
+
+
+def fillMatrixVectorized(antiDiagonals: AntiDiagonals, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fills the score and direction matrices in a single process, one whole anti-diagonal at a time.
+
+    Every cell of an anti-diagonal only depends on the two previous anti-diagonals, so each diagonal
+    is computed with a few numpy operations instead of one Python call per cell. The matrices are filled in place.
+
+    Args:
+        antiDiagonals (AntiDiagonals): the anti-diagonals of the matrices, kept for the common engine signature
+                                (the diagonals are walked by index here).
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix.
+    """
+    codes1 = sequenceCodes(args.seq1)
+    codes2 = sequenceCodes(args.seq2)
+
+    for diagonal in range(2, args.shape[0] + args.shape[1] - 1): # diagonals 0 and 1 only touch the first row and column
+        start, stop = interiorBounds(args.shape, diagonal)
+        fillAntidiagonalSegment(diagonal, start, stop, args, codes1, codes2, scoreMatrix, directionMatrix)
+
+    return scoreMatrix, directionMatrix
+
+
+DEFAULT_CACHE_SIZE = 1024 * 1024 # used when the size of the L2 cache can't be read from the system
+
+def autoTileSize(bytesPerCell: int) -> int:
+    """Chooses a tile size so that a tile of both matrices fits in the L2 cache.
+
+    Tiles are filled one row at a time with numpy, so they are never made smaller than 128 cells per side,
+    under that size the cost of the numpy calls outweighs the cache misses.
+
+    Args:
+        bytesPerCell (int): the bytes used by one cell of the score matrix plus one of the direction matrix.
+
+    Returns:
+        int: the side of the tiles, a multiple of 8 between 128 and 2048.
+    """
+    try:
+        cacheSize = os.sysconf("SC_LEVEL2_CACHE_SIZE")
+    except (ValueError, OSError):
+        cacheSize = 0
+
+    if cacheSize <= 0:
+        cacheSize = DEFAULT_CACHE_SIZE
+
+    side = int((cacheSize // bytesPerCell) ** 0.5)
+    return min(2048, max(128, side // 8 * 8))
+
+
+def tileBounds(shape: tuple[int, int], tileSize: int, tile: tuple[int, int]) -> tuple[int, int, int, int]:
+    """Returns the cells covered by a tile of the matrix, the first row and column are not part of any tile.
+
+    Args:
+        shape (tuple[int, int]): the dimensions of the matrices.
+        tileSize (int): the side of the tiles.
+        tile (tuple[int, int]): the (row, column) index of the tile.
+
+    Returns:
+        tuple[int, int, int, int]: the (firstRow, stopRow, firstColumn, stopColumn) bounds, stops excluded.
+    """
+    tileY, tileX = tile
+    firstRow, firstColumn = 1 + tileY * tileSize, 1 + tileX * tileSize
+    return firstRow, min(shape[0], firstRow + tileSize), firstColumn, min(shape[1], firstColumn + tileSize)
+
+
+def cumulativeRowScores(firstScore: int, bestNotLeft: np.ndarray, gapPenalty: int) -> np.ndarray:
+    """Adds the left moves to the scores of a segment of a row.
+
+    The left move makes each cell depend on the previous one, but with a constant gap penalty
+    H[x] = max(T[x], H[x-1] + gap) unrolls to H[x] = x * gap + max over k <= x of (T[k] - k * gap),
+    which is a cumulative maximum (T[x] being the best of the up and diagonal moves).
+
+    Args:
+        firstScore (int): the score of the cell on the left of the segment.
+        bestNotLeft (np.ndarray): the best score of the up and diagonal moves of each cell of the segment.
+        gapPenalty (int): the gap penalty.
+
+    Returns:
+        np.ndarray: the int64 scores of the row, starting from the cell on the left of the segment.
+    """
+    offsets = np.arange(len(bestNotLeft) + 1, dtype=np.int64) * gapPenalty
+    candidates = np.concatenate(([firstScore], bestNotLeft)) - offsets
+    return np.maximum.accumulate(candidates) + offsets
+
+
+def fillRowSegment(y: int, start: int, stop: int, args: Params, codes1: np.ndarray, codes2: np.ndarray, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> None:
+    """Computes, with numpy operations, the scores and directions of a segment of a row.
+
+    The cells are the ones with start <= x < stop on row y, the row above and the cell (start - 1, y) must already
+    be filled (see cumulativeRowScores for how the left moves are computed).
+
+    Args:
+        y (int): the row of the segment.
+        start (int): the first column of the segment.
+        stop (int): the column after the last one of the segment.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        codes1 (np.ndarray): the codes of the first sequence (see sequenceCodes).
+        codes2 (np.ndarray): the codes of the second sequence.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+    """
+    if stop <= start:
+        return
+
+    upScore = scoreMatrix[y - 1, start:stop].astype(np.int64) + args.gapPenalty
+    diagScore = scoreMatrix[y - 1, start - 1 : stop - 1] + np.where(codes1[start - 1 : stop - 1] == codes2[y - 1], args.match, args.misMatch)
+    bestNotLeft = np.maximum(upScore, diagScore)
+
+    rowScore = cumulativeRowScores(scoreMatrix[y, start - 1], bestNotLeft, args.gapPenalty) # rowScore[0] is the cell on the left of the segment
+
+    bestScore = rowScore[1:]
+    leftScore = rowScore[:-1] + args.gapPenalty
+    scoreMatrix[y, start:stop] = bestScore
+
+    directionMatrix[y, start:stop] = (diagScore == bestScore) * DIAG_FLAG | (upScore == bestScore) * UP_FLAG | (leftScore == bestScore) * LEFT_FLAG
+
+
+def fillMatrixRows(antiDiagonals: AntiDiagonals, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fills the score and direction matrices in a single process, one whole row at a time.
+
+    Rows are contiguous in memory and there are fewer of them than anti-diagonals, so for small
+    matrices this is the fill with the fewest numpy calls. The matrices are filled in place.
+
+    Args:
+        antiDiagonals (AntiDiagonals): the anti-diagonals of the matrices, kept for the common engine signature.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix.
+    """
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+    for y in range(1, args.shape[0]):
+        fillRowSegment(y, 1, args.shape[1], args, codes1, codes2, scoreMatrix, directionMatrix)
+
+    return scoreMatrix, directionMatrix
+
+
+def remainingScoreBound(remaining1: np.ndarray, remaining2: int | np.ndarray, args: Params) -> np.ndarray:
+    """Returns an upper bound of the score of aligning the last nucleotides of the two sequences.
+
+    With k aligned pairs the alignment has remaining1 + remaining2 - 2k gaps and the pairs score at most
+    max(match, misMatch) each. The bound is linear in k, so its maximum is at k = 0 or k = min(remaining1, remaining2).
+
+    Args:
+        remaining1 (np.ndarray): the numbers of nucleotides left in seq1, one per column.
+        remaining2 (int | np.ndarray): the number of nucleotides left in seq2 (an array broadcast with remaining1 for many pairs).
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        np.ndarray: the int64 bounds, one per column.
+    """
+    pairs = np.minimum(remaining1, remaining2)
+    return np.maximum(pairs * max(args.match, args.misMatch) + (remaining1 + remaining2 - 2 * pairs) * args.gapPenalty,
+                      (remaining1 + remaining2) * args.gapPenalty)
+
+
+def fillMatrixRowsAbove(args: Params, minScore: int, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> bool:
+    """Fills the matrices like fillMatrixRows, but stops as soon as the alignment score can't reach minScore.
+
+    Every path crosses each row, so after row y the final score is at most the best, over the columns x,
+    of the score of (y, x) plus the bound of the rest of the alignment (see remainingScoreBound).
+
+    Args:
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        minScore (int): the lowest accepted alignment score.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+
+    Returns:
+        bool: True if the matrices are complete and the score is at least minScore, False if the fill stopped.
+    """
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+    remaining1 = np.arange(args.shape[1] - 1, -1, -1, dtype=np.int64) # nucleotides of seq1 after each column
+
+    for y in range(args.shape[0]):
+        if y > 0:
+            fillRowSegment(y, 1, args.shape[1], args, codes1, codes2, scoreMatrix, directionMatrix)
+        if np.max(scoreMatrix[y] + remainingScoreBound(remaining1, args.shape[0] - 1 - y, args)) < minScore:
+            return False
+
+    return True
+
+
+def fillTile(tile: tuple[int, int], args: Params, tileSize: int, codes1: np.ndarray, codes2: np.ndarray, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> None:
+    """Fills every cell of a tile, one row of the tile at a time.
+
+    The tile above and the tile on the left (and the one above-left) must already be filled.
+
+    Args:
+        tile (tuple[int, int]): the (row, column) index of the tile.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        tileSize (int): the side of the tiles.
+        codes1 (np.ndarray): the codes of the first sequence (see sequenceCodes).
+        codes2 (np.ndarray): the codes of the second sequence.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+    """
+    firstRow, stopRow, firstColumn, stopColumn = tileBounds(args.shape, tileSize, tile)
+
+    for y in range(firstRow, stopRow):
+        fillRowSegment(y, firstColumn, stopColumn, args, codes1, codes2, scoreMatrix, directionMatrix)
+
+
+# state of a tile worker process, set once by initTileWorker
+tileWorkerState = {}
+
+def initTileWorker(scoreHandle: SharedHandle, directionHandle: SharedHandle, args: Params, tileSize: int) -> None:
+    """Attaches a worker of fillMatrixTiled to the shared memory segments of the matrices.
+
+    Args:
+        scoreHandle (SharedHandle): the shared score matrix.
+        directionHandle (SharedHandle): the shared direction matrix.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        tileSize (int): the side of the tiles.
+    """
+    tileWorkerState.update(
+        scoreMatrix     = attachShared(scoreHandle),
+        directionMatrix = attachShared(directionHandle),
+        args            = args,
+        tileSize        = tileSize,
+        codes1          = sequenceCodes(args.seq1),
+        codes2          = sequenceCodes(args.seq2),
+    )
+
+
+def fillSharedTile(tile: tuple[int, int]) -> None:
+    """Fills a tile of the shared matrices, called in a worker set up by initTileWorker.
+
+    Args:
+        tile (tuple[int, int]): the (row, column) index of the tile.
+    """
+    state = tileWorkerState
+    fillTile(tile, state["args"], state["tileSize"], state["codes1"], state["codes2"], state["scoreMatrix"], state["directionMatrix"])
+
+
+CHECKPOINT_INTERVAL = 60.0 # seconds between two checkpoints of the tiled engine
+
+class TileCheckpoint:
+    """The progress of the tiled engine on memory-mapped matrices, saved periodically so a fill can be resumed.
+
+    The progress is the frontier of the filled tiles: done[tileY] tiles of the row of tiles tileY are filled.
+    Both orders of the tiled engine (row-major and by tile anti-diagonals) fill a staircase of tiles, so a fill
+    can be resumed with a different number of workers. The file also holds the parameters of the fill,
+    a resume with other sequences, scores, shape or tile size is refused.
+    """
+    def __init__(self, path: str, args: Params, tileSize: int, tileRows: int):
+        """Prepares a checkpoint with no tile filled, or reads it from path if args.resume is set.
+
+        Args:
+            path (str): the path of the checkpoint file.
+            args (Params): an object containing matrix dimensions and alignment parameters.
+            tileSize (int): the side of the tiles.
+            tileRows (int): the number of rows of tiles.
+
+        Raises:
+            ValueError: if the checkpoint to resume from belongs to a different fill.
+        """
+        self.path = path
+        self.key = TileCheckpoint.fillKey(args, tileSize)
+        self.done = [0] * tileRows
+        self.lastSave = time.monotonic()
+
+        if getattr(args, "resume", False):
+            with open(path) as file:
+                saved = json.load(file)
+            if saved["key"] != self.key:
+                raise ValueError(f"{path}: the checkpoint belongs to a different alignment or tile size")
+            self.done = saved["done"]
+        elif os.path.exists(path):
+            os.remove(path) # a stale checkpoint doesn't describe the new matrices
+
+    @staticmethod
+    def savedTileSize(path: str) -> int:
+        """Returns the tile size of a saved checkpoint, a resumed fill must use the same tiles."""
+        with open(path) as file:
+            return json.load(file)["key"]["tileSize"]
+
+    @staticmethod
+    def fillKey(args: Params, tileSize: int) -> dict:
+        """Returns the parameters of a fill that a checkpoint must match to be resumed."""
+        digest = hashlib.sha256(sequenceCodes(args.seq1).tobytes() + b"-" + sequenceCodes(args.seq2).tobytes()).hexdigest()
+        return {"shape": list(args.shape), "match": args.match, "misMatch": args.misMatch, "gapPenalty": args.gapPenalty,
+                "tileSize": tileSize, "sequences": digest}
+
+    @staticmethod
+    def validate(path: str, args: Params) -> None:
+        """Checks that a saved checkpoint can be resumed for args, before any matrix is mapped.
+
+        Args:
+            path (str): the path of the checkpoint file.
+            args (Params): an object containing matrix dimensions and alignment parameters.
+
+        Raises:
+            ValueError: if the checkpoint can't be read or belongs to a different alignment.
+        """
+        try:
+            with open(path) as file:
+                key = json.load(file)["key"]
+            tileSize = key["tileSize"]
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            raise ValueError(f"{path}: the checkpoint can't be read ({error})") from error
+        if key != TileCheckpoint.fillKey(args, tileSize):
+            raise ValueError(f"{path}: the checkpoint belongs to a different alignment")
+
+    def save(self, scoreMatrix: np.memmap, directionMatrix: np.memmap, force: bool = False) -> None:
+        """Writes the progress, if CHECKPOINT_INTERVAL seconds have passed since the last time or force is set.
+
+        The matrices are flushed to disk first, and the file is replaced atomically, so a job stopped
+        at any moment leaves a checkpoint that matches the files.
+
+        Args:
+            scoreMatrix (np.memmap): the mapped score matrix.
+            directionMatrix (np.memmap): the mapped direction matrix.
+            force (bool): if True, the progress is written anyway.
+        """
+        if not force and time.monotonic() - self.lastSave < CHECKPOINT_INTERVAL:
+            return
+
+        scoreMatrix.flush()
+        directionMatrix.flush()
+        with open(self.path + ".tmp", "w") as file:
+            json.dump({"key": self.key, "done": self.done}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        self.lastSave = time.monotonic()
+
+
+def fillMatrixTiled(antiDiagonals: AntiDiagonals, args: Params, scoreMatrix: np.ndarray, directionMatrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fills the score and direction matrices with a blocked wavefront over a pool of processes.
+
+    The matrices are split into tiles of side args.tileSize (chosen from the cache size if it's not set).
+    Tiles on the same tile anti-diagonal don't depend on each other, so they are sent to the workers together,
+    and each worker fills whole tiles in place in shared memory.
+    With args.checkpoint set, the progress on memory-mapped matrices is saved periodically (see TileCheckpoint)
+    and args.resume skips the tiles that were already filled.
+
+    Args:
+        antiDiagonals (AntiDiagonals): the anti-diagonals of the matrices, kept for the common engine signature
+                                (the tiles are walked by index here).
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreMatrix (np.ndarray): the scoring matrix you want to fill.
+        directionMatrix (np.ndarray): the direction matrix you want to fill.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: a tuple containing the updated scoreMatrix and directionMatrix,
+                                        in shared memory (the same arrays if they already were) when a pool is used.
+
+    Raises:
+        ValueError: if args.checkpoint is set and the matrices are not memory-mapped files,
+                    or if args.tileSize is not positive.
+    """
+    checkpointPath = getattr(args, "checkpoint", None)
+    if checkpointPath and not (isinstance(scoreMatrix, np.memmap) and isinstance(directionMatrix, np.memmap)):
+        raise ValueError("Checkpoints need memory-mapped matrices (see mappedMatrix)")
+
+    if checkpointPath and getattr(args, "resume", False):
+        tileSize = TileCheckpoint.savedTileSize(checkpointPath)
+    else:
+        tileSize = getattr(args, "tileSize", None)
+        if tileSize is None:
+            tileSize = autoTileSize(scoreMatrix.itemsize + directionMatrix.itemsize)
+    if tileSize < 1:
+        raise ValueError(f"The side of the tiles must be positive, got {tileSize}")
+    tileRows = -(-(args.shape[0] - 1) // tileSize) # ceiling division
+    tileColumns = -(-(args.shape[1] - 1) // tileSize)
+    workersAmount = min(countWorkers(args), tileRows, tileColumns)
+    checkpoint = TileCheckpoint(checkpointPath, args, tileSize, tileRows) if checkpointPath else None
+    done = checkpoint.done if checkpoint else [0] * tileRows
+
+    if workersAmount <= 1: # a single worker (or a single tile per diagonal) doesn't need the pool
+        codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+        # the tiles above and on the left are done before each tile in row-major order too, and the memory
+        # (or a mapped file) is then read and written sequentially, one band of rows after the other
+        for tileY in range(tileRows):
+            for tileX in range(done[tileY], tileColumns):
+                fillTile((tileY, tileX), args, tileSize, codes1, codes2, scoreMatrix, directionMatrix)
+            done[tileY] = tileColumns
+            if checkpoint:
+                checkpoint.save(scoreMatrix, directionMatrix)
+    else:
+        scoreMatrix, directionMatrix = toShared(scoreMatrix), toShared(directionMatrix)
+
+        initArgs = (sharedHandle(scoreMatrix), sharedHandle(directionMatrix), args, tileSize)
+        runStats.count("processesStarted", workersAmount)
+        with Pool(workersAmount, initializer=initTileWorker, initargs=initArgs) as pool:
+            for tileDiagonal in range(tileRows + tileColumns - 1):
+                tiles = [(tileY, tileDiagonal - tileY) for tileY in range(max(0, tileDiagonal - tileColumns + 1), min(tileRows, tileDiagonal + 1))]
+                tiles = [(tileY, tileX) for tileY, tileX in tiles if tileX >= done[tileY]] # skips the tiles filled before a resume
+                pool.map(fillSharedTile, tiles, chunksize=1) # returns when the whole tile diagonal is done
+                runStats.count("tasksDispatched", len(tiles))
+
+                for tileY, tileX in tiles:
+                    done[tileY] = tileX + 1
+                if checkpoint:
+                    checkpoint.save(scoreMatrix, directionMatrix)
+
+    if checkpoint:
+        checkpoint.save(scoreMatrix, directionMatrix, force=True)
+    return scoreMatrix, directionMatrix
+
+
+# engines that can be selected with the --engine option, they all share the same signature
+FILL_ENGINES = {
+    "process":    fillMatrix,
+    "pool":       fillMatrixPool,
+    "vectorized": fillMatrixVectorized,
+    "rows":       fillMatrixRows,
+    "tiled":      fillMatrixTiled,
+}
+
+# engines that fill the matrices from other processes, main allocates their matrices in shared memory
+SHARED_ENGINES = {"process", "pool", "tiled"}
+
+
+
+def getScore(args: Params, scoreMatrix: np.ndarray) -> int:
+    """Returns the alignment score.
+
+    Args:
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        scoreMatrix (np.ndarray): the filled score matrix.
+
+    Returns:
+        int: the alignment score.
+    """
+    return scoreMatrix[args.shape[0] - 1, args.shape[1] - 1] 
+
+
+def nextScoreRow(previousRow: np.ndarray, firstScore: int, codes1: np.ndarray, code: int, args: Params) -> np.ndarray:
+    """Computes a row of the score matrix from the row above it, without directions.
+
+    Args:
+        previousRow (np.ndarray): the scores of the row above.
+        firstScore (int): the score of the first cell of the new row.
+        codes1 (np.ndarray): the codes of the sequence along the row (see sequenceCodes).
+        code (int): the code of the nucleotide of the new row.
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        np.ndarray: the int64 scores of the new row.
+    """
+    upScore = previousRow[1:] + args.gapPenalty
+    diagScore = previousRow[:-1] + np.where(codes1 == code, args.match, args.misMatch)
+    return cumulativeRowScores(firstScore, np.maximum(upScore, diagScore), args.gapPenalty)
+
+
+def lastScoreRow(codes1: np.ndarray, codes2: np.ndarray, args: Params, topRow: np.ndarray = None, leftColumn: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+    """Computes the last row and column of a block of the score matrix keeping only one row in memory.
+
+    Args:
+        codes1 (np.ndarray): the codes of the sequence along the columns of the block.
+        codes2 (np.ndarray): the codes of the sequence along the rows of the block.
+        args (Params): an object containing the alignment parameters.
+        topRow (np.ndarray, optional): the scores of the row above the block, including the corner on the left
+                                        (len(codes1) + 1 values), defaults to the first row of the score matrix.
+        leftColumn (np.ndarray, optional): the scores of the column on the left of the block, without the corner
+                                        (len(codes2) values), defaults to the first column of the score matrix.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the last row (len(codes1) + 1 values, the first one in the left column)
+                                        and the last column (len(codes2) values) of the block.
+    """
+    row = np.arange(len(codes1) + 1, dtype=np.int64) * args.gapPenalty if topRow is None else np.asarray(topRow, dtype=np.int64)
+    if leftColumn is None:
+        leftColumn = np.arange(1, len(codes2) + 1, dtype=np.int64) * args.gapPenalty
+
+    lastColumn = np.empty(len(codes2), dtype=np.int64)
+    for y, code in enumerate(codes2):
+        row = nextScoreRow(row, leftColumn[y], codes1, code, args)
+        lastColumn[y] = row[-1]
+
+    return row, lastColumn
+
+
+MIN_SCORE_TILE_SIZE = 512 # smaller tiles of the score-only mode spend more time in pool messages than computing
+
+# state of a score-only worker process, set once by initScoreWorker
+scoreWorkerState = {}
+
+def initScoreWorker(packed1: tuple[np.ndarray, int], packed2: tuple[np.ndarray, int], args: Params) -> None:
+    """Stores the sequences in a worker of calculateScoreOnly, so the tasks only carry the tile borders.
+
+    Args:
+        packed1 (tuple[np.ndarray, int]): the sequence along the columns, packed by packSequence.
+        packed2 (tuple[np.ndarray, int]): the sequence along the rows, packed by packSequence.
+        args (Params): an object containing the alignment parameters.
+    """
+    scoreWorkerState.update(codes1=unpackSequence(packed1), codes2=unpackSequence(packed2), args=args)
+
+
+def scoreSharedTile(task: tuple[int, int, int, int, np.ndarray, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Computes the last row and column of a tile, called in a worker set up by initScoreWorker.
+
+    Args:
+        task (tuple): the (firstRow, stopRow, firstColumn, stopColumn) bounds of the tile (in sequence positions)
+                        followed by its top row and left column.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the last row and column of the tile (see lastScoreRow).
+    """
+    firstRow, stopRow, firstColumn, stopColumn, topRow, leftColumn = task
+    state = scoreWorkerState
+    return lastScoreRow(state["codes1"][firstColumn:stopColumn], state["codes2"][firstRow:stopRow], state["args"], topRow, leftColumn)
+
+
+def calculateScoreOnly(args: Params) -> int:
+    """Computes the optimal global alignment score without building the score or direction matrices.
+
+    With a single worker only one row is kept in memory, and the shorter sequence is put along the rows,
+    so the memory is O(min(n, m)). With more workers the matrix is split into tiles that are computed
+    by a process pool, tile anti-diagonal by tile anti-diagonal, keeping only the borders of the tiles
+    (O(n + m) memory). Unit-cost scorings (see isUnitCost) are computed with bitParallelScoreRow instead.
+
+    Args:
+        args (Params): an object containing the sequences and the alignment parameters.
+
+    Returns:
+        int: the alignment score.
+
+    Raises:
+        ValueError: if args.tileSize is not positive.
+    """
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+    if len(codes1) > len(codes2): # the scoring is symmetric, swapping the sequences gives the same score
+        codes1, codes2 = codes2, codes1
+
+    runStats.count("cellsFilled", (len(codes1) + 1) * (len(codes2) + 1))
+    if isUnitCost(args): # one bit-parallel pass is faster than the tiles, the bit vectors run along the shorter sequence
+        return int(bitParallelScoreRow(codes2, codes1, args)[-1])
+
+    # only one row of a tile is in memory, so the tiles are made as large as possible: two per worker along the rows
+    workersAmount = countWorkers(args)
+    tileSize = getattr(args, "tileSize", None)
+    if tileSize is None:
+        tileSize = max(MIN_SCORE_TILE_SIZE, -(-len(codes1) // (2 * workersAmount)))
+    if tileSize < 1:
+        raise ValueError(f"The side of the tiles must be positive, got {tileSize}")
+    tileRows = -(-len(codes2) // tileSize) # ceiling division
+    tileColumns = -(-len(codes1) // tileSize)
+    workersAmount = min(workersAmount, tileRows, tileColumns)
+
+    if workersAmount <= 1:
+        lastRow, _ = lastScoreRow(codes1, codes2, args)
+        return int(lastRow[-1])
+
+    # bottomRows[tileX] is the last row computed in the column of tiles tileX, rightColumns[tileY] the last column in the row of tiles tileY
+    bottomRows = [np.arange(tileX * tileSize, min(len(codes1), (tileX + 1) * tileSize) + 1, dtype=np.int64) * args.gapPenalty for tileX in range(tileColumns)]
+    rightColumns = [np.arange(tileY * tileSize + 1, min(len(codes2), (tileY + 1) * tileSize) + 1, dtype=np.int64) * args.gapPenalty for tileY in range(tileRows)]
+
+    runStats.count("processesStarted", workersAmount)
+    with Pool(workersAmount, initializer=initScoreWorker, initargs=(packSequence(codes1), packSequence(codes2), args)) as pool:
+        for tileDiagonal in range(tileRows + tileColumns - 1):
+            tiles = [(tileY, tileDiagonal - tileY) for tileY in range(max(0, tileDiagonal - tileColumns + 1), min(tileRows, tileDiagonal + 1))]
+            tasks = [(tileY * tileSize, min(len(codes2), (tileY + 1) * tileSize), tileX * tileSize, min(len(codes1), (tileX + 1) * tileSize), bottomRows[tileX], rightColumns[tileY]) for tileY, tileX in tiles]
+
+            for (tileY, tileX), (bottomRow, rightColumn) in zip(tiles, pool.map(scoreSharedTile, tasks, chunksize=1)):
+                bottomRows[tileX], rightColumns[tileY] = bottomRow, rightColumn
+            runStats.count("tasksDispatched", len(tasks))
+
+    return int(bottomRows[-1][-1])
+
+
+class BandedMatrix:
+    """A matrix of which only the cells in a band of diagonals are stored.
+
+    The cell (y, x) is in the band when lowest <= x - y <= highest and is stored in data[y, x - y - lowest],
+    so the cell above is at data[y - 1, x - y - lowest + 1] and the one diagonally above at data[y - 1, x - y - lowest].
+    data has an extra column, always equal to outside, so that the cell above the last one of a row can be read
+    without a check. The cells outside the band (or outside the matrix) read as outside.
+    """
+    def __init__(self, shape: tuple[int, int], lowest: int, highest: int, dtype: np.dtype, outside: int):
+        """Allocates the band, with all of its cells equal to outside.
+
+        Args:
+            shape (tuple[int, int]): the dimensions of the whole matrix.
+            lowest (int): the lowest diagonal x - y of the band.
+            highest (int): the highest diagonal x - y of the band.
+            dtype (np.dtype): the type of the cells.
+            outside (int): the value of the cells that are not stored.
+        """
+        self.shape = shape
+        self.lowest, self.highest = lowest, highest
+        self.outside = outside
+        self.data = np.full((shape[0], highest - lowest + 2), outside, dtype=dtype)
+
+    def columns(self, y: int) -> tuple[int, int]:
+        """Returns the columns of row y that are in the band.
+
+        Args:
+            y (int): the row.
+
+        Returns:
+            tuple[int, int]: the (first, stop) columns, stop excluded.
+        """
+        return max(0, y + self.lowest), min(self.shape[1], y + self.highest + 1)
+
+    def __getitem__(self, cell: tuple[int, int]) -> int:
+        y, x = cell
+        if not (0 <= y < self.shape[0] and 0 <= x < self.shape[1] and self.lowest <= x - y <= self.highest):
+            return self.outside
+        return self.data[y, x - y - self.lowest]
+
+    def __array__(self, dtype: np.dtype | None = None, copy: bool | None = None) -> np.ndarray:
+        """Builds the whole matrix, with the cells outside the band equal to outside."""
+        dense = np.full(self.shape, self.outside, dtype=dtype or self.data.dtype)
+        for y in range(self.shape[0]):
+            first, stop = self.columns(y)
+            dense[y, first:stop] = self.data[y, first - y - self.lowest : stop - y - self.lowest]
+        return dense
+
+    def masked(self) -> np.ma.MaskedArray:
+        """Returns the whole matrix with the cells outside the band masked, only meant for display."""
+        mask = np.ones(self.shape, dtype=bool)
+        for y in range(self.shape[0]):
+            first, stop = self.columns(y)
+            mask[y, first:stop] = False
+        return np.ma.masked_array(np.asarray(self), mask = mask)
+
+    def __repr__(self) -> str:
+        return f"BandedMatrix(shape={self.shape}, lowest={self.lowest}, highest={self.highest})"
+
+
+DEFAULT_BAND_WIDTH = 16 # first half-width tried by alignBanded when none is given
+
+BANDED_OUTSIDE = np.iinfo(np.int64).min // 4 # score of the cells outside the band, low enough to never be chosen
+
+def fillBandedRow(y: int, args: Params, codes1: np.ndarray, codes2: np.ndarray, scoreMatrix: BandedMatrix, directionMatrix: BandedMatrix) -> None:
+    """Computes, with numpy operations, the scores and directions of the cells of row y in the band.
+
+    Works like fillRowSegment, the cells outside the band score BANDED_OUTSIDE so no direction points to them.
+
+    Args:
+        y (int): the row, greater than 0.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        codes1 (np.ndarray): the codes of the first sequence (see sequenceCodes).
+        codes2 (np.ndarray): the codes of the second sequence.
+        scoreMatrix (BandedMatrix): the banded scoring matrix you want to fill.
+        directionMatrix (BandedMatrix): the banded direction matrix you want to fill.
+    """
+    first, stop = scoreMatrix.columns(y)
+    offset = y + scoreMatrix.lowest # column of data[y, 0]
+    scores, directions, scoresAbove = scoreMatrix.data[y], directionMatrix.data[y], scoreMatrix.data[y - 1]
+
+    if first == 0: # the first column is in the band
+        scores[-offset] = y * args.gapPenalty
+        directions[-offset] = UP_FLAG
+        first = 1
+    if stop <= first:
+        return
+
+    start, end = first - offset, stop - offset # the positions in data of the cells
+    upScore = scoresAbove[start + 1 : end + 1] + args.gapPenalty
+    diagScore = scoresAbove[start:end] + np.where(codes1[first - 1 : stop - 1] == codes2[y - 1], args.match, args.misMatch)
+    bestNotLeft = np.maximum(upScore, diagScore)
+
+    rowScore = cumulativeRowScores(scores[start - 1] if start > 0 else BANDED_OUTSIDE, bestNotLeft, args.gapPenalty)
+
+    bestScore = rowScore[1:]
+    leftScore = rowScore[:-1] + args.gapPenalty
+    scores[start:end] = bestScore
+
+    directions[start:end] = (diagScore == bestScore) * DIAG_FLAG | (upScore == bestScore) * UP_FLAG | (leftScore == bestScore) * LEFT_FLAG
+
+
+def fillMatrixBanded(args: Params, bandWidth: int) -> tuple[BandedMatrix, BandedMatrix]:
+    """Fills the score and direction matrices only in a band around the diagonals joining the corners.
+
+    The band goes from bandWidth diagonals below the lower of the main diagonal and the diagonal of the last cell
+    to bandWidth diagonals above the higher one, so it holds O((n + m) * bandWidth) cells.
+
+    Args:
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        bandWidth (int): the half-width k of the band.
+
+    Returns:
+        tuple[BandedMatrix, BandedMatrix]: the filled banded score matrix (int64) and direction matrix.
+    """
+    rows, columns = args.shape
+    lengthDifference = (columns - 1) - (rows - 1)
+    lowest = max(-(rows - 1), min(0, lengthDifference) - bandWidth)
+    highest = min(columns - 1, max(0, lengthDifference) + bandWidth)
+
+    scoreMatrix = BandedMatrix(args.shape, lowest, highest, np.int64, BANDED_OUTSIDE)
+    directionMatrix = BandedMatrix(args.shape, lowest, highest, np.uint8, 0)
+
+    # first row, the stored part starts at column 0 because lowest <= 0
+    firstStop = highest + 1
+    scoreMatrix.data[0, -lowest : firstStop - lowest] = np.arange(firstStop, dtype=np.int64) * args.gapPenalty
+    directionMatrix.data[0, 1 - lowest : firstStop - lowest] = LEFT_FLAG
+
+    codes1, codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+    for y in range(1, rows):
+        fillBandedRow(y, args, codes1, codes2, scoreMatrix, directionMatrix)
+    runStats.count("cellsFilled", scoreMatrix.data.size)
+
+    return scoreMatrix, directionMatrix
+
+
+def outsideBandBound(args: Params, lowest: int, highest: int) -> int | None:
+    """Returns twice an upper bound of the score of any alignment whose path leaves the band [lowest, highest].
+
+    A path goes from the diagonal 0 to the diagonal m - n, so to reach the diagonal highest + 1 it needs at least
+    2 * (highest + 1) - (m - n) gaps, and to reach lowest - 1 at least (m - n) - 2 * (lowest - 1). With G gaps
+    the other (n + m - G) / 2 columns of the alignment score at most max(match, misMatch) each.
+
+    Args:
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        lowest (int): the lowest diagonal of the band.
+        highest (int): the highest diagonal of the band.
+
+    Returns:
+        int | None: twice the bound (so that it stays an integer), or None if no path can leave the band.
+    """
+    rows, columns = args.shape
+    length = (rows - 1) + (columns - 1)
+    lengthDifference = (columns - 1) - (rows - 1)
+    best = max(args.match, args.misMatch)
+
+    minimumGaps = []
+    if highest < columns - 1:
+        minimumGaps.append(2 * (highest + 1) - lengthDifference)
+    if lowest > -(rows - 1):
+        minimumGaps.append(lengthDifference - 2 * (lowest - 1))
+    if not minimumGaps:
+        return None
+
+    # the bound is linear in the number of gaps, so its maximum is at one of the ends
+    return max(best * (length - gaps) + 2 * args.gapPenalty * gaps for gaps in (min(minimumGaps), length))
+
+
+def alignBanded(args: Params, bandWidth: int | None = None) -> tuple[int, BandedMatrix, BandedMatrix, int]:
+    """Fills the matrices in a band, widening it until the score is proven optimal.
+
+    The score of the band is the optimal one when it beats every alignment that leaves the band
+    (see outsideBandBound), otherwise the half-width is doubled and the band filled again. The comparison
+    is strict, so no optimal alignment is outside the band and traceback finds all of them.
+
+    Args:
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        bandWidth (int | None): the first half-width tried, defaults to DEFAULT_BAND_WIDTH.
+
+    Returns:
+        tuple[int, BandedMatrix, BandedMatrix, int]: the score, the banded score and direction matrices, and the half-width used.
+
+    Raises:
+        ValueError: if bandWidth is negative.
+    """
+    bandWidth = DEFAULT_BAND_WIDTH if bandWidth is None else bandWidth
+    if bandWidth < 0:
+        raise ValueError(f"The band half-width can't be negative, got {bandWidth}")
+
+    while True:
+        scoreMatrix, directionMatrix = fillMatrixBanded(args, bandWidth)
+        score = int(getScore(args, scoreMatrix))
+
+        bound = outsideBandBound(args, scoreMatrix.lowest, scoreMatrix.highest)
+        if bound is None or 2 * score > bound:
+            return score, scoreMatrix, directionMatrix, bandWidth
+
+        bandWidth = max(1, 2 * bandWidth)
+
+
+
+def isUnitCost(args: Params) -> bool:
+    """Tells if the scoring is equivalent to the edit distance (unit-cost mismatches and gaps).
+
+    An alignment of n + m nucleotides with X mismatches and G gaps scores
+    match * (n + m) / 2 - (match - misMatch) * X + (2 * gapPenalty - match) / 2 * G,
+    so when 2 * misMatch == 2 * gapPenalty + match its score only depends on X + G, the edit distance of the path
+    (e.g. -m 0 -mm -1 -gp -1, or -m 2 -mm -1 -gp -2).
+
+    Args:
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        bool: True if the optimal alignments are the ones with the smallest edit distance.
+    """
+    return 2 * args.misMatch == 2 * args.gapPenalty + args.match and args.match > args.misMatch
+
+
+def distanceToScore(distance: int | np.ndarray, length: int | np.ndarray, args: Params) -> int | np.ndarray:
+    """Converts edit distances into alignment scores, when isUnitCost(args) is True.
+
+    Args:
+        distance (int | np.ndarray): the edit distances.
+        length (int | np.ndarray): the number of nucleotides of the aligned prefixes (x + y for the cell (y, x)).
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        int | np.ndarray: the scores, match is even in unit-cost scorings so they are integers.
+    """
+    return args.match // 2 * length - (args.match - args.misMatch) * distance
+
+
+def bitParallelMasks(codes: np.ndarray) -> dict[int, int]:
+    """Returns the positions of each nucleotide in a sequence, as bit vectors (the match masks of bitParallelColumns).
+
+    Args:
+        codes (np.ndarray): the codes of the sequence along the rows.
+
+    Returns:
+        dict[int, int]: for each code in the sequence, the integer whose bit y is set when codes[y] is that code.
+    """
+    return {int(code): int.from_bytes(np.packbits(codes == code, bitorder="little").tobytes(), "little") for code in np.unique(codes)}
+
+
+def bitParallelColumns(codes1: np.ndarray, codes2: np.ndarray, matches: dict[int, int] | None = None) -> Iterator[tuple[int, int]]:
+    """Computes the columns of the edit distance matrix with Myers' bit-vector algorithm (in Hyyrö's global form).
+
+    A column is described by two bit vectors of len(codes2) bits: bit y - 1 of the first one is set when
+    D[y, x] - D[y - 1, x] is +1, bit y - 1 of the second one when it's -1. The vectors are Python integers,
+    so every operation processes a whole column, machine word after machine word, in C.
+
+    Args:
+        codes1 (np.ndarray): the codes of the sequence along the columns.
+        codes2 (np.ndarray): the codes of the sequence along the rows.
+        matches (dict[int, int] | None): bitParallelMasks(codes2), if it was already computed.
+
+    Yields:
+        tuple[int, int]: the (positive, negative) vertical delta vectors of each column, starting from column 0.
+    """
+    mask = (1 << len(codes2)) - 1
+    if matches is None:
+        matches = bitParallelMasks(codes2)
+
+    positive, negative = mask, 0 # the first column is 0, 1, 2, ...
+    yield positive, negative
+
+    for code in codes1.tolist():
+        equal = matches.get(code, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontalPositive = negative | (~(horizontal | positive) & mask)
+        horizontalNegative = positive & horizontal
+
+        horizontalPositive = (horizontalPositive << 1 | 1) & mask # the first row is 0, 1, 2, ... so it always grows by 1
+        horizontalNegative = (horizontalNegative << 1) & mask
+        positive = horizontalNegative | (~(vertical | horizontalPositive) & mask)
+        negative = horizontalPositive & vertical
+        yield positive, negative
+
+
+def bitParallelScoreRow(codes1: np.ndarray, codes2: np.ndarray, args: Params) -> np.ndarray:
+    """Computes the last row of the score matrix with bitParallelColumns, when isUnitCost(args) is True.
+
+    Args:
+        codes1 (np.ndarray): the codes of the sequence along the columns.
+        codes2 (np.ndarray): the codes of the sequence along the rows.
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        np.ndarray: the int64 scores of the last row (len(codes1) + 1 values), like lastScoreRow.
+    """
+    distances = np.fromiter((x + positive.bit_count() - negative.bit_count()
+                             for x, (positive, negative) in enumerate(bitParallelColumns(codes1, codes2))), dtype=np.int64, count=len(codes1) + 1)
+    return distanceToScore(distances, np.arange(len(codes1) + 1, dtype=np.int64) + len(codes2), args)
+
+
+BIT_PARALLEL_BOUND_COLUMNS = 64 # columns computed by bitParallelColumnsAbove between two bounds of the score
+
+def bitParallelColumnsAbove(codes1: np.ndarray, codes2: np.ndarray, args: Params, minScore: int) -> list[tuple[int, int]] | None:
+    """Computes the columns of bitParallelColumns, but stops as soon as the alignment score can't reach minScore.
+
+    Every path crosses each column, so every BIT_PARALLEL_BOUND_COLUMNS columns the final score is at most the best,
+    over the rows y, of the score of (y, x) plus the bound of the rest of the alignment (see remainingScoreBound),
+    as in fillMatrixRowsAbove. The scores of the column are prefix sums of its delta vectors.
+
+    Args:
+        codes1 (np.ndarray): the codes of the sequence along the columns.
+        codes2 (np.ndarray): the codes of the sequence along the rows.
+        args (Params): an object containing the alignment parameters, with isUnitCost(args) True.
+        minScore (int): the lowest accepted alignment score.
+
+    Returns:
+        list[tuple[int, int]] | None: the columns, or None if the score can't reach minScore.
+    """
+    rows = np.arange(len(codes2) + 1, dtype=np.int64)
+    remaining2 = rows[::-1] # nucleotides of seq2 after each row
+    byteLength = -(-len(codes2) // 8)
+    def bits(vector: int) -> np.ndarray:
+        return np.unpackbits(np.frombuffer(vector.to_bytes(byteLength, "little"), dtype=np.uint8), count=len(codes2), bitorder="little").astype(np.int64)
+
+    columns = []
+    for x, (positive, negative) in enumerate(bitParallelColumns(codes1, codes2)):
+        columns.append((positive, negative))
+        if x % BIT_PARALLEL_BOUND_COLUMNS == 0:
+            distances = x + np.concatenate(([0], np.cumsum(bits(positive) - bits(negative))))
+            bounds = distanceToScore(distances, rows + x, args) + remainingScoreBound(remaining2, len(codes1) - x, args)
+            if np.max(bounds) < minScore:
+                return None
+
+    return columns
+
+
+class BitParallelDirections:
+    """A direction matrix computed on demand from the columns of bitParallelColumns.
+
+    Only the two bit vectors of each column are stored, two bits per cell, and the direction flags of a cell
+    are rebuilt from the edit distances of it and its neighbours, which are prefix popcounts of the vectors.
+    The flags are the same as the ones of the score matrix, since in unit-cost scorings (see isUnitCost)
+    the score of a path only depends on its edit distance. It can be given to traceback and iterateAlignments.
+    """
+    def __init__(self, args: Params, columns: list[tuple[int, int]] | None = None):
+        """Computes the columns of the edit distance matrix of args.seq1 and args.seq2.
+
+        Args:
+            args (Params): an object containing matrix dimensions and alignment parameters.
+            columns (list[tuple[int, int]] | None): the columns, if they were already computed (see bitParallelColumnsAbove).
+        """
+        self.shape = args.shape
+        self.codes1, self.codes2 = sequenceCodes(args.seq1), sequenceCodes(args.seq2)
+        self.columns = list(bitParallelColumns(self.codes1, self.codes2)) if columns is None else columns
+
+    def distance(self, y: int, x: int) -> int:
+        """Returns the edit distance D[y, x].
+
+        Args:
+            y (int): the row.
+            x (int): the column.
+
+        Returns:
+            int: the edit distance between the first x nucleotides of seq1 and the first y of seq2.
+        """
+        positive, negative = self.columns[x]
+        rows = (1 << y) - 1
+        return x + (positive & rows).bit_count() - (negative & rows).bit_count()
+
+    def score(self, args: Params) -> int:
+        """Returns the alignment score, the one of the last cell."""
+        y, x = self.shape[0] - 1, self.shape[1] - 1
+        return int(distanceToScore(self.distance(y, x), x + y, args))
+
+    def __getitem__(self, cell: tuple[int, int]) -> int:
+        y, x = cell
+        if y == 0 or x == 0:
+            return LEFT_FLAG * (y == 0 and x > 0) | UP_FLAG * (x == 0 and y > 0)
+
+        distance = self.distance(y, x)
+        misMatch = self.codes1[x - 1] != self.codes2[y - 1]
+        return (DIAG_FLAG * (self.distance(y - 1, x - 1) + misMatch == distance)
+                | UP_FLAG * (self.distance(y - 1, x) + 1 == distance)
+                | LEFT_FLAG * (self.distance(y, x - 1) + 1 == distance))
+
+    def __repr__(self) -> str:
+        return f"BitParallelDirections(shape={self.shape})"
+
+
+
+def traceback(directionMatrix: np.ndarray, args: Params, maxAlignments: int | None = None) -> list[tuple[str, str]]:
+    """Reconstructs all optimal alignments by following the traceback paths.
+
+    Starting from the bottom-right cell of the direction matrix, this function explores
+    all possible paths back to the top-left, building aligned sequences along the way.
+    It returns all optimal alignments according to the directions encoded in the matrix.
+
+    Args:
+        directionMatrix (np.ndarray): the direction matrix
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        maxAlignments (int | None): if set, only the first maxAlignments alignments are returned.
+
+    Returns:
+        list: a list of tuples, each containing a pair of aligned sequences.
+    """
+    return list(iterateAlignments(directionMatrix, args, maxAlignments))
+
+
+def iterateAlignments(directionMatrix: np.ndarray, args: Params, maxAlignments: int | None = None) -> Iterator[tuple[str, str]]:
+    """Yields the optimal alignments one at a time, in the same order as traceback.
+
+    The paths are explored depth first, so only the current branch points are kept in memory
+    and the alignments can be printed while the others are still being found.
+
+    Args:
+        directionMatrix (np.ndarray): the direction matrix
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        maxAlignments (int | None): if set, the generator stops after yielding maxAlignments alignments.
+
+    Yields:
+        tuple[str, str]: a pair of aligned sequences.
+
+    Raises:
+        ValueError: if maxAlignments is not positive.
+    """
+    if maxAlignments is not None and maxAlignments < 1:
+        raise ValueError(f"The maximum number of alignments must be positive, got {maxAlignments}")
+
+    x = args.shape[1] - 1
+    y = args.shape[0] - 1
+
+    # a path is a linked list of moves sharing its tail with the other branches: (flag, y, x, rest of the path),
+    # where (x, y) is the cell the move starts from and the first move is the one closest to the top-left corner
+    stack = [(y, x, None)] # starting from the last cell 
+    alignmentsAmount = 0
+    explored = 0 # entries taken from the stack, the moves followed by the search (see RunStats)
+
+    try:
+        while stack: # until the stack is not empty (until we have paths)
+            y, x, path = stack.pop() # removes the last element
+            explored += 1
+
+            if y == 0 or x == 0: # when you touch one of the two edges (top or left) you add all the remaining sequence (last thing you do, only if the path does not end in 0,0)
+                yield pathToAlignment(y, x, path, args) # the strings are only built here
+
+                alignmentsAmount += 1
+                if alignmentsAmount == maxAlignments:
+                    return
+                continue
+
+            directions = directionMatrix[y, x]
+
+            if directions & DIAG_FLAG:
+                stack.append((y - 1, x - 1, (DIAG_FLAG, y, x, path))) # diagonal move
+
+            if directions & LEFT_FLAG:
+                stack.append((y, x - 1, (LEFT_FLAG, y, x, path))) # same row, different column
+
+            if directions & UP_FLAG:
+                stack.append((y - 1, x, (UP_FLAG, y, x, path))) # same column, different row
+    finally:
+        runStats.count("tracebackBranches", explored)
+        runStats.count("alignmentsEmitted", alignmentsAmount)
+
+
+def pathToAlignment(y: int, x: int, path: tuple | None, args: Params) -> tuple[str, str]:
+    """Builds the aligned sequences of a traceback path that reached the first row or column.
+
+    Args:
+        y (int): the row where the path stopped.
+        x (int): the column where the path stopped.
+        path (tuple | None): the moves of the path, as built by iterateAlignments.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+
+    Returns:
+        tuple[str, str]: the aligned sequences.
+    """
+    seq1, seq2 = sequenceText(args.seq1), sequenceText(args.seq2)
+
+    # the remaining part of the sequences goes in front, aligned with gaps
+    aligned1 = ['-' * y, seq1[:x]]
+    aligned2 = ['-' * x, seq2[:y]]
+
+    while path is not None:
+        flag, fromY, fromX, path = path
+        # you add the nucleotide on the sequence that moves, in the other you have a gap
+        aligned1.append('-' if flag == UP_FLAG else seq1[fromX - 1])
+        aligned2.append('-' if flag == LEFT_FLAG else seq2[fromY - 1])
+
+    return "".join(aligned1), "".join(aligned2)
+
+
+def countDiagonal(directions: np.ndarray, diagCounts: np.ndarray, upCounts: np.ndarray, leftCounts: np.ndarray) -> np.ndarray:
+    """Counts the traceback paths of the cells of a diagonal from the counts of their neighbours.
+
+    Args:
+        directions (np.ndarray): the direction flags of the cells.
+        diagCounts (np.ndarray): the counts of the cells above-left of them.
+        upCounts (np.ndarray): the counts of the cells above them.
+        leftCounts (np.ndarray): the counts of the cells on their left.
+
+    Returns:
+        np.ndarray: the counts of the cells, as Python integers (object dtype) so they never overflow.
+    """
+    return np.where(directions & DIAG_FLAG, diagCounts, 0) + np.where(directions & UP_FLAG, upCounts, 0) + np.where(directions & LEFT_FLAG, leftCounts, 0)
+
+
+def countAlignments(directionMatrix: np.ndarray) -> int:
+    """Counts the optimal alignments (the paths traceback would follow) without enumerating them.
+
+    The number of paths from a cell is the sum of the numbers of paths of the cells its directions point to,
+    and it's 1 on the first row and column, where traceback stops. The cells are swept by anti-diagonals,
+    keeping only the counts of the two previous ones.
+
+    Args:
+        directionMatrix (np.ndarray): the filled direction matrix.
+
+    Returns:
+        int: the number of optimal alignments.
+    """
+    rows, columns = directionMatrix.shape
+    # counts of the last two anti-diagonals, indexed by column
+    twoBefore = np.ones(columns, dtype=object)
+    oneBefore = np.ones(columns, dtype=object)
+
+    for diagonal in range(2, rows + columns - 1):
+        current = np.ones(columns, dtype=object) # the cells on the first row or column have one path
+        start, stop = interiorBounds(directionMatrix.shape, diagonal)
+        if stop > start:
+            directions = diagonalView(directionMatrix, diagonal - (stop - 1), stop - 1, stop - start)[::-1] # by increasing column
+            current[start:stop] = countDiagonal(directions, twoBefore[start - 1 : stop - 1], oneBefore[start:stop], oneBefore[start - 1 : stop - 1])
+        twoBefore, oneBefore = oneBefore, current
+
+    return int(oneBefore[columns - 1])
+
+
+def countMatrix(directionMatrix: np.ndarray) -> np.ndarray:
+    """Counts the traceback paths starting from every cell of the direction matrix.
+
+    Args:
+        directionMatrix (np.ndarray): the filled direction matrix.
+
+    Returns:
+        np.ndarray: a matrix of Python integers (object dtype), the count of the last cell is the number of optimal alignments.
+    """
+    counts = np.ones(directionMatrix.shape, dtype=object)
+
+    for diagonal in range(2, sum(directionMatrix.shape) - 1):
+        start, stop = interiorBounds(directionMatrix.shape, diagonal)
+        if stop > start:
+            y, x, length = diagonal - (stop - 1), stop - 1, stop - start
+            diagonalView(counts, y, x, length)[:] = countDiagonal(diagonalView(directionMatrix, y, x, length), diagonalView(counts, y - 1, x - 1, length),
+                                                                  diagonalView(counts, y - 1, x, length), diagonalView(counts, y, x - 1, length))
+
+    return counts
+
+
+def sampleAlignment(directionMatrix: np.ndarray, args: Params, generator: random.Random | None = None, counts: np.ndarray | None = None) -> tuple[str, str]:
+    """Picks one of the optimal alignments uniformly at random.
+
+    From each cell the next move is chosen with a probability proportional to the number of paths
+    it leads to, so every complete path has the same probability.
+
+    Args:
+        directionMatrix (np.ndarray): the filled direction matrix.
+        args (Params): an object containing matrix dimensions and alignment parameters.
+        generator (random.Random | None): the random generator to use (a new unseeded one if None).
+        counts (np.ndarray | None): the result of countMatrix, computed here if None (pass it to draw several samples).
+
+    Returns:
+        tuple[str, str]: the aligned sequences.
+    """
+    generator = generator or random.Random()
+    counts = countMatrix(directionMatrix) if counts is None else counts
+
+    y, x = args.shape[0] - 1, args.shape[1] - 1
+    path = None # see iterateAlignments
+    while y > 0 and x > 0:
+        directions = directionMatrix[y, x]
+        moves = [(flag, position) for flag, position in ((DIAG_FLAG, (y - 1, x - 1)), (UP_FLAG, (y - 1, x)), (LEFT_FLAG, (y, x - 1))) if directions & flag]
+
+        draw = generator.randrange(sum(counts[position] for _, position in moves))
+        for flag, position in moves:
+            draw -= counts[position]
+            if draw < 0:
+                break
+
+        path = (flag, y, x, path)
+        y, x = position
+
+    runStats.count("alignmentsEmitted")
+    return pathToAlignment(y, x, path, args)
+
+
+def alignmentScore(alignment: tuple[str, str], args: Params) -> int:
+    """Computes the score of an alignment with the scoring of args.
+
+    Args:
+        alignment (tuple[str, str]): two equal-length strings, with '-' characters representing gaps.
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        int: the score of the alignment.
+    """
+    score = 0
+    for nuc1, nuc2 in zip(*alignment):
+        if nuc1 == '-' or nuc2 == '-':
+            score += args.gapPenalty
+        else:
+            score += args.match if nuc1 == nuc2 else args.misMatch
+
+    return score
+
+
+def alignSmall(seq1: str, seq2: str, args: Params) -> tuple[str, str]:
+    """Finds one optimal alignment of two sequences with the full matrices, used for the leaves of hirschberg.
+
+    Args:
+        seq1 (str): the first sequence (along the columns).
+        seq2 (str): the second sequence (along the rows).
+        args (Params): an object containing the alignment parameters.
+
+    Returns:
+        tuple[str, str]: the aligned sequences.
+    """
+    subArgs = argparse.Namespace(seq1=seq1, seq2=seq2, shape=(len(seq2) + 1, len(seq1) + 1), match=args.match, misMatch=args.misMatch, gapPenalty=args.gapPenalty)
+    _, directionMatrix = fillMatrixVectorized(None, subArgs, createMatrix(subArgs, isDirectionMatrix=False), createMatrix(subArgs, isDirectionMatrix=True))
+
+    return next(iterateAlignments(directionMatrix, subArgs, maxAlignments=1))
+
+
+HIRSCHBERG_BASE_CELLS = 1 << 16 # sub-problems up to this size are solved with the full matrices
+
+# state of a hirschberg worker process, set once by initHirschbergWorker
+hirschbergWorkerState = {}
+
+def initHirschbergWorker(args: Params) -> None:
+    """Stores the sequences in a worker of hirschberg, so the tasks only carry sequence positions.
+
+    Args:
+        args (Params): an object containing the sequences and the alignment parameters.
+    """
+    hirschbergWorkerState.update(args=args, codes1=sequenceCodes(args.seq1), codes2=sequenceCodes(args.seq2))
+
+
+def hirschbergTask(task: tuple[str, int, int, int, int]) -> np.ndarray | tuple[str, str]:
+    """Runs one step of hirschberg on a sub-problem, called in a worker set up by initHirschbergWorker.
+
+    Args:
+        task (tuple[str, int, int, int, int]): the kind of step followed by the (start1, stop1, start2, stop2)
+                    positions of the sub-problem in the sequences. The kind is "forward" or "reverse"
+                    (the last score row of the upper half, or of the lower half read backwards) or "solve"
+                    (a sub-problem small enough for alignSmall).
+
+    Returns:
+        np.ndarray | tuple[str, str]: the score row for "forward" and "reverse", the alignment for "solve".
+    """
+    kind, start1, stop1, start2, stop2 = task
+    state = hirschbergWorkerState
+    args = state["args"]
+    middle = (start2 + stop2) // 2
+
+    if kind == "solve":
+        return alignSmall(args.seq1[start1:stop1], args.seq2[start2:stop2], args)
+    if kind == "forward":
+        codes1, codes2 = state["codes1"][start1:stop1], state["codes2"][start2:middle]
+    else:
+        codes1, codes2 = state["codes1"][start1:stop1][::-1], state["codes2"][middle:stop2][::-1]
+
+    if isUnitCost(args):
+        return bitParallelScoreRow(codes1, codes2, args)
+    return lastScoreRow(codes1, codes2, args)[0]
+
+
+def isBaseProblem(problem: tuple[int, int, int, int], baseCells: int) -> bool:
+    """Tells if a sub-problem of hirschberg is small enough to be solved with the full matrices.
+
+    Args:
+        problem (tuple[int, int, int, int]): the (start1, stop1, start2, stop2) positions of the sub-problem.
+        baseCells (int): the largest number of cells solved with the full matrices.
+
+    Returns:
+        bool: True if the sub-problem has a single row or at most baseCells cells.
+    """
+    start1, stop1, start2, stop2 = problem
+    return stop2 - start2 <= 1 or (stop1 - start1) * (stop2 - start2) <= baseCells
+
+
+def hirschberg(args: Params, baseCells: int = HIRSCHBERG_BASE_CELLS) -> tuple[str, str]:
+    """Finds one optimal global alignment in linear memory with Hirschberg's divide and conquer.
+
+    Each sub-problem is split at the middle row of the second sequence: a forward score-only pass
+    on the upper half and a reverse one on the lower half give, for every column, the best score of a path
+    crossing the middle row there, and the best column splits the sub-problem in two.
+    The sub-problems of each recursion level (and the forward and reverse passes) are independent,
+    so a whole level is computed at once on a process pool.
+
+    Args:
+        args (Params): an object containing the sequences and the alignment parameters.
+        baseCells (int): sub-problems with at most this many cells (or a single row) are solved with the full matrices.
+
+    Returns:
+        tuple[str, str]: the aligned sequences.
+    """
+    workersAmount = countWorkers(args)
+    pool = Pool(workersAmount, initializer=initHirschbergWorker, initargs=(args,)) if workersAmount > 1 else None
+    if pool is None:
+        initHirschbergWorker(args)
+    else:
+        runStats.count("processesStarted", workersAmount)
+
+    # the alignment is a list of pieces, in order: a piece is either a sub-problem (start1, stop1, start2, stop2) or an aligned pair of strings
+    pieces = [(0, len(args.seq1), 0, len(args.seq2))]
+    try:
+        while any(isinstance(piece[0], int) for piece in pieces): # sub-problems start with a position, alignments with a string
+            tasks = []
+            for piece in pieces:
+                if not isinstance(piece[0], int):
+                    continue
+                if isBaseProblem(piece, baseCells):
+                    tasks.append(("solve", *piece))
+                else:
+                    tasks += [("forward", *piece), ("reverse", *piece)]
+                runStats.count("cellsFilled", (piece[1] - piece[0] + 1) * (piece[3] - piece[2] + 1)) # the two passes split the sub-problem
+
+            results = iter(pool.map(hirschbergTask, tasks, chunksize=1) if pool else map(hirschbergTask, tasks))
+            if pool:
+                runStats.count("tasksDispatched", len(tasks))
+
+            nextPieces = []
+            for piece in pieces:
+                if not isinstance(piece[0], int):
+                    nextPieces.append(piece)
+                    continue
+                if isBaseProblem(piece, baseCells):
+                    nextPieces.append(next(results))
+                    continue
+
+                start1, stop1, start2, stop2 = piece
+                forwardRow, reverseRow = next(results), next(results)
+                split = start1 + int(np.argmax(forwardRow + reverseRow[::-1])) # the column where the optimal path crosses the middle row
+                middle = (start2 + stop2) // 2
+                nextPieces += [(start1, split, start2, middle), (split, stop1, middle, stop2)]
+
+            pieces = nextPieces
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    runStats.count("alignmentsEmitted")
+    return "".join(piece[0] for piece in pieces), "".join(piece[1] for piece in pieces)
+
+
+def alignSequences(seq1: str, seq2: str, args: Params) -> tuple[int | None, list[tuple[str, str]]]:
+    """Aligns two already checked sequences in the current process, the entry point used for each pair of a batch.
+
+    Unit-cost scorings (see isUnitCost) are computed with the bit-parallel engine (see BitParallelDirections).
+    With args.minScore set, the fill stops as soon as the score can't reach it (see fillMatrixRowsAbove
+    and bitParallelColumnsAbove) and the traceback is skipped.
+
+    Args:
+        seq1 (str): the first sequence.
+        seq2 (str): the second sequence.
+        args (Params): an object containing the alignment parameters, args.maxAlignments (optional)
+                        limits the number of alignments returned, args.minScore (optional) is the lowest accepted score.
+
+    Returns:
+        tuple[int | None, list[tuple[str, str]]]: the alignment score and the optimal alignments,
+                                                    or None and no alignments if the score is below args.minScore.
+    """
+    pairArgs = argparse.Namespace(seq1=seq1, seq2=seq2, shape=(len(seq2) + 1, len(seq1) + 1), match=args.match, misMatch=args.misMatch, gapPenalty=args.gapPenalty)
+    minScore = getattr(args, "minScore", None)
+
+    if isUnitCost(pairArgs):
+        columns = None if minScore is None else bitParallelColumnsAbove(sequenceCodes(seq1), sequenceCodes(seq2), pairArgs, minScore)
+        if minScore is not None and columns is None:
+            return None, []
+        directionMatrix = BitParallelDirections(pairArgs, columns)
+        score = directionMatrix.score(pairArgs)
+        if minScore is not None and score < minScore:
+            return None, []
+        return score, traceback(directionMatrix, pairArgs, getattr(args, "maxAlignments", None))
+
+    scoreMatrix, directionMatrix = createMatrix(pairArgs, isDirectionMatrix=False), createMatrix(pairArgs, isDirectionMatrix=True)
+    if minScore is None:
+        fillMatrixRows(None, pairArgs, scoreMatrix, directionMatrix)
+    elif not fillMatrixRowsAbove(pairArgs, minScore, scoreMatrix, directionMatrix):
+        return None, []
+
+    return int(getScore(pairArgs, scoreMatrix)), traceback(directionMatrix, pairArgs, getattr(args, "maxAlignments", None))
+
+
+INCREMENTAL_MAX_CELLS = 1 << 28 # default bound of the directions kept by an IncrementalAligner (one byte per cell)
+
+# direction flags of a transposed matrix, where the up and left moves are exchanged
+TRANSPOSED_FLAGS = np.array([flags & DIAG_FLAG | bool(flags & UP_FLAG) * LEFT_FLAG | bool(flags & LEFT_FLAG) * UP_FLAG for flags in range(8)], dtype=np.uint8)
+
+def fillBorderBlock(codes1: np.ndarray, codes2: np.ndarray, args: Params, topRow: np.ndarray, leftColumn: np.ndarray, directions: bool = True) -> tuple[np.ndarray | None, np.ndarray, np.ndarray]:
+    """Computes a block of the matrices from the scores on its borders.
+
+    The rows are filled along the longer side of the block (transposing it if needed),
+    so a block of a few rows or a few columns takes a few numpy calls either way.
+
+    Args:
+        codes1 (np.ndarray): the codes of the sequence along the columns of the block.
+        codes2 (np.ndarray): the codes of the sequence along the rows of the block.
+        args (Params): an object containing the alignment parameters.
+        topRow (np.ndarray): the scores of the row above the block, including the corner (len(codes1) + 1 values).
+        leftColumn (np.ndarray): the scores of the column on the left of the block, without the corner (len(codes2) values).
+        directions (bool): if False only the scores are computed, keeping one row in memory (see lastScoreRow).
+
+    Returns:
+        tuple[np.ndarray | None, np.ndarray, np.ndarray]: the directions of the block (None without directions),
+                                                            its last row and its last column (as in lastScoreRow).
+    """
+    if len(codes2) > len(codes1):
+        transposed, lastColumn, lastRow = fillBorderBlock(codes2, codes1, args, np.concatenate((topRow[:1], leftColumn)), topRow[1:], directions)
+        lastRow = np.concatenate((leftColumn[-1:], lastRow))
+        return None if transposed is None else TRANSPOSED_FLAGS[transposed.T], lastRow, lastColumn[1:]
+
+    if not directions:
+        return None, *lastScoreRow(codes1, codes2, args, topRow, leftColumn)
+
+    scoreMatrix = np.empty((len(codes2) + 1, len(codes1) + 1), dtype=np.int64)
+    directionMatrix = np.zeros(scoreMatrix.shape, dtype=np.uint8)
+    scoreMatrix[0], scoreMatrix[1:, 0] = topRow, leftColumn
+    for y in range(1, scoreMatrix.shape[0]):
+        fillRowSegment(y, 1, scoreMatrix.shape[1], args, codes1, codes2, scoreMatrix, directionMatrix)
+
+    return directionMatrix[1:, 1:], scoreMatrix[-1], scoreMatrix[1:, -1]
+
+
+class IncrementalAligner:
+    """Keeps the alignment of two sequences up to date while bases are appended to either of them.
+
+    Only the last row and the last column of the score matrix are kept: they are the borders the new rows
+    (bases appended to the second sequence) and the new columns (bases appended to the first one) start from,
+    so each extension computes only the new cells and the score stays exact.
+    The directions of every cell are kept too, for the traceback, as long as they fit in maxCells bytes:
+    beyond that they are dropped, the scores are still extended in linear memory
+    and alignments returns one optimal alignment computed by hirschberg.
+    """
+    def __init__(self, seq1: Sequence, seq2: Sequence, args: Params, maxCells: int | None = INCREMENTAL_MAX_CELLS):
+        """Aligns the initial sequences.
+
+        Args:
+            seq1 (Sequence): the initial first sequence, possibly empty.
+            seq2 (Sequence): the initial second sequence, possibly empty.
+            args (Params): an object containing the alignment parameters (and optionally workers, used by hirschberg).
+            maxCells (int | None): the largest number of directions kept, None to always keep them.
+        """
+        self.args = argparse.Namespace(seq1="", seq2="", shape=(1, 1), match=args.match, misMatch=args.misMatch,
+                                       gapPenalty=args.gapPenalty, workers=getattr(args, "workers", None))
+        self.maxCells = maxCells
+        self.codes1, self.codes2 = np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.uint8)
+        self.lastRow = np.zeros(1, dtype=np.int64) # scores of the last row, including the first column
+        self.lastColumn = np.zeros(1, dtype=np.int64) # scores of the last column, including the first row
+        self.directions = np.zeros((1, 1), dtype=np.uint8) # grows ahead of the matrix, see reserve
+        self.extend(seq1, seq2)
+
+    @property
+    def score(self) -> int:
+        """The score of the alignment of the current sequences."""
+        return int(self.lastRow[-1])
+
+    @property
+    def directionMatrix(self) -> np.ndarray | None:
+        """The direction matrix of the current sequences, None if it was dropped by the retention policy."""
+        if self.directions is None:
+            return None
+        return self.directions[:self.args.shape[0], :self.args.shape[1]]
+
+    def reserve(self, shape: tuple[int, int]) -> None:
+        """Makes room for the directions of a matrix of the given shape, or drops them if they don't fit in maxCells.
+
+        The room doubles along the side that grows, so extending a base at a time copies each cell a constant number of times.
+
+        Args:
+            shape (tuple[int, int]): the shape of the matrices after the extension.
+        """
+        if self.directions is None or (self.directions.shape[0] >= shape[0] and self.directions.shape[1] >= shape[1]):
+            return
+
+        rows, columns = self.directions.shape
+        rows = rows if rows >= shape[0] else max(shape[0], 2 * rows)
+        columns = columns if columns >= shape[1] else max(shape[1], 2 * columns)
+        if self.maxCells is not None and rows * columns > self.maxCells:
+            rows, columns = max(shape[0], self.directions.shape[0]), max(shape[1], self.directions.shape[1])
+            if shape[0] * shape[1] > self.maxCells:
+                self.directions = None
+                return
+
+        directions = np.zeros((rows, columns), dtype=np.uint8)
+        directions[:self.args.shape[0], :self.args.shape[1]] = self.directionMatrix
+        self.directions = directions
+
+    def extend(self, suffix1: Sequence = "", suffix2: Sequence = "") -> int:
+        """Appends bases to the sequences and computes the new columns and rows of the matrices.
+
+        Args:
+            suffix1 (Sequence): the bases appended to the first sequence.
+            suffix2 (Sequence): the bases appended to the second sequence.
+
+        Returns:
+            int: the score of the alignment of the extended sequences.
+
+        Raises:
+            NucleotideException: if a suffix contains invalid characters.
+        """
+        if len(suffix1):
+            suffix1 = checkSequence(suffix1, label = "bases appended to the first sequence")
+        if len(suffix2):
+            suffix2 = checkSequence(suffix2, label = "bases appended to the second sequence")
+        codes1, codes2 = sequenceCodes(suffix1), sequenceCodes(suffix2)
+        rows, columns = self.args.shape
+        self.reserve((rows + len(codes2), columns + len(codes1)))
+        gapPenalty = self.args.gapPenalty
+
+        if len(codes1): # new columns, starting from the last column and the first row
+            topRow = np.arange(columns - 1, columns + len(codes1), dtype=np.int64) * gapPenalty
+            directions, lastRow, lastColumn = fillBorderBlock(codes1, self.codes2, self.args, topRow, self.lastColumn[1:], self.directions is not None)
+            if directions is not None:
+                self.directions[0, columns : columns + len(codes1)] = LEFT_FLAG
+                self.directions[1:rows, columns : columns + len(codes1)] = directions
+            self.lastRow = np.concatenate((self.lastRow[:-1], lastRow))
+            self.lastColumn = np.concatenate((topRow[-1:], lastColumn))
+            self.codes1 = np.concatenate((self.codes1, codes1))
+            self.args.seq1 += sequenceText(suffix1)
+            columns += len(codes1)
+
+        if len(codes2): # new rows, starting from the last row and the first column
+            leftColumn = np.arange(rows, rows + len(codes2), dtype=np.int64) * gapPenalty
+            directions, lastRow, lastColumn = fillBorderBlock(self.codes1, codes2, self.args, self.lastRow, leftColumn, self.directions is not None)
+            if directions is not None:
+                self.directions[rows : rows + len(codes2), 0] = UP_FLAG
+                self.directions[rows : rows + len(codes2), 1:columns] = directions
+            self.lastRow = lastRow
+            self.lastColumn = np.concatenate((self.lastColumn, lastColumn))
+            self.codes2 = np.concatenate((self.codes2, codes2))
+            self.args.seq2 += sequenceText(suffix2)
+            rows += len(codes2)
+
+        self.args.shape = (rows, columns)
+        return self.score
+
+    def alignments(self, maxAlignments: int | None = None) -> list[tuple[str, str]]:
+        """Returns the optimal alignments of the current sequences.
+
+        Args:
+            maxAlignments (int | None): if set, only the first maxAlignments alignments are returned.
+
+        Returns:
+            list[tuple[str, str]]: the optimal alignments as traceback returns them, or the one found by hirschberg
+                                    if the directions were dropped.
+        """
+        if self.directions is None:
+            return [hirschberg(self.args)]
+        return traceback(self.directionMatrix, self.args, maxAlignments)
+
+
+RESULT_CACHE_BYTES = 64 << 20 # default bound of the in-memory part of an AlignmentCache
+RESULT_ENTRY_BYTES = 128 # approximate memory used by a cache entry besides its alignments
+RESULT_DISK_BYTES = 1 << 30 # default bound of the files in the directory of an AlignmentCache
+
+# moves of a compact alignment, one per column (see AlignmentCache.encode)
+PAIR_MOVE, GAP1_MOVE, GAP2_MOVE = 0, 1, 2
+
+class AlignmentCache:
+    """A memoization layer for alignSequences, keyed on the content of the sequences and the scoring parameters.
+
+    The results are kept in an LRU bounded by their size in bytes and, optionally, in a directory
+    so they survive the process. An alignment is stored as one 2-bit move per column (packed by packSequence),
+    the aligned strings are rebuilt from the sequences of the request.
+    The directory is bounded too: when its files exceed maxDiskBytes, the least recently used ones
+    (by modification time, which a disk hit refreshes) are deleted down to three quarters of the bound,
+    so it isn't scanned again on every put. Its size is counted by this process, files written meanwhile
+    by other processes are only seen at the next eviction.
+    """
+    def __init__(self, maxBytes: int = RESULT_CACHE_BYTES, directory: str | None = None, maxDiskBytes: int = RESULT_DISK_BYTES):
+        """Creates an empty cache.
+
+        Args:
+            maxBytes (int): the largest number of bytes of results kept in memory.
+            directory (str | None): if set, the results are also stored in this directory and read from it
+                                    when they aren't in memory.
+            maxDiskBytes (int): the largest number of bytes of the files in the directory.
+        """
+        self.maxBytes = maxBytes
+        self.directory = directory
+        self.maxDiskBytes = maxDiskBytes
+        self.entries = OrderedDict() # key -> (size, score, moves), from the least to the most recently used
+        self.size = 0
+        self.hits = self.diskHits = self.misses = self.evictions = self.diskEvictions = 0
+        self.diskSize = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.diskSize = sum(entry.stat().st_size for entry in self.diskEntries())
+
+    @staticmethod
+    def key(seq1: Sequence, seq2: Sequence, args: Params) -> str:
+        """Returns the key of an alignment: a hash of the sequences and of every parameter that changes the result.
+
+        Args:
+            seq1 (Sequence): the first sequence.
+            seq2 (Sequence): the second sequence.
+            args (Params): an object containing the alignment parameters, with maxAlignments and minScore (optional).
+
+        Returns:
+            str: the hexadecimal SHA-256 digest.
+        """
+        parameters = (args.match, args.misMatch, args.gapPenalty, getattr(args, "maxAlignments", None), getattr(args, "minScore", None))
+        digest = hashlib.sha256(repr(parameters).encode())
+        for sequence in (seq1, seq2):
+            codes = sequenceCodes(sequence)
+            digest.update(len(codes).to_bytes(8, "little"))
+            digest.update(codes.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def encode(alignment: tuple[str, str]) -> tuple[np.ndarray, int]:
+        """Packs an alignment into its moves, see decode.
+
+        Args:
+            alignment (tuple[str, str]): the aligned sequences.
+
+        Returns:
+            tuple[np.ndarray, int]: the moves packed by packSequence.
+        """
+        gaps1, gaps2 = (np.frombuffer(aligned.encode("ascii"), dtype=np.uint8) == ord('-') for aligned in alignment)
+        return packSequence((gaps1 * GAP1_MOVE + gaps2 * GAP2_MOVE).astype(np.uint8))
+
+    @staticmethod
+    def decode(moves: tuple[np.ndarray, int], seq1: Sequence, seq2: Sequence) -> tuple[str, str]:
+        """Rebuilds an alignment from its moves and the sequences.
+
+        Args:
+            moves (tuple[np.ndarray, int]): the packed moves of the alignment.
+            seq1 (Sequence): the first sequence.
+            seq2 (Sequence): the second sequence.
+
+        Returns:
+            tuple[str, str]: the aligned sequences.
+        """
+        moves = unpackSequence(moves)
+        aligned1, aligned2 = np.full(len(moves), ord('-'), dtype=np.uint8), np.full(len(moves), ord('-'), dtype=np.uint8)
+        aligned1[moves != GAP1_MOVE] = asciiCodes(seq1)
+        aligned2[moves != GAP2_MOVE] = asciiCodes(seq2)
+        return aligned1.tobytes().decode("latin-1"), aligned2.tobytes().decode("latin-1")
+
+    def get(self, key: str, seq1: Sequence, seq2: Sequence) -> tuple[int | None, list[tuple[str, str]]] | None:
+        """Looks up a result, in memory first and then in the directory.
+
+        Args:
+            key (str): the key of the alignment (see key).
+            seq1 (Sequence): the first sequence, used to rebuild the alignments.
+            seq2 (Sequence): the second sequence.
+
+        Returns:
+            tuple[int | None, list[tuple[str, str]]] | None: the result of alignSequences, or None if it isn't cached.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            _, score, moves = self.entries[key]
+        elif (stored := self.load(key)) is not None:
+            score, moves = stored
+            self.diskHits += 1
+            self.store(key, score, moves)
+        else:
+            self.misses += 1
+            return None
+
+        return score, [self.decode(alignmentMoves, seq1, seq2) for alignmentMoves in moves]
+
+    def countRepeated(self) -> None:
+        """Counts as a hit a request whose key is already being computed (a pair repeated in a batch), answered by the first one."""
+        self.hits += 1
+
+    def put(self, key: str, result: tuple[int | None, list[tuple[str, str]]]) -> None:
+        """Stores a result of alignSequences, in memory and in the directory.
+
+        Args:
+            key (str): the key of the alignment (see key).
+            result (tuple[int | None, list[tuple[str, str]]]): the score and the alignments.
+        """
+        score, alignments = result
+        moves = [self.encode(alignment) for alignment in alignments]
+        self.store(key, score, moves)
+
+        if self.directory:
+            path = os.path.join(self.directory, key + ".npz")
+            with open(path + ".tmp", "wb") as file: # written aside and renamed, so readers never see half a file
+                np.savez(file, score=np.array([score or 0]), hasScore=np.array([score is not None]),
+                         moves=np.concatenate([packed for packed, _ in moves] or [np.zeros(0, dtype=np.uint8)]),
+                         packedLengths=np.array([len(packed) for packed, _ in moves], dtype=np.int64),
+                         lengths=np.array([length for _, length in moves], dtype=np.int64))
+                written = file.tell()
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(path + ".tmp", path)
+            self.diskSize += written - replaced
+            if self.diskSize > self.maxDiskBytes:
+                self.evictDisk()
+
+    def load(self, key: str) -> tuple[int | None, list[tuple[np.ndarray, int]]] | None:
+        """Reads a result from the directory, marking it as recently used.
+
+        Args:
+            key (str): the key of the alignment.
+
+        Returns:
+            tuple[int | None, list[tuple[np.ndarray, int]]] | None: the score and the packed moves of the alignments,
+                                                                   or None if there is no directory or no such file.
+        """
+        if not self.directory:
+            return None
+        path = os.path.join(self.directory, key + ".npz")
+        try:
+            with np.load(path) as stored:
+                score = int(stored["score"][0]) if stored["hasScore"][0] else None
+                packed = np.split(stored["moves"], np.cumsum(stored["packedLengths"])[:-1]) if len(stored["lengths"]) else []
+                moves = list(zip(packed, stored["lengths"].tolist()))
+            os.utime(path)
+        except FileNotFoundError: # never stored, or evicted (maybe by another process)
+            return None
+
+        return score, moves
+
+    def diskEntries(self) -> list[os.DirEntry]:
+        """Returns the files of the results in the directory."""
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(".npz") and entry.is_file()]
+
+    def evictDisk(self) -> None:
+        """Deletes the least recently used files of the directory until they take three quarters of maxDiskBytes."""
+        files = []
+        for entry in self.diskEntries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError: # deleted by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        self.diskSize = sum(size for _, size, _ in files)
+        target = self.maxDiskBytes - self.maxDiskBytes // 4
+        for _, size, path in files:
+            if self.diskSize <= target:
+                break
+            try:
+                os.remove(path)
+                self.diskEvictions += 1
+            except FileNotFoundError:
+                pass
+            self.diskSize -= size
+
+    def store(self, key: str, score: int | None, moves: list[tuple[np.ndarray, int]]) -> None:
+        """Puts a result in the in-memory LRU, evicting the least recently used ones beyond maxBytes.
+
+        Args:
+            key (str): the key of the alignment.
+            score (int | None): the score.
+            moves (list[tuple[np.ndarray, int]]): the packed moves of the alignments.
+        """
+        size = RESULT_ENTRY_BYTES + sum(packed.nbytes for packed, _ in moves)
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[0]
+        if size > self.maxBytes: # it would evict everything else
+            return
+
+        self.entries[key] = (size, score, moves)
+        self.size += size
+        while self.size > self.maxBytes:
+            self.size -= self.entries.popitem(last=False)[1][0]
+            self.evictions += 1
+
+    def align(self, seq1: Sequence, seq2: Sequence, args: Params) -> tuple[int | None, list[tuple[str, str]]]:
+        """Returns the result of alignSequences, computing it only if it isn't cached.
+
+        Args:
+            seq1 (Sequence): the first sequence, already checked.
+            seq2 (Sequence): the second sequence, already checked.
+            args (Params): an object containing the alignment parameters.
+
+        Returns:
+            tuple[int | None, list[tuple[str, str]]]: the score and the alignments (see alignSequences).
+        """
+        key = self.key(seq1, seq2, args)
+        result = self.get(key, seq1, seq2)
+        if result is None:
+            result = alignSequences(seq1, seq2, args)
+            self.put(key, result)
+        return result
+
+    def stats(self) -> dict[str, int]:
+        """Returns the hit and miss counters and the memory in use."""
+        return {"hits": self.hits, "diskHits": self.diskHits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "bytes": self.size, "diskEvictions": self.diskEvictions, "diskBytes": self.diskSize}
+
+
+def readPairs(path: str) -> Iterator[tuple[str, str, str]]:
+    """Reads the pairs of sequences of a batch file.
+
+    A FASTA file (starting with '>') holds the pairs as consecutive records, the first one with the second one,
+    the third one with the fourth one and so on. Otherwise every non-empty line not starting with '#' is a pair
+    of tab-separated sequences, optionally preceded by a label.
+
+    Args:
+        path (str): the path of the batch file.
+
+    Yields:
+        tuple[str, Sequence, Sequence]: the label of the pair and its two (unchecked) sequences,
+                                        as arrays for FASTA files (see readFasta) and as strings otherwise.
+
+    Raises:
+        ValueError: if a FASTA file has an odd number of records or a line has the wrong number of fields.
+    """
+    with open(path, "rb") as file:
+        isFasta = file.read(4096).lstrip().startswith(b'>')
+
+    if isFasta:
+        records = readFasta(path)
+        for label1, seq1 in records:
+            second = next(records, None)
+            if second is None:
+                raise ValueError(f"{path}: a FASTA batch needs an even number of records, the last one ({label1}) has no pair")
+            label2, seq2 = second
+            yield f"{label1}/{label2}", seq1, seq2
+        return
+
+    with open(path) as file:
+        text = file.read()
+
+    for lineNumber, line in enumerate(text.splitlines(), start=1):
+        if not line.strip() or line.startswith('#'):
+            continue
+
+        fields = line.rstrip('\r\n').split('\t')
+        if len(fields) == 2:
+            yield f"pair {lineNumber}", *fields
+        elif len(fields) == 3:
+            yield tuple(fields)
+        else:
+            raise ValueError(f"{path}, line {lineNumber}: expected 2 or 3 tab-separated fields, got {len(fields)}")
+
+
+BATCH_CHUNK_CELLS = 1 << 20 # pairs are sent to the workers in chunks of about this many cells
+BATCHED_BUCKET = 32 # pairs whose lengths round down to the same multiple of this are filled together by alignPairsBatched
+BATCHED_CHUNK_CELLS = 1 << 23 # cells of the pairs of a bucket sent together, the workspace of alignPairsBatched takes 9 bytes per cell
+
+def fillMatricesBatched(codes1: np.ndarray, codes2: np.ndarray, args: Params, minScore: int | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fills the matrices of many pairs at once, one row of every pair per numpy operation.
+
+    The pairs are stacked in a single workspace, the shorter ones padded:
+    a cell only depends on the cells above and on its left, so the cells of a pair are exact whatever
+    the padding holds and the padded ones are simply ignored. Each row is computed as in fillRowSegment,
+    with the cumulative maximum of cumulativeRowScores taken along the columns of every pair.
+    With minScore, after each row the pairs are bounded as in fillMatrixRowsAbove, and the fill stops
+    as soon as none of them can reach it.
+
+    Args:
+        codes1 (np.ndarray): the padded codes of the first sequences, shape (pairs, columns - 1).
+        codes2 (np.ndarray): the padded codes of the second sequences, shape (pairs, rows - 1).
+        args (Params): an object containing the alignment parameters.
+        minScore (int | None): the lowest accepted alignment score.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: the int64 score matrices and the direction matrices, shape (pairs, rows, columns),
+                                                   and for each pair whether it can still reach minScore (its matrices are complete only then).
+    """
+    pairs, rows, columns = len(codes1), codes2.shape[1] + 1, codes1.shape[1] + 1
+    # the workspace is (rows, pairs, columns), so the row y of every pair is one contiguous block
+    scoreMatrices = np.empty((rows, pairs, columns), dtype=np.int64)
+    directionMatrices = np.zeros((rows, pairs, columns), dtype=np.uint8)
+    reached = np.ones(pairs, dtype=bool)
+
+    offsets = np.arange(columns, dtype=np.int64) * args.gapPenalty
+    scoreMatrices[0] = offsets
+    scoreMatrices[:, :, 0] = np.arange(rows, dtype=np.int64)[:, None] * args.gapPenalty
+    directionMatrices[0, :, 1:] = LEFT_FLAG
+    directionMatrices[1:, :, 0] = UP_FLAG
+
+    if minScore is not None: # the padding is the only place where INVALID_CODE can be
+        lengths2 = np.count_nonzero(codes2 != INVALID_CODE, axis=1)
+        remaining1 = np.count_nonzero(codes1 != INVALID_CODE, axis=1)[:, None] - np.arange(columns, dtype=np.int64) # negative in the padding
+
+    for y in range(rows):
+        if y > 0:
+            upScore = scoreMatrices[y - 1, :, 1:] + args.gapPenalty
+            diagScore = scoreMatrices[y - 1, :, :-1] + np.where(codes1 == codes2[:, y - 1, None], args.match, args.misMatch)
+            candidates = np.concatenate((scoreMatrices[y, :, :1], np.maximum(upScore, diagScore)), axis=1) - offsets
+            rowScore = np.maximum.accumulate(candidates, axis=1) + offsets
+
+            bestScore = rowScore[:, 1:]
+            scoreMatrices[y, :, 1:] = bestScore
+            directionMatrices[y, :, 1:] = (diagScore == bestScore) * DIAG_FLAG | (upScore == bestScore) * UP_FLAG | (rowScore[:, :-1] + args.gapPenalty == bestScore) * LEFT_FLAG
+
+        if minScore is not None:
+            bounds = scoreMatrices[y] + remainingScoreBound(remaining1, (lengths2 - y)[:, None], args)
+            bestBounds = np.max(np.where(remaining1 >= 0, bounds, np.iinfo(np.int64).min), axis=1)
+            reached &= (y > lengths2) | (bestBounds >= minScore) # the rows after the last one of a pair are padding
+            if not reached.any():
+                break
+
+    return scoreMatrices.transpose(1, 0, 2), directionMatrices.transpose(1, 0, 2), reached
+
+
+def alignPairsBatched(pairs: list[tuple[Sequence, Sequence]], args: Params) -> list[tuple[int | None, list[tuple[str, str]]]]:
+    """Aligns many short pairs with a single fillMatricesBatched, giving the same results as alignSequences.
+
+    Unit-cost scorings (see isUnitCost) are aligned pair by pair by alignSequences instead:
+    the bit-parallel engine is faster than the stacked integer fill.
+
+    Args:
+        pairs (list[tuple[Sequence, Sequence]]): the already checked pairs, best of similar lengths (see BATCHED_BUCKET).
+        args (Params): an object containing the alignment parameters, args.maxAlignments and args.minScore (optional)
+                        as in alignSequences.
+
+    Returns:
+        list[tuple[int | None, list[tuple[str, str]]]]: the score and the alignments of each pair, see alignSequences.
+    """
+    if isUnitCost(args):
+        return [alignSequences(seq1, seq2, args) for seq1, seq2 in pairs]
+
+    codes1 = np.full((len(pairs), max(len(seq1) for seq1, _ in pairs)), INVALID_CODE, dtype=np.uint8)
+    codes2 = np.full((len(pairs), max(len(seq2) for _, seq2 in pairs)), INVALID_CODE, dtype=np.uint8)
+    for pair, (seq1, seq2) in enumerate(pairs):
+        codes1[pair, :len(seq1)] = sequenceCodes(seq1)
+        codes2[pair, :len(seq2)] = sequenceCodes(seq2)
+
+    minScore = getattr(args, "minScore", None)
+    scoreMatrices, directionMatrices, reached = fillMatricesBatched(codes1, codes2, args, minScore)
+
+    results = []
+    for pair, (seq1, seq2) in enumerate(pairs):
+        score = int(scoreMatrices[pair, len(seq2), len(seq1)]) if reached[pair] else None
+        if minScore is not None and (score is None or score < minScore):
+            results.append((None, []))
+            continue
+        pairArgs = argparse.Namespace(seq1=seq1, seq2=seq2, shape=(len(seq2) + 1, len(seq1) + 1))
+        results.append((score, traceback(directionMatrices[pair], pairArgs, getattr(args, "maxAlignments", None))))
+
+    return results
+
+
+# state of a batch worker process, set once by initBatchWorker
+batchWorkerState = {}
+
+def initBatchWorker(args: Params) -> None:
+    """Stores the alignment parameters in a worker of alignBatch.
+
+    Args:
+        args (Params): an object containing the alignment parameters.
+    """
+    batchWorkerState.update(args=argparse.Namespace(match=args.match, misMatch=args.misMatch, gapPenalty=args.gapPenalty,
+                                                    maxAlignments=getattr(args, "maxAlignments", None), minScore=getattr(args, "minScore", None)))
+
+
+def batchedBucket(task: tuple[int, str, str, str]) -> tuple[int, int]:
+    """Returns the bucket of a pair of alignBatch, the pairs of the same bucket are aligned together by alignPairsBatched."""
+    return len(task[2]) // BATCHED_BUCKET, len(task[3]) // BATCHED_BUCKET
+
+
+def pairCells(task: tuple[int, str, str, str]) -> int:
+    """Returns the cells of the matrices of a pair of alignBatch."""
+    return (len(task[2]) + 1) * (len(task[3]) + 1)
+
+
+def chunkTasks(tasks: list[tuple[int, str, str, str]], maxCells: int) -> list[list[tuple[int, str, str, str]]]:
+    """Splits the pairs of alignBatch, in order, into chunks of at most maxCells cells.
+
+    Args:
+        tasks (list[tuple[int, str, str, str]]): the pairs as (index, label, seq1, seq2).
+        maxCells (int): the cells of a chunk, a pair larger than this has a chunk of its own.
+
+    Returns:
+        list[list[tuple[int, str, str, str]]]: the chunks.
+    """
+    chunks, chunkCells = [], 0
+    for task in tasks:
+        cells = pairCells(task)
+        if not chunks or chunkCells + cells > maxCells:
+            chunks.append([]) # the first task of a chunk is never split, however long it is
+            chunkCells = 0
+        chunks[-1].append(task)
+        chunkCells += cells
+
+    return chunks
+
+
+def alignChunk(chunk: list[tuple[int, str, str, str]]) -> list[tuple[int, str, int | None, list[tuple[str, str]]]]:
+    """Aligns a chunk of pairs, called in a worker set up by initBatchWorker.
+
+    The pairs of similar lengths (see BATCHED_BUCKET) are aligned together by alignPairsBatched,
+    the others one at a time by alignSequences.
+
+    Args:
+        chunk (list[tuple[int, str, str, str]]): the pairs as (index, label, seq1, seq2).
+
+    Returns:
+        list[tuple[int, str, int | None, list[tuple[str, str]]]]: for each pair its index, label, score and alignments.
+    """
+    args = batchWorkerState["args"]
+    groups = {}
+    for task in chunk:
+        groups.setdefault(batchedBucket(task), []).append(task)
+
+    results = []
+    for group in groups.values():
+        if len(group) == 1:
+            index, label, seq1, seq2 = group[0]
+            results.append((index, label, *alignSequences(seq1, seq2, args)))
+        else:
+            pairResults = alignPairsBatched([(seq1, seq2) for _, _, seq1, seq2 in group], args)
+            results += [(index, label, *result) for (index, label, _, _), result in zip(group, pairResults)]
+
+    return results
+
+
+def alignBatch(pairs: Iterable[tuple[str, str, str]], args: Params, ordered: bool = True, cache: AlignmentCache | None = None) -> Iterator[tuple[int, str, int | None, list[tuple[str, str]]]]:
+    """Aligns many pairs of sequences on a pool of processes started once.
+
+    The pairs are checked first and bucketed by length over the whole input (see batchedBucket).
+    Each bucket is split into chunks of up to BATCHED_CHUNK_CELLS cells, so the pairs of similar lengths
+    share a single workspace of alignPairsBatched, fewer cells when there are too few chunks for the workers.
+    The pairs left alone in their bucket are grouped in chunks of about BATCH_CHUNK_CELLS cells instead.
+    The chunks are sent from the largest to the smallest: long pairs travel alone and start first,
+    and the workers take the next chunk as soon as they are free.
+    With a cache, the pairs already aligned are answered without reaching the workers,
+    and a pair repeated in the batch is aligned once.
+
+    Args:
+        pairs (Iterable[tuple[str, str, str]]): the pairs as (label, seq1, seq2), see readPairs.
+        args (Params): an object containing the alignment parameters (and optionally workers, maxAlignments and minScore).
+        ordered (bool): if True the results are yielded in input order, otherwise as soon as they are ready.
+        cache (AlignmentCache | None): the cache where the results are looked up and stored.
+
+    Yields:
+        tuple[int, str, int | None, list[tuple[str, str]]]: the index of the pair in the input, its label, score and alignments (see alignSequences).
+    """
+    checked = [(index, label, checkSequence(seq1, label = f"first sequence of {label}"), checkSequence(seq2, label = f"second sequence of {label}"))
+               for index, (label, seq1, seq2) in enumerate(pairs)]
+
+    tasks, cached = [], []
+    keys, repeated = {}, {} # the key of each aligned pair, and the other pairs with the same key
+    for index, label, seq1, seq2 in checked:
+        if cache is None:
+            tasks.append((index, label, seq1, seq2))
+            continue
+
+        key = cache.key(seq1, seq2, args)
+        if key in repeated: # answered by the first pair with the same key, so it counts as a hit
+            repeated[key].append((index, label))
+            cache.countRepeated()
+        elif (result := cache.get(key, seq1, seq2)) is not None:
+            cached.append((index, label, *result))
+        else:
+            keys[index], repeated[key] = key, []
+            tasks.append((index, label, seq1, seq2))
+
+    waiting = {} # results that arrived before some pair preceding them in the input
+    nextIndex = 0
+    def release(result: tuple[int, str, int | None, list[tuple[str, str]]]) -> Iterator[tuple[int, str, int | None, list[tuple[str, str]]]]:
+        nonlocal nextIndex
+        if not ordered:
+            yield result
+            return
+
+        waiting[result[0]] = result
+        while nextIndex in waiting:
+            yield waiting.pop(nextIndex)
+            nextIndex += 1
+
+    def releaseComputed(result: tuple[int, str, int | None, list[tuple[str, str]]]) -> Iterator[tuple[int, str, int | None, list[tuple[str, str]]]]:
+        yield from release(result)
+        if cache is not None:
+            key = keys[result[0]]
+            cache.put(key, result[2:])
+            for index, label in repeated.pop(key):
+                yield from release((index, label, *result[2:]))
+
+    for result in cached:
+        yield from release(result)
+    if not tasks:
+        return
+
+    buckets = {}
+    for task in sorted(tasks, key=pairCells, reverse=True): # the longest pairs of each chunk start first too
+        buckets.setdefault(batchedBucket(task), []).append(task)
+
+    workersAmount = countWorkers(args)
+    # every worker gets a share of the cells, but no workspace is smaller than a chunk of single pairs
+    bucketCells = min(BATCHED_CHUNK_CELLS, max(BATCH_CHUNK_CELLS, -(-sum(map(pairCells, tasks)) // workersAmount)))
+    chunks, singles = [], []
+    for bucket in buckets.values():
+        if len(bucket) == 1:
+            singles += bucket
+        else:
+            chunks += chunkTasks(bucket, bucketCells)
+    chunks += chunkTasks(singles, BATCH_CHUNK_CELLS)
+    chunks.sort(key=lambda chunk: sum(map(pairCells, chunk)), reverse=True)
+
+    workersAmount = min(workersAmount, len(chunks))
+    pool = Pool(workersAmount, initializer=initBatchWorker, initargs=(args,)) if workersAmount > 1 else None
+    if pool is None:
+        initBatchWorker(args)
+    else:
+        runStats.count("processesStarted", workersAmount)
+        runStats.count("tasksDispatched", len(chunks))
+    runStats.count("cellsFilled", sum(map(pairCells, tasks)))
+
+    try:
+        results = pool.imap_unordered(alignChunk, chunks) if pool else map(alignChunk, chunks)
+
+        for chunkResults in results:
+            for result in chunkResults:
+                yield from releaseComputed(result)
+    finally:
+        if pool:
+            pool.terminate() # also stops the workers if the caller doesn't consume every result
+            pool.join()
+
+
+DEFAULT_TOP_HITS = 10 # number of best targets reported by searchDatabase when none is given
+
+class QueryProfile:
+    """The scores of a query against each nucleotide, computed once and reused for every target of a search.
+
+    scores[code] holds the match or mismatch score of each position of the query against the nucleotide code,
+    so a row of the score matrix takes one lookup instead of comparing the sequences and choosing the score per cell.
+    With a unit-cost scoring (see isUnitCost) the bit-parallel match masks of the query are kept instead.
+    """
+    def __init__(self, query: Sequence, args: Params):
+        """Builds the profile of an already checked query.
+
+        Args:
+            query (Sequence): the query.
+            args (Params): an object containing the alignment parameters.
+        """
+        self.codes = sequenceCodes(query)
+        self.gapPenalty = args.gapPenalty
+        self.unitCost = isUnitCost(args)
+        self.args = argparse.Namespace(match=args.match, misMatch=args.misMatch, gapPenalty=args.gapPenalty)
+        if self.unitCost:
+            self.masks = bitParallelMasks(self.codes)
+        else:
+            self.scores = np.where(self.codes == np.arange(len(NUCLEOTIDES), dtype=np.uint8)[:, None], args.match, args.misMatch).astype(np.int64)
+
+    def score(self, target: np.ndarray) -> int:
+        """Returns the score of the global alignment of the query with a target, in linear memory.
+
+        The query is along the rows of the matrix, so each row is a whole vector operation.
+
+        Args:
+            target (np.ndarray): the codes of the target (see sequenceCodes).
+
+        Returns:
+            int: the alignment score.
+        """
+        if self.unitCost: # the query is along the columns of bitParallelColumns, the target along the rows
+            for positive, negative in bitParallelColumns(target, self.codes, self.masks):
+                pass
+            distance = len(target) + positive.bit_count() - negative.bit_count()
+            return int(distanceToScore(distance, len(target) + len(self.codes), self.args))
+
+        row = np.arange(len(self.codes) + 1, dtype=np.int64) * self.gapPenalty
+        for y, code in enumerate(target.tolist(), start=1):
+            bestNotLeft = np.maximum(row[1:] + self.gapPenalty, row[:-1] + self.scores[code])
+            row = cumulativeRowScores(y * self.gapPenalty, bestNotLeft, self.gapPenalty)
+        return int(row[-1])
+
+
+# state of a search worker process, set once by initSearchWorker
+searchWorkerState = {}
+
+def initSearchWorker(profile: QueryProfile, top: int, minScore: int | None) -> None:
+    """Stores the query profile in a worker of searchDatabase.
+
+    Args:
+        profile (QueryProfile): the profile of the query.
+        top (int): the number of hits kept.
+        minScore (int | None): the lowest score of a hit.
+    """
+    searchWorkerState.update(profile=profile, top=top, minScore=minScore)
+
+
+def searchChunk(chunk: list[tuple[int, str, Sequence]]) -> list[tuple[int, int, str, Sequence]]:
+    """Scores a chunk of targets against the query, called in a worker set up by initSearchWorker.
+
+    Args:
+        chunk (list[tuple[int, str, Sequence]]): the checked targets as (index, label, sequence).
+
+    Returns:
+        list[tuple[int, int, str, Sequence]]: the best targets of the chunk as (score, -index, label, sequence),
+                                                so the largest tuples are the best hits, the earliest ones first.
+    """
+    profile, minScore = searchWorkerState["profile"], searchWorkerState["minScore"]
+    hits = ((profile.score(sequenceCodes(target)), -index, label, target) for index, label, target in chunk)
+    return heapq.nlargest(searchWorkerState["top"], (hit for hit in hits if minScore is None or hit[0] >= minScore), key=lambda hit: hit[:2])
+
+
+def searchDatabase(query: Sequence, targets: Iterable[tuple[str, Sequence]], args: Params, top: int = DEFAULT_TOP_HITS) -> list[tuple[int, str, int, list[tuple[str, str]]]]:
+    """Aligns one query with many targets and returns the best ones.
+
+    The query is checked and turned into a QueryProfile once. The targets are scored in linear memory
+    on a pool of processes, in chunks of about BATCH_CHUNK_CELLS cells, keeping only the best top of them,
+    and the tracebacks are computed only for these hits (see alignBatch).
+
+    Args:
+        query (Sequence): the query.
+        targets (Iterable[tuple[str, Sequence]]): the targets as (label, sequence), see readFasta.
+        args (Params): an object containing the alignment parameters (and optionally workers, maxAlignments and minScore).
+        top (int): the number of hits returned.
+
+    Returns:
+        list[tuple[int, str, int, list[tuple[str, str]]]]: the hits from the best score to the worst (in input order
+                                                            when tied), as the index of the target, its label, score
+                                                            and alignments with the query (the query first).
+
+    Raises:
+        ValueError: if top is not positive.
+        NucleotideException: if a target contains invalid characters (all of them are checked before the search starts).
+    """
+    if top < 1:
+        raise ValueError(f"The number of hits must be positive, got {top}")
+
+    query = checkSequence(query, label = "query")
+    profile = QueryProfile(query, args)
+    minScore = getattr(args, "minScore", None)
+
+    # checked before the pool starts, as in alignBatch: an exception raised while the pool reads the chunks would hang it
+    checked = [(index, label, checkSequence(target, label = label)) for index, (label, target) in enumerate(targets)]
+
+    def chunks() -> Iterator[list[tuple[int, str, Sequence]]]:
+        chunk, chunkCells = [], 0
+        for index, label, target in checked:
+            chunk.append((index, label, target))
+            chunkCells += (len(query) + 1) * (len(target) + 1)
+            runStats.count("cellsFilled", (len(query) + 1) * (len(target) + 1))
+            if chunkCells >= BATCH_CHUNK_CELLS:
+                yield chunk
+                chunk, chunkCells = [], 0
+        if chunk:
+            yield chunk
+
+    workersAmount = countWorkers(args)
+    pool = Pool(workersAmount, initializer=initSearchWorker, initargs=(profile, top, minScore)) if workersAmount > 1 else None
+    if pool is None:
+        initSearchWorker(profile, top, minScore)
+    else:
+        runStats.count("processesStarted", workersAmount)
+
+    hits = [] # a heap of the best hits found so far, the worst one first
+    try:
+        for chunkHits in (pool.imap_unordered(searchChunk, chunks()) if pool else map(searchChunk, chunks())):
+            if pool:
+                runStats.count("tasksDispatched")
+            for hit in chunkHits:
+                if len(hits) < top:
+                    heapq.heappush(hits, hit)
+                elif hit[:2] > hits[0][:2]:
+                    heapq.heapreplace(hits, hit)
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    hits.sort(key=lambda hit: hit[:2], reverse=True)
+    pairs = [(label, query, target) for _, _, label, target in hits]
+    hitArgs = argparse.Namespace(match=args.match, misMatch=args.misMatch, gapPenalty=args.gapPenalty, workers=getattr(args, "workers", None),
+                                 maxAlignments=getattr(args, "maxAlignments", None)) # the hits already reach minScore
+    return [(-negativeIndex, label, score, alignments)
+            for (score, negativeIndex, label, _), (_, _, _, alignments) in zip(hits, alignBatch(pairs, hitArgs))]
+
+
+def printPossibleAlignments(possibleAlignments: Iterable[tuple[str, str]]) -> None:
+    """Prints all possible pairwise alignments between two sequences, highlighting matches, 
+    mismatches, and gaps.
+
+    Each alignment is printed as soon as it's produced, so a generator (see iterateAlignments) is streamed.
+
+    Args:
+        possibleAlignments (Iterable[tuple[str, str]]): tuples, each containing two equal-length strings 'seq1' and 'seq2'
+                                                    (with '-' characters representing gaps).
+    """
+    for seq1, seq2 in possibleAlignments:
+        matchLine = ""
+        for nuc1, nuc2 in zip(seq1, seq2):
+            if nuc1 == nuc2: # it's never possible for both sequences to have a gap at the same position
+                matchLine += '|'
+            elif nuc1 == '-' or nuc2 == '-':
+                matchLine += ' '
+            else:
+                matchLine += '·'
+        
+        print(seq1, matchLine, seq2, sep='\n', end='\n'*2)
+
+
+# the arrows of every possible cell of the direction matrix, indexed by the cell value
+DIRECTION_STRINGS = np.array([DIAG_DIR * bool(flags & DIAG_FLAG) + UP_DIR * bool(flags & UP_FLAG) + LEFT_DIR * bool(flags & LEFT_FLAG) for flags in range(8)], dtype="S9")
+
+def directionArrows(directionMatrix: np.ndarray) -> np.ndarray:
+    """Converts a direction matrix into the arrows it stands for, only meant for display.
+
+    Args:
+        directionMatrix (np.ndarray): a direction matrix of bit flags.
+
+    Returns:
+        np.ndarray: a matrix of byte strings, each one the concatenation of the UTF-8 arrows of a cell.
+    """
+    return DIRECTION_STRINGS[np.asarray(directionMatrix)]
+
+
+
+# The configuration for these Unicode characters is taken from an open-source repository that I also contribute to (https://github.com/M1keCodingProjects/PyChess)
+TOP    = "┌┬┐"
+MIDDLE = "├┼┤"
+BOTTOM = "└┴┘"
+WALL   = '─'
+
+def generateLine(corners: str, cellsAmount: int) -> str:
+    """Constructs a line using corner characters and wall segments. 
+
+    Args:
+        corners (str): A string containing:
+                            corners[0] - Left corner character
+                            corners[1] - Between-cells character
+                            corners[-1] - Right corner character
+        cellsAmount (int): Number of cells in the row
+
+    Returns:
+        str: The constructed line
+    """
+    return corners[0] + (WALL * 3 + corners[1]) * (cellsAmount - 1) + WALL * 3 + corners[-1]
+
+
+def printDirectionMatrix(directionMatrix: np.ndarray) -> None:
+    """Formats and prints the direction matrix, drawing the direction flags of each cell as arrows.
+
+    Args:
+        directionMatrix (np.ndarray): the filled direction matrix.
+    """
+    cellsAmount = directionMatrix.shape[1]
+    
+    topSeparator    = generateLine(TOP,    cellsAmount)
+    middleSeparator = generateLine(MIDDLE, cellsAmount)
+    bottomSeparator = generateLine(BOTTOM, cellsAmount)
+
+    print(topSeparator)
+    
+    # Loop over twice the number of rows because each cell is printed in two lines (for different directions)
+    for y in range(0, 2 * directionMatrix.shape[0]):
+        isFirstLine = y % 2 == 0
+        rowBuff     = "│"
+        
+        # Loop over each column in the matrix
+        for x in range(directionMatrix.shape[1]):
+            if isFirstLine:
+                rowBuff += DIAG_DIR.decode() + ' '  if directionMatrix[y // 2, x] & DIAG_FLAG else '  '
+                rowBuff += UP_DIR.decode()          if directionMatrix[y // 2, x] & UP_FLAG   else ' '
+            else:
+                rowBuff += LEFT_DIR.decode() + '  ' if directionMatrix[y // 2, x] & LEFT_FLAG else '   '
+        
+            rowBuff += '│'
+
+        print((middleSeparator + '\n') * isFirstLine * (y != 0) + rowBuff)
+    print(bottomSeparator)
+
+
+def main():
+    """Executes the main script"""
 
     parser = argparse.ArgumentParser(prog="Scientific Programming Project", description = "Takes two sequences as input for the alignment")
-    parser.add_argument("seq1",                type=str, help="Write here your first sequence (positional)")
-    parser.add_argument("seq2",                type=str, help="Write here your second sequence (positional)")
+    parser.add_argument("seq1",                type=str, nargs="?", help="Write here your first sequence (positional)")
+    parser.add_argument("seq2",                type=str, nargs="?", help="Write here your second sequence (positional)")
     parser.add_argument("-gp", "--gapPenalty", type=int, help="Write the negative gap penalty you want to apply")
     parser.add_argument("-m", "--match",       type=int, help="Write the match score you want to apply")
     parser.add_argument("-mm", "--misMatch",   type=int, help="Write the mismatch score you want to apply")
+    parser.add_argument("-e", "--engine",      choices=FILL_ENGINES, help="Choose the engine used to fill the matrices (default: pool, tiled with --outOfCore)")
+    parser.add_argument("-w", "--workers",     type=int, help="Write the number of worker processes (default: all the available cores)")
+    parser.add_argument("-ts", "--tileSize",   type=int, help="Write the side of the tiles used by the tiled engine (default: chosen from the cache size)")
+    parser.add_argument("-so", "--scoreOnly",  action="store_true", help="Only compute the alignment score, in linear memory")
+    parser.add_argument("-hb", "--hirschberg", action="store_true", help="Find a single optimal alignment in linear memory")
+    parser.add_argument("-ma", "--maxAlignments", type=int, help="Write the maximum number of optimal alignments to print (default: all)")
+    parser.add_argument("-ca", "--countAlignments", action="store_true", help="Print the number of optimal alignments")
+    parser.add_argument("-sa", "--sampleAlignment", action="store_true", help="Print a single optimal alignment, picked uniformly at random")
+    parser.add_argument("--seed",              type=int, help="Write the seed of the random generator used by --sampleAlignment")
+    parser.add_argument("-b", "--batch",       type=str, help="Write the path of a FASTA or TSV file of pairs to align instead of seq1 and seq2")
+    parser.add_argument("-min", "--minScore",  type=int, help="Write the lowest accepted score of --batch and --search: the --batch pairs that can't reach it are stopped early, the --search targets below it are not printed")
+    parser.add_argument("--cacheBytes",        type=int, default=RESULT_CACHE_BYTES, help=f"Write the memory bound in bytes of the cache of --batch results (default: {RESULT_CACHE_BYTES})")
+    parser.add_argument("--cacheDir",          type=str, help="Write the path of a directory where the results of --batch are also cached across runs")
+    parser.add_argument("--cacheDirBytes",     type=int, help=f"Write the bound in bytes of the files of --cacheDir, the least recently used are deleted beyond it (default: {RESULT_DISK_BYTES})")
+    parser.add_argument("--cacheStats",        action="store_true", help="Print the hits and misses of the cache of --batch on the standard error")
+    parser.add_argument("-s", "--search",      type=str, help="Write the path of a FASTA file of targets to align with the query (seq1, or the first record of --fasta), printing the best ones")
+    parser.add_argument("-top", "--top",       type=int, help=f"Write the number of targets printed by --search (default: {DEFAULT_TOP_HITS})")
+    parser.add_argument("--unordered",         action="store_true", help="Print the results of --batch as soon as they are ready instead of in input order")
+    parser.add_argument("-bd", "--band",       action="store_true", help="Fill only a band of diagonals, starting from --bandWidth and widening it until the score is optimal")
+    parser.add_argument("--bandWidth",         type=int, default=DEFAULT_BAND_WIDTH, help=f"Write the starting half-width of the band of --band (default: {DEFAULT_BAND_WIDTH})")
+    parser.add_argument("-oc", "--outOfCore",  type=str, help="Write the path of a directory where the matrices are kept as memory-mapped files instead of in RAM (the matrices are not printed)")
+    parser.add_argument("--resume",            action="store_true", help="Continue the fill of --outOfCore from the checkpoint saved in its directory")
+    parser.add_argument("--profile",           action="store_true", help="Print the time of each phase and the work counters on the standard error")
+    parser.add_argument("--profileJson",       type=str, help="Write the path of a file where --profile also writes the phases and the counters as JSON")
+    parser.add_argument("-f", "--fasta",       type=str, nargs="+", help="Write the path of a FASTA file holding seq1 and seq2, or the paths of two files holding one each")
 
     args = parser.parse_args()
     args: Params
 
-    args.seq1 = checkSequence(args.seq1, label = "first sequence")
-    args.seq2 = checkSequence(args.seq2, label = "second sequence")
+    if args.profileJson and not args.profile:
+        parser.error("--profileJson needs --profile")
+    if not args.profile:
+        run(args, parser)
+        return
+
+    runStats.reset(enabled=True)
+    try:
+        run(args, parser)
+    finally:
+        runStats.enabled = False
+        runStats.report(sys.stderr)
+        if args.profileJson:
+            with open(args.profileJson, "w") as file:
+                file.write(runStats.toJson())
+
+
+def matrixOptions(args: Params) -> list[str]:
+    """Returns the options given on the command line that need the score and direction matrices.
+
+    Args:
+        args (Params): the parsed arguments, before the default engine is set.
+
+    Returns:
+        list[str]: the names of the options, in the order of the help.
+    """
+    options = {"--engine": args.engine, "--maxAlignments": args.maxAlignments, "--countAlignments": args.countAlignments,
+               "--sampleAlignment": args.sampleAlignment, "--band": args.band, "--outOfCore": args.outOfCore, "--resume": args.resume}
+    return [name for name, value in options.items() if value is not None and value is not False]
+
+
+def run(args: Params, parser: argparse.ArgumentParser) -> None:
+    """Aligns the sequences as the command line asks, the part of main after the parsing of the arguments.
+
+    Args:
+        args (Params): the parsed arguments.
+        parser (argparse.ArgumentParser): the parser, to report the errors in the arguments.
+    """
+    if args.maxAlignments is not None and args.maxAlignments < 1:
+        parser.error("the maximum number of alignments must be positive")
+    if args.workers is not None and args.workers < 1:
+        parser.error("the number of workers must be positive")
+    if args.tileSize is not None and args.tileSize < 1:
+        parser.error("the side of the tiles must be positive")
+    if args.bandWidth < 0:
+        parser.error("the half-width of the band can't be negative")
+    if args.minScore is not None and not (args.batch or args.search):
+        parser.error("--minScore needs --batch or --search")
+    if (args.cacheDir or args.cacheStats) and not args.batch:
+        parser.error("--cacheDir and --cacheStats need --batch")
+    if args.cacheDirBytes is not None and not args.cacheDir:
+        parser.error("--cacheDirBytes needs --cacheDir")
+    if args.cacheDirBytes is not None and args.cacheDirBytes < 1:
+        parser.error("the bound of --cacheDir must be positive")
+    if args.unordered and not args.batch:
+        parser.error("--unordered needs --batch")
+    if args.top is not None and not args.search:
+        parser.error("--top needs --search")
+
+    if args.scoreOnly and (options := matrixOptions(args)):
+        parser.error(f"--scoreOnly keeps no matrix, it can't be used with {', '.join(options)}")
+    if args.hirschberg and (options := matrixOptions(args)):
+        parser.error(f"--hirschberg keeps no matrix, it can't be used with {', '.join(options)}")
+
+    if args.seed is not None and not args.sampleAlignment:
+        parser.error("--seed needs --sampleAlignment")
+    if args.sampleAlignment and args.outOfCore: # countMatrix keeps a Python integer per cell in memory
+        parser.error("--sampleAlignment counts the paths of every cell in memory, it can't be used with --outOfCore")
+
+    # the tiled engine keeps the accesses to mapped files sequential, one band of rows after the other
+    args.engine = args.engine or ("tiled" if args.outOfCore else "pool")
+
+    if args.resume and not (args.outOfCore and args.engine == "tiled"):
+        parser.error("--resume needs --outOfCore and the tiled engine")
+
+    if args.batch:
+        cache = AlignmentCache(args.cacheBytes, args.cacheDir, RESULT_DISK_BYTES if args.cacheDirBytes is None else args.cacheDirBytes)
+        for _, label, score, possibleAlignments in runStats.iterate("alignBatch", alignBatch(readPairs(args.batch), args, ordered = not args.unordered, cache = cache)):
+            with runStats.phase("printAlignments"):
+                print(f">{label}")
+                printPossibleAlignments(possibleAlignments)
+                print("Alignment score:", "below threshold" if score is None else score)
+        if args.cacheStats:
+            print("Cache:", ", ".join(f"{name} {value}" for name, value in cache.stats().items()), file=sys.stderr)
+        return
+
+    if args.search:
+        if args.seq2 is not None or (args.seq1 is None) == (args.fasta is None):
+            parser.error("--search takes one query: seq1, or the first record of a --fasta file")
+        query = args.seq1 if args.fasta is None else next(readFasta(args.fasta[0]), (None, None))[1]
+        if query is None:
+            parser.error(f"{args.fasta[0]} has no records")
+        args.top = DEFAULT_TOP_HITS if args.top is None else args.top
+        if args.top < 1:
+            parser.error("the number of hits must be positive")
+        with runStats.phase("searchDatabase"):
+            hits = searchDatabase(query, readFasta(args.search), args, args.top)
+        for _, label, score, possibleAlignments in hits:
+            with runStats.phase("printAlignments"):
+                print(f">{label}")
+                printPossibleAlignments(possibleAlignments)
+                print("Alignment score:", score)
+        return
+
+    if args.fasta:
+        if args.seq1 is not None or len(args.fasta) > 2:
+            parser.error("--fasta takes one or two files and replaces seq1 and seq2")
+        with runStats.phase("readFasta"):
+            records = [record for path in args.fasta for record in itertools.islice(readFasta(path), 2 // len(args.fasta))]
+        if len(records) < 2:
+            parser.error("--fasta needs two sequences: two records in one file, or one record in each of two files")
+        (_, args.seq1), (_, args.seq2) = records
+
+    if args.seq1 is None or args.seq2 is None:
+        parser.error("the following arguments are required: seq1, seq2 (or --batch, --fasta, --search)")
+
+    with runStats.phase("checkSequence"):
+        args.seq1 = checkSequence(args.seq1, label = "first sequence")
+        args.seq2 = checkSequence(args.seq2, label = "second sequence")
 
     args.shape = (len(args.seq2) + 1, len(args.seq1) + 1)
 
-    scoreMatrix = createMatrix(args, isDirectionMatrix = False)
-    directionMatrix = createMatrix(args, isDirectionMatrix = True)
-    antidiag = calculateAntidiagonals(args)
-    scoreMatrix, directionMatrix = fillMatrix(antidiag, args, scoreMatrix, directionMatrix)
-    score = getScore(args, scoreMatrix)
-    possibleAlignments = traceback(directionMatrix, args)
-
-    print("First sequence:", args.seq1)
-    print("Second sequence:",args.seq2)
-    print(scoreMatrix)
-    printDirectionMatrix(directionMatrix)
-    printPossibleAlignments(possibleAlignments)
-    print("Alignment score:", score)
+    if args.scoreOnly:
+        print("First sequence:", sequenceText(args.seq1))
+        print("Second sequence:",sequenceText(args.seq2))
+        with runStats.phase("calculateScoreOnly"):
+            score = calculateScoreOnly(args)
+        print("Alignment score:", score)
+        return
+
+    if args.hirschberg:
+        with runStats.phase("hirschberg"):
+            alignment = hirschberg(args)
+        with runStats.phase("printAlignments"):
+            print("First sequence:", sequenceText(args.seq1))
+            print("Second sequence:",sequenceText(args.seq2))
+            printPossibleAlignments([alignment])
+            print("Alignment score:", alignmentScore(alignment, args))
+        return
+
+    if args.band:
+        if args.sampleAlignment or args.countAlignments: # they count the paths of every cell, the band would be expanded to the full matrix
+            parser.error("--band can't be used with --sampleAlignment or --countAlignments")
+        with runStats.phase("alignBanded"):
+            score, scoreMatrix, directionMatrix, _ = alignBanded(args, args.bandWidth)
+    else:
+        if args.outOfCore:
+            os.makedirs(args.outOfCore, exist_ok=True)
+            paths = [os.path.join(args.outOfCore, name) for name in ("scoreMatrix.dat", "directionMatrix.dat")]
+            if args.engine == "tiled": # the progress is saved next to the matrices
+                args.checkpoint = os.path.join(args.outOfCore, "checkpoint.json")
+        else:
+            paths = [None, None]
+
+        if args.resume: # checked before the files are mapped, which would fail on the wrong size
+            if not os.path.exists(args.checkpoint):
+                parser.error(f"there is no checkpoint to resume in {args.outOfCore}")
+            try:
+                TileCheckpoint.validate(args.checkpoint, args)
+            except ValueError as error:
+                parser.error(str(error))
+            for path in paths:
+                if not os.path.exists(path):
+                    parser.error(f"{path} is missing, the fill can't be resumed")
+            scoreMatrix = attachShared(("file", paths[0], args.shape, np.dtype(np.int32).str))
+            directionMatrix = attachShared(("file", paths[1], args.shape, np.dtype(np.uint8).str))
+        else:
+            with runStats.phase("createMatrix"):
+                scoreMatrix = createMatrix(args, isDirectionMatrix = False, shared = args.engine in SHARED_ENGINES, path = paths[0])
+                directionMatrix = createMatrix(args, isDirectionMatrix = True, shared = args.engine in SHARED_ENGINES, path = paths[1])
+        with runStats.phase("calculateAntidiagonals"):
+            antidiag = calculateAntidiagonals(args)
+        with runStats.phase("fillMatrix"):
+            scoreMatrix, directionMatrix = FILL_ENGINES[args.engine](antidiag, args, scoreMatrix, directionMatrix)
+        runStats.count("cellsFilled", args.shape[0] * args.shape[1])
+        score = getScore(args, scoreMatrix)
+
+    if args.sampleAlignment:
+        with runStats.phase("sampleAlignment"):
+            possibleAlignments = [sampleAlignment(np.asarray(directionMatrix), args, random.Random(args.seed))]
+    else: # the alignments are found while they are printed
+        possibleAlignments = runStats.iterate("traceback", iterateAlignments(directionMatrix, args, args.maxAlignments))
+
+    with runStats.phase("printMatrices"):
+        print("First sequence:", sequenceText(args.seq1))
+        print("Second sequence:",sequenceText(args.seq2))
+        if not args.outOfCore: # only the cells on the traceback paths are read from the mapped files
+            print(scoreMatrix.masked() if args.band else scoreMatrix) # the cells outside the band are printed as --
+            printDirectionMatrix(directionMatrix)
+    with runStats.phase("printAlignments"):
+        printPossibleAlignments(possibleAlignments)
+        print("Alignment score:", score)
+    if args.countAlignments:
+        with runStats.phase("countAlignments"):
+            alignmentsAmount = countAlignments(np.asarray(directionMatrix))
+        print("Optimal alignments:", alignmentsAmount)
 
 
 
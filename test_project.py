@@ -1,4 +1,8 @@
+import benchmark
+import json
+import pickle
 import pytest
+import random
 import sys
 from globalAlignment import *
 
@@ -49,6 +53,48 @@ def test_checkSequence_spaces1():
 def test_checkSequence_spaces2():
     assert checkSequence(" gtag      ", "second sequence") == "GTAG"
 
+def test_checkSequence_position():
+    with pytest.raises(NucleotideException) as exc_info:
+        checkSequence("  acgtéa", "first sequence")
+
+    assert exc_info.value.character == 'É'
+    assert exc_info.value.position == 4
+
+def test_checkSequence_longArray():
+    sequence = np.full(10_000_000, ord("A"), dtype=np.uint8)
+    sequence[5_000_000] = ord("N")
+    with pytest.raises(NucleotideException) as exc_info:
+        checkSequence(sequence, "first sequence")
+
+    assert exc_info.value.character == 'N'
+    assert exc_info.value.position == 5_000_000
+    assert "position 5000001" in str(exc_info.value)
+    assert len(str(exc_info.value)) < 200
+
+    with pytest.raises(EmptyLabelException) as exc_info:
+        checkSequence(sequence, "")
+    assert str(exc_info.value) == "Insertion error in " + "A" * 21 + "...: the label can't be empty"
+
+def test_checkSequence_longSequence():
+    with pytest.raises(NucleotideException) as exc_info:
+        checkSequence("A" * 1000 + "X" + "C" * 1000, "first sequence")
+
+    assert exc_info.value.position == 1000
+    assert str(exc_info.value) == ("Insertion error in the first sequence ('..." + "A" * 20 + "X" + "C" * 20
+                                   + "...', position 1001): invalid nucleotide 'X'. Sequences must contain only A, C, T, or G.")
+
+def test_sequenceCodes():
+    assert sequenceCodes("ACGTacgt").tolist() == [0, 1, 2, 3, 0, 1, 2, 3]
+    assert sequenceCodes(np.frombuffer(b"TGN", dtype=np.uint8)).tolist() == [3, 2, INVALID_CODE]
+
+@pytest.mark.parametrize("length", [0, 1, 4, 7, 101])
+def test_packSequence(length):
+    codes = np.random.default_rng(length).integers(0, 4, length).astype(np.uint8)
+    packed = packSequence(codes)
+
+    assert len(packed[0]) == -(-length // 4)
+    assert unpackSequence(packed).tolist() == codes.tolist()
+
 
 
 # createMatrix
@@ -86,7 +132,7 @@ def test_createMatrix_DirectionsRe():
         [UP_DIR,   '',     '',      '']
     ], dtype='S9')
 
-    assert np.array_equal(matrix, expected)
+    assert np.array_equal(directionArrows(matrix), expected)
 
 def test_createMatrix_DirectionsSq():
     args = MockArgs(shape=(3, 3))
@@ -98,7 +144,7 @@ def test_createMatrix_DirectionsSq():
         [UP_DIR,   '',     '']
     ], dtype='S9')
 
-    assert np.array_equal(matrix, expected)
+    assert np.array_equal(directionArrows(matrix), expected)
 
 def test_createMatrix_1x1Score():
     args = MockArgs(shape=(1, 1))
@@ -110,7 +156,7 @@ def test_createMatrix_1x1Direction():
     args = MockArgs((1, 1))
     matrix = createMatrix(args, isDirectionMatrix=True)
     expected = np.array([['']], dtype="S9")
-    assert np.array_equal(matrix, expected)
+    assert np.array_equal(directionArrows(matrix), expected)
 
 def test_createMatrix_4x1Score():
     args = MockArgs((4, 1))
@@ -134,14 +180,33 @@ def test_createMatrix_4x1Direction():
                         [UP_DIR],
                         [UP_DIR], 
                         [UP_DIR]], dtype='S9')
-    assert np.array_equal(matrix, expected)
+    assert np.array_equal(directionArrows(matrix), expected)
 
 def test_createMatrix_1x4Direction():
     args = MockArgs((1, 4))
     matrix = createMatrix(args, isDirectionMatrix=True)
     expected = np.array([['', LEFT_DIR, LEFT_DIR, LEFT_DIR]], dtype='S9')
+    assert np.array_equal(directionArrows(matrix), expected)
+
+
+def test_createMatrix_DirectionsFlags():
+    args = MockArgs(shape=(3, 3))
+    matrix = createMatrix(args, isDirectionMatrix=True)
+
+    expected = np.array([
+        [0,       LEFT_FLAG, LEFT_FLAG],
+        [UP_FLAG, 0,         0],
+        [UP_FLAG, 0,         0]
+    ], dtype=np.uint8)
+
+    assert matrix.dtype == np.uint8
     assert np.array_equal(matrix, expected)
 
+def test_directionArrows():
+    matrix = np.array([[0, DIAG_FLAG | LEFT_FLAG, DIAG_FLAG | UP_FLAG | LEFT_FLAG]], dtype=np.uint8)
+    expected = np.array([['', DIAG_DIR + LEFT_DIR, DIAG_DIR + UP_DIR + LEFT_DIR]], dtype='S9')
+    assert np.array_equal(directionArrows(matrix), expected)
+
 
 
 # calculateAntiDiagonals
@@ -204,6 +269,29 @@ def test_calculateAntidiagonals_4x1():
     assert result == expected
 
 
+def test_AntiDiagonals_bounds():
+    antiDiagonals = calculateAntidiagonals(MockArgs(shape=(3, 4)))
+
+    assert len(antiDiagonals) == 6
+    assert [antiDiagonals.bounds(index) for index in range(6)] == [(0, 0, 1), (1, 0, 2), (2, 0, 3), (3, 0, 3), (3, 1, 2), (3, 2, 1)]
+    assert antiDiagonals.interior(3) == (1, 3)
+    assert antiDiagonals[-1] == [(3, 2)]
+
+def test_AntiDiagonals_indices():
+    antiDiagonals = calculateAntidiagonals(MockArgs(shape=(3, 4)))
+    x, y = antiDiagonals.indices(3)
+
+    assert list(zip(x.tolist(), y.tolist())) == antiDiagonals[3] == [(3, 0), (2, 1), (1, 2)]
+
+def test_AntiDiagonals_lazy():
+    antiDiagonals = calculateAntidiagonals(MockArgs(shape=(100_000, 100_000)))
+
+    assert len(antiDiagonals) == 199_999
+    assert antiDiagonals.bounds(150_000) == (99_999, 50_001, 49_999)
+    with pytest.raises(IndexError):
+        antiDiagonals[199_999]
+
+
 
 # calculateSingleCellScore: this function is covered by tests on fillMatrix as it would be difficult to unit test
 # fillMatrix
@@ -224,7 +312,7 @@ def test_fillMatrix_2x2_mismatch():
         [UP_DIR, DIAG_DIR]], dtype="S9")
 
     assert np.array_equal(resultScore, expectedScore)
-    assert np.array_equal(resultDir, expectedDir)
+    assert np.array_equal(directionArrows(resultDir), expectedDir)
 
 def test_fillMatrix_2x2_match():
     args = MockArgs(shape=(2, 2), seq1 = "A", seq2 = "A")
@@ -243,7 +331,7 @@ def test_fillMatrix_2x2_match():
         [UP_DIR, DIAG_DIR]], dtype="S9")
 
     assert np.array_equal(resultScore, expectedScore)
-    assert np.array_equal(resultDir, expectedDir)
+    assert np.array_equal(directionArrows(resultDir), expectedDir)
 
 def test_fillMatrix_3x3():
     args = MockArgs(shape=(3, 3), seq1 = "AC", seq2 = "TC")
@@ -264,7 +352,7 @@ def test_fillMatrix_3x3():
         [UP_DIR, DIAG_DIR + UP_DIR, DIAG_DIR]], dtype="S9")
 
     assert np.array_equal(resultScore, expectedScore)
-    assert np.array_equal(resultDir, expectedDir)
+    assert np.array_equal(directionArrows(resultDir), expectedDir)
 
 def test_fillMatrix_5x5():
     args = MockArgs(shape=(5, 5), seq1 = "ACTG", seq2 = "TCGG")
@@ -289,7 +377,7 @@ def test_fillMatrix_5x5():
         [UP_DIR, DIAG_DIR + UP_DIR, UP_DIR, DIAG_DIR + UP_DIR, DIAG_DIR]], dtype="S9")
 
     assert np.array_equal(resultScore, expectedScore)
-    assert np.array_equal(resultDir, expectedDir)
+    assert np.array_equal(directionArrows(resultDir), expectedDir)
 
 def test_fillMatrix_3x10():
     args = MockArgs(shape=(3, 10), seq1 = "ACTGAAATG", seq2 = "TA")
@@ -309,9 +397,236 @@ def test_fillMatrix_3x10():
         [UP_DIR, DIAG_DIR, DIAG_DIR + LEFT_DIR, DIAG_DIR, LEFT_DIR, LEFT_DIR, LEFT_DIR, LEFT_DIR, DIAG_DIR + LEFT_DIR, LEFT_DIR],
         [UP_DIR, DIAG_DIR, LEFT_DIR, UP_DIR + LEFT_DIR, DIAG_DIR, DIAG_DIR, DIAG_DIR + LEFT_DIR, DIAG_DIR + LEFT_DIR, LEFT_DIR, LEFT_DIR]], dtype="S9")
 
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(directionArrows(resultDir), expectedDir)
+
+
+# fillMatrixPool
+@pytest.mark.parametrize("workers", [1, 2, 3, 8])
+def test_fillMatrixPool_sameAsFillMatrix(workers):
+    args = MockArgs(shape=(7, 10), seq1 = "ACTGAAATG", seq2 = "TAGGACT")
+    args.workers = workers
+    antidiag = calculateAntidiagonals(args)
+
+    expectedScore, expectedDir = fillMatrix(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    resultScore, resultDir = fillMatrixPool(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+
+def test_fillMatrixPool_sharedInPlace():
+    args = MockArgs(shape=(7, 10), seq1 = "ACTGAAATG", seq2 = "TAGGACT")
+    args.workers = 2
+    antidiag = calculateAntidiagonals(args)
+    scoreMatrix = createMatrix(args, isDirectionMatrix=False, shared=True)
+    directionMatrix = createMatrix(args, isDirectionMatrix=True, shared=True)
+
+    resultScore, resultDir = fillMatrixPool(antidiag, args, scoreMatrix, directionMatrix)
+    expectedScore, expectedDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert resultScore is scoreMatrix and resultDir is directionMatrix # filled in place, no copy
     assert np.array_equal(resultScore, expectedScore)
     assert np.array_equal(resultDir, expectedDir)
 
+def test_sharedMatrix():
+    matrix = sharedMatrix((3, 4), np.int32)
+    handle = sharedHandle(matrix)
+
+    assert handle[0] == "memory" and handle[2:] == ((3, 4), np.dtype(np.int32).str)
+    assert sharedHandle(matrix[1:]) is None and sharedHandle(matrix.T) is None and sharedHandle(np.zeros((3, 4))) is None
+    assert toShared(matrix) is matrix
+
+    attached = attachShared(handle)
+    attached[1, 2] = 7
+    assert matrix[1, 2] == 7 and matrix.sum() == 7
+
+@pytest.mark.parametrize("engine, workers", [("pool", 2), ("tiled", 1), ("tiled", 3)])
+def test_fillMatrix_mapped(engine, workers, tmp_path):
+    args = MockArgs(shape=(9, 12), seq1 = "ACTGAAATGCA", seq2 = "TAGGACTA")
+    args.workers, args.tileSize = workers, 3
+    antidiag = calculateAntidiagonals(args)
+    scoreMatrix = createMatrix(args, isDirectionMatrix=False, path=str(tmp_path / "score.dat"))
+    directionMatrix = createMatrix(args, isDirectionMatrix=True, path=str(tmp_path / "directions.dat"))
+
+    resultScore, resultDir = FILL_ENGINES[engine](antidiag, args, scoreMatrix, directionMatrix)
+    expectedScore, expectedDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert resultScore is scoreMatrix and resultDir is directionMatrix # filled in place in the files
+    assert sharedHandle(resultDir) == ("file", str(tmp_path / "directions.dat"), (9, 12), "|u1")
+    assert np.array_equal(np.fromfile(tmp_path / "score.dat", dtype=np.int32).reshape(args.shape), expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+    assert traceback(resultDir, args) == traceback(expectedDir, args)
+
+def interruptedTiledFill(args, tmp_path, monkeypatch, tilesBeforeStop):
+    """Runs the tiled engine on mapped matrices with checkpoints, stopping it after tilesBeforeStop tiles."""
+    monkeypatch.setattr(sys.modules["globalAlignment"], "CHECKPOINT_INTERVAL", 0) # a checkpoint after every band of tiles
+    fillTile = sys.modules["globalAlignment"].fillTile
+    filled = []
+    def stoppingFillTile(*fillArgs):
+        if len(filled) == tilesBeforeStop:
+            raise KeyboardInterrupt
+        filled.append(fillArgs[0])
+        fillTile(*fillArgs)
+    monkeypatch.setattr(sys.modules["globalAlignment"], "fillTile", stoppingFillTile)
+
+    args.checkpoint = str(tmp_path / "checkpoint.json")
+    scoreMatrix = createMatrix(args, isDirectionMatrix=False, path=str(tmp_path / "score.dat"))
+    directionMatrix = createMatrix(args, isDirectionMatrix=True, path=str(tmp_path / "directions.dat"))
+    with pytest.raises(KeyboardInterrupt):
+        fillMatrixTiled(None, args, scoreMatrix, directionMatrix)
+
+    monkeypatch.setattr(sys.modules["globalAlignment"], "fillTile", fillTile)
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_fillMatrixTiled_resume(workers, tmp_path, monkeypatch):
+    args = MockArgs(shape=(11, 14), seq1 = "ACTGAAATGCAGT", seq2 = "TAGGACTAGC")
+    args.workers, args.tileSize = 1, 3
+    interruptedTiledFill(args, tmp_path, monkeypatch, tilesBeforeStop=10) # 2 complete bands of 5 tiles
+
+    assert json.loads((tmp_path / "checkpoint.json").read_text())["done"] == [5, 5, 0, 0]
+
+    args.workers, args.tileSize, args.resume = workers, None, True # the tile size is read from the checkpoint
+    scoreMatrix = attachShared(("file", str(tmp_path / "score.dat"), args.shape, "<i4"))
+    directionMatrix = attachShared(("file", str(tmp_path / "directions.dat"), args.shape, "|u1"))
+    resultScore, resultDir = fillMatrixTiled(None, args, scoreMatrix, directionMatrix)
+
+    expectedScore, expectedDir = fillMatrixVectorized(None, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+    assert json.loads((tmp_path / "checkpoint.json").read_text())["done"] == [5, 5, 5, 5]
+
+def test_fillMatrixTiled_resumeOtherAlignment(tmp_path, monkeypatch):
+    args = MockArgs(shape=(11, 14), seq1 = "ACTGAAATGCAGT", seq2 = "TAGGACTAGC")
+    args.workers, args.tileSize = 1, 3
+    interruptedTiledFill(args, tmp_path, monkeypatch, tilesBeforeStop=7)
+
+    args.seq2, args.resume = "TAGGACTAGG", True
+    with pytest.raises(ValueError):
+        fillMatrixTiled(None, args, createMatrix(args, isDirectionMatrix=False, path=str(tmp_path / "score.dat")), createMatrix(args, isDirectionMatrix=True, path=str(tmp_path / "directions.dat")))
+
+def test_fillMatrixTiled_checkpointInMemory():
+    args = MockArgs(shape=(3, 3), seq1 = "AC", seq2 = "AC")
+    args.checkpoint = "checkpoint.json"
+    with pytest.raises(ValueError):
+        fillMatrixTiled(None, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+def test_fillMatrixPool_singleRow():
+    args = MockArgs(shape=(1, 4), seq1 = "ACT", seq2 = "")
+    antidiag = calculateAntidiagonals(args)
+
+    resultScore, resultDir = fillMatrixPool(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, np.array([[0, -1, -2, -3]], dtype=np.int32))
+    assert np.array_equal(directionArrows(resultDir), np.array([['', LEFT_DIR, LEFT_DIR, LEFT_DIR]], dtype='S9'))
+
+def test_chunkBounds():
+    chunks = [chunkBounds(10, workerId, 3) for workerId in range(3)]
+    assert chunks == [(0, 4), (4, 7), (7, 10)]
+    assert [chunkBounds(2, workerId, 4) for workerId in range(4)] == [(0, 1), (1, 2), (2, 2), (2, 2)]
+
+def test_countWorkers():
+    args = MockArgs()
+    args.workers = 0
+    with pytest.raises(ValueError):
+        countWorkers(args)
+
+    args.workers = None
+    assert countWorkers(args) >= 1
+
+
+# fillMatrixVectorized
+@pytest.mark.parametrize("seq1, seq2", [("A", "T"), ("A", "A"), ("AC", "TC"), ("ACTG", "TCGG"), ("ACTGAAATG", "TA"), ("C", "TCAC"), ("ACTGAC", "ACCTGA")])
+def test_fillMatrixVectorized_sameAsFillMatrix(seq1, seq2):
+    args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2)
+    antidiag = calculateAntidiagonals(args)
+
+    expectedScore, expectedDir = fillMatrix(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    resultScore, resultDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+
+def test_fillMatrixVectorized_random():
+    rng = np.random.default_rng(42)
+    seq1 = "".join(rng.choice(list("ACGT"), 37))
+    seq2 = "".join(rng.choice(list("ACGT"), 23))
+    args = MockArgs(shape=(24, 38), seq1 = seq1, seq2 = seq2, gapPenalty=-2, match=3, misMatch=-1)
+    args.workers = 1
+    antidiag = calculateAntidiagonals(args)
+
+    expectedScore, expectedDir = fillMatrixPool(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    resultScore, resultDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+
+def test_diagonalView():
+    matrix = np.arange(12).reshape(3, 4)
+    assert diagonalView(matrix, 0, 3, 3).tolist() == [3, 6, 9]
+    assert diagonalView(matrix, 1, 3, 2).tolist() == [7, 10]
+
+def test_interiorBounds():
+    assert interiorBounds((3, 4), 2) == (1, 2)
+    assert interiorBounds((3, 4), 4) == (2, 4)
+    assert interiorBounds((3, 4), 1) == (1, 1)
+
+# fillMatrixRows
+def test_fillMatrixRows_sameAsVectorized():
+    rng = np.random.default_rng(8)
+    seq1 = "".join(rng.choice(list("ACGT"), 31))
+    seq2 = "".join(rng.choice(list("ACGT"), 19))
+    args = MockArgs(shape=(20, 32), seq1 = seq1, seq2 = seq2, gapPenalty=-3, match=2, misMatch=-2)
+    antidiag = calculateAntidiagonals(args)
+
+    expectedScore, expectedDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    resultScore, resultDir = fillMatrixRows(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+
+
+
+# fillMatrixTiled, fillRowSegment is covered by these tests
+@pytest.mark.parametrize("workers, tileSize", [(1, 4), (2, 4), (3, 5), (4, 16), (2, None)])
+def test_fillMatrixTiled_sameAsVectorized(workers, tileSize):
+    rng = np.random.default_rng(7)
+    seq1 = "".join(rng.choice(list("ACGT"), 29))
+    seq2 = "".join(rng.choice(list("ACGT"), 17))
+    args = MockArgs(shape=(18, 30), seq1 = seq1, seq2 = seq2)
+    args.workers = workers
+    args.tileSize = tileSize
+    antidiag = calculateAntidiagonals(args)
+
+    expectedScore, expectedDir = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    resultScore, resultDir = fillMatrixTiled(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, expectedScore)
+    assert np.array_equal(resultDir, expectedDir)
+
+def test_fillMatrixTiled_singleColumn():
+    args = MockArgs(shape=(4, 1), seq1 = "", seq2 = "ACT")
+    antidiag = calculateAntidiagonals(args)
+
+    resultScore, resultDir = fillMatrixTiled(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert np.array_equal(resultScore, np.array([[0], [-1], [-2], [-3]], dtype=np.int32))
+
+@pytest.mark.parametrize("tileSize", [0, -3])
+def test_fillMatrixTiled_tileSizeNotPositive(tileSize):
+    args = MockArgs(shape=(10, 11), seq1 = "ACTGACTTGA", seq2 = "ACCTGAAGT")
+    args.workers, args.tileSize = 3, tileSize
+    with pytest.raises(ValueError):
+        fillMatrixTiled(None, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+def test_autoTileSize():
+    tileSize = autoTileSize(13)
+    assert 128 <= tileSize <= 2048
+    assert tileSize % 8 == 0
+
+def test_tileBounds():
+    assert tileBounds((10, 7), 4, (0, 0)) == (1, 5, 1, 5)
+    assert tileBounds((10, 7), 4, (2, 1)) == (9, 10, 5, 7)
+
 
 
 # getScore
@@ -329,6 +644,473 @@ def test_getScore_1():
     assert score == expectedScore
 
 
+# calculateScoreOnly
+@pytest.mark.parametrize("seq1, seq2", [("A", "T"), ("ACT", "TGGACC"), ("ACTGAAATG", "TA"), ("C", "TCAC")])
+def test_calculateScoreOnly_small(seq1, seq2):
+    args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2)
+    args.workers = 1
+    antidiag = calculateAntidiagonals(args)
+    scoreMatrix, _ = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert calculateScoreOnly(args) == getScore(args, scoreMatrix)
+
+@pytest.mark.parametrize("workers, tileSize", [(1, None), (2, 5), (3, 7), (4, 64)])
+def test_calculateScoreOnly_random(workers, tileSize):
+    rng = np.random.default_rng(3)
+    seq1 = "".join(rng.choice(list("ACGT"), 41))
+    seq2 = "".join(rng.choice(list("ACGT"), 26))
+    args = MockArgs(shape=(27, 42), seq1 = seq1, seq2 = seq2, gapPenalty=-2, match=2, misMatch=-1)
+    args.workers = workers
+    args.tileSize = tileSize
+    antidiag = calculateAntidiagonals(args)
+    scoreMatrix, _ = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    assert calculateScoreOnly(args) == getScore(args, scoreMatrix)
+
+@pytest.mark.parametrize("tileSize", [0, -3])
+def test_calculateScoreOnly_tileSizeNotPositive(tileSize):
+    args = MockArgs(seq1 = "ACTGACTTGA", seq2 = "ACCTGAAGT", gapPenalty=-2, match=1, misMatch=-1)
+    args.workers, args.tileSize = 3, tileSize
+    with pytest.raises(ValueError):
+        calculateScoreOnly(args)
+
+def test_lastScoreRow():
+    args = MockArgs(seq1 = "ACTG", seq2 = "TCGG")
+    lastRow, lastColumn = lastScoreRow(sequenceCodes(args.seq1), sequenceCodes(args.seq2), args)
+
+    assert lastRow.tolist() == [-4, -4, -2, -2, 0]
+    assert lastColumn.tolist() == [-2, -2, 0, 0]
+
+def test_main_scoreOnly(capsys):
+    sys.argv = ["globalAlignment.py", "ACTTGGA", "AG", "-gp", "-1", "-m", "1", "-mm", "-1", "--scoreOnly"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTTGGA\nSecond sequence: AG\nAlignment score: -3\n"
+    assert err == ''
+
+MATRIX_OPTIONS = [(["--band"], "--band"), (["--outOfCore", "matrices"], "--outOfCore"), (["--resume"], "--resume"), (["-e", "rows"], "--engine"),
+                  (["-ma", "1"], "--maxAlignments"), (["--countAlignments"], "--countAlignments"), (["--sampleAlignment"], "--sampleAlignment")]
+
+@pytest.mark.parametrize("options, name", MATRIX_OPTIONS)
+def test_main_scoreOnlyWithMatrixOptions(options, name, capsys):
+    sys.argv = ["globalAlignment.py", "ACTTGGA", "AG", "-gp", "-1", "-m", "1", "-mm", "-1", "--scoreOnly", *options]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert f"--scoreOnly keeps no matrix, it can't be used with {name}" in capsys.readouterr().err
+
+def test_main_maxAlignments(capsys):
+    sys.argv = ["globalAlignment.py", "AA", "AACAGAAGTCAA", "-gp", "-1", "-m", "1", "-mm", "-1", "--maxAlignments", "2"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert """└───┴───┴───┘
+AA----------
+||          
+AACAGAAGTCAA
+
+A--A--------
+|  |        
+AACAGAAGTCAA
+
+Alignment score: -8
+""" in out
+    assert err == ''
+
+def test_main_countAlignments(capsys):
+    sys.argv = ["globalAlignment.py", "AA", "AACAGAAGTCAA", "-gp", "-1", "-m", "1", "-mm", "-1", "--maxAlignments", "1", "--countAlignments"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out.endswith("Alignment score: -8\nOptimal alignments: 21\n")
+    assert err == ''
+
+def test_main_sampleAlignment(capsys):
+    sys.argv = ["globalAlignment.py", "ACA", "AGAAG", "-gp", "-1", "-m", "1", "-mm", "-1", "--sampleAlignment", "--seed", "1"]
+    main()
+
+    out, err = capsys.readouterr()
+    alignmentLines = out.split("└───┴───┴───┴───┘\n")[1].split("\n")
+
+    assert (alignmentLines[0], alignmentLines[2]) in [("ACA--", "AGAAG"), ("AC-A-", "AGAAG"), ("A-CA-", "AGAAG")]
+    assert alignmentLines[4] == "Alignment score: -1"
+    assert err == ''
+
+def test_main_seedWithoutSample(capsys):
+    sys.argv = ["globalAlignment.py", "ACA", "AGAAG", "-gp", "-1", "-m", "1", "-mm", "-1", "--seed", "1"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--seed needs --sampleAlignment" in capsys.readouterr().err
+
+def test_main_batch(capsys, tmp_path):
+    path = tmp_path / "pairs.tsv"
+    path.write_text("first\tACTA\tA\nsecond\tA\tA\n")
+    sys.argv = ["globalAlignment.py", "--batch", str(path), "-gp", "-1", "-m", "1", "-mm", "-1", "-w", "2"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == ">first\nACTA\n|   \nA---\n\nACTA\n   |\n---A\n\nAlignment score: -2\n>second\nA\n|\nA\n\nAlignment score: 1\n"
+    assert err == ''
+
+def test_main_batchMinScore(capsys, tmp_path):
+    path = tmp_path / "pairs.tsv"
+    path.write_text("first\tACTA\tA\nsecond\tA\tA\n")
+    sys.argv = ["globalAlignment.py", "--batch", str(path), "-gp", "-1", "-m", "1", "-mm", "-1", "-w", "1", "--minScore", "0"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == ">first\nAlignment score: below threshold\n>second\nA\n|\nA\n\nAlignment score: 1\n"
+    assert err == ''
+
+def test_main_minScoreWithoutBatch(capsys):
+    sys.argv = ["globalAlignment.py", "ACTA", "A", "-gp", "-1", "-m", "1", "-mm", "-1", "--minScore", "0"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--minScore needs --batch or --search" in capsys.readouterr().err
+
+def test_main_batchCache(capsys, tmp_path):
+    path = tmp_path / "pairs.tsv"
+    path.write_text("first\tACTA\tAA\nsecond\tACTA\tAA\n")
+    sys.argv = ["globalAlignment.py", "--batch", str(path), "-gp", "-1", "-m", "1", "-mm", "-1", "-w", "1",
+                "--cacheDir", str(tmp_path / "cache"), "--cacheStats"]
+    main()
+    first, err = capsys.readouterr()
+
+    assert first.count("Alignment score: 0") == 2
+    assert err == "Cache: hits 1, diskHits 0, misses 1, evictions 0, entries 1, bytes 129, diskEvictions 0, diskBytes 1284\n"
+
+    main()
+    second, err = capsys.readouterr()
+
+    assert second == first
+    assert err == "Cache: hits 1, diskHits 1, misses 0, evictions 0, entries 1, bytes 129, diskEvictions 0, diskBytes 1284\n"
+
+@pytest.mark.parametrize("flag", [["--cacheDir", "cache"], ["--cacheStats"]])
+def test_main_cacheWithoutBatch(flag, capsys):
+    sys.argv = ["globalAlignment.py", "ACTA", "AA", "-gp", "-1", "-m", "1", "-mm", "-1", *flag]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--cacheDir and --cacheStats need --batch" in capsys.readouterr().err
+
+def test_main_cacheDirBytesWithoutCacheDir(tmp_path, capsys):
+    sys.argv = ["globalAlignment.py", "--batch", str(tmp_path / "pairs.tsv"), "-gp", "-1", "-m", "1", "-mm", "-1", "--cacheDirBytes", "1000"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--cacheDirBytes needs --cacheDir" in capsys.readouterr().err
+
+def test_main_search(capsys, tmp_path):
+    path = tmp_path / "targets.fasta"
+    path.write_text(">far\nTTTT\n>exact\nACTG\n>close\nACG\n")
+    sys.argv = ["globalAlignment.py", "ACTG", "--search", str(path), "--top", "2", "-gp", "-1", "-m", "1", "-mm", "-1", "-w", "1"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == ">exact\nACTG\n||||\nACTG\n\nAlignment score: 4\n>close\nACTG\n|| |\nAC-G\n\nAlignment score: 2\n"
+    assert err == ''
+
+def test_main_searchTwoSequences(tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTG", "AC", "--search", str(tmp_path / "targets.fasta"), "-gp", "-1", "-m", "1", "-mm", "-1"]
+    with pytest.raises(SystemExit):
+        main()
+
+@pytest.mark.parametrize("options, message", [(["--top", "2"], "--top needs --search"), (["--unordered"], "--unordered needs --batch")])
+def test_main_optionWithoutMode(options, message, capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACG", "-gp", "-1", "-m", "1", "-mm", "-1", *options]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert message in capsys.readouterr().err
+
+def test_main_fasta(capsys, tmp_path):
+    path1 = tmp_path / "first.fasta"
+    path1.write_text(">chr1\nACTT\nGGA\n>ignored\nTTTT\n")
+    path2 = tmp_path / "second.fasta"
+    path2.write_text(">chr2\nag\n")
+    sys.argv = ["globalAlignment.py", "--fasta", str(path1), str(path2), "-gp", "-1", "-m", "1", "-mm", "-1", "--scoreOnly"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTTGGA\nSecond sequence: AG\nAlignment score: -3\n"
+    assert err == ''
+
+def test_main_missingSequence():
+    sys.argv = ["globalAlignment.py", "ACTG", "-gp", "-1", "-m", "1", "-mm", "-1"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+@pytest.mark.parametrize("workers", ["0", "-1"])
+def test_main_workersNotPositive(workers, capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "-w", workers]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "the number of workers must be positive" in capsys.readouterr().err
+
+@pytest.mark.parametrize("tileSize", ["0", "-3"])
+def test_main_tileSizeNotPositive(tileSize, capsys):
+    sys.argv = ["globalAlignment.py", "ACTGACTTGA", "ACCTGAAGT", "-gp", "-2", "-m", "1", "-mm", "-1", "-e", "tiled", "-w", "3", "-ts", tileSize]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "the side of the tiles must be positive" in capsys.readouterr().err
+
+def test_main_hirschberg(capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--hirschberg", "-w", "1"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTG\nSecond sequence: ACTC\nACTG\n|||·\nACTC\n\nAlignment score: 2\n"
+    assert err == ''
+
+@pytest.mark.parametrize("options, name", MATRIX_OPTIONS)
+def test_main_hirschbergWithMatrixOptions(options, name, capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--hirschberg", *options]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert f"--hirschberg keeps no matrix, it can't be used with {name}" in capsys.readouterr().err
+
+def test_main_outOfCore(capsys, tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--outOfCore", str(tmp_path), "-w", "1"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTG\nSecond sequence: ACTC\nACTG\n|||·\nACTC\n\nAlignment score: 2\n"
+    assert (tmp_path / "directionMatrix.dat").stat().st_size == 25
+    assert err == ''
+
+def test_main_outOfCoreUnitCostKeepsMappedMatrices(capsys, tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTGAC", "ACCTGA", "-gp", "-1", "-m", "0", "-mm", "-1", "-w", "1"]
+    main()
+    expected, _ = capsys.readouterr()
+
+    sys.argv += ["--outOfCore", str(tmp_path)]
+    main()
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTGAC\nSecond sequence: ACCTGA\n" + expected.split("┘\n", 1)[1] # the same alignments, without the matrices
+    assert {path.name for path in tmp_path.iterdir()} == {"scoreMatrix.dat", "directionMatrix.dat", "checkpoint.json"} # unit-cost scorings can be resumed too
+    assert err == ''
+
+def test_main_outOfCoreSampleAlignment(capsys, tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--outOfCore", str(tmp_path), "--sampleAlignment"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--sampleAlignment counts the paths of every cell in memory, it can't be used with --outOfCore" in capsys.readouterr().err
+
+def test_main_resume(capsys, tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTGAC", "ACCTGA", "-gp", "-1", "-m", "1", "-mm", "-1", "--outOfCore", str(tmp_path), "-w", "1", "-ts", "2"]
+    main()
+    expected, _ = capsys.readouterr()
+
+    sys.argv.append("--resume")
+    main()
+    out, err = capsys.readouterr()
+
+    assert out == expected
+    assert err == ''
+
+def test_main_resumePartial(capsys, tmp_path, monkeypatch):
+    options = ["ACTGAC", "ACCTGA", "-gp", "-1", "-m", "1", "-mm", "-1", "-w", "1", "-ts", "2"]
+    sys.argv = ["globalAlignment.py", *options, "--outOfCore", str(tmp_path / "complete")]
+    main()
+    expected, _ = capsys.readouterr()
+
+    monkeypatch.setattr(sys.modules["globalAlignment"], "CHECKPOINT_INTERVAL", 0) # a checkpoint after every band of tiles
+    fillTile = sys.modules["globalAlignment"].fillTile
+    filled = []
+    def stoppingFillTile(*fillArgs):
+        if len(filled) == 4: # the first band of 3 tiles and one tile of the second
+            raise KeyboardInterrupt
+        filled.append(fillArgs[0])
+        fillTile(*fillArgs)
+    monkeypatch.setattr(sys.modules["globalAlignment"], "fillTile", stoppingFillTile)
+    sys.argv = ["globalAlignment.py", *options, "--outOfCore", str(tmp_path / "partial")]
+    with pytest.raises(KeyboardInterrupt):
+        main()
+    capsys.readouterr()
+
+    assert json.loads((tmp_path / "partial" / "checkpoint.json").read_text())["done"] == [3, 0, 0]
+
+    resumed = []
+    def countingFillTile(*fillArgs):
+        resumed.append(fillArgs[0])
+        fillTile(*fillArgs)
+    monkeypatch.setattr(sys.modules["globalAlignment"], "fillTile", countingFillTile)
+    sys.argv.append("--resume")
+    main()
+    out, err = capsys.readouterr()
+
+    assert out == expected
+    assert err == ''
+    assert resumed == [(1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)] # only the tiles after the checkpoint are filled again
+    assert json.loads((tmp_path / "partial" / "checkpoint.json").read_text())["done"] == [3, 3, 3]
+
+@pytest.mark.parametrize("change", [["ACTGAC", "ACCTGT"], ["ACTGAC", "ACCTGA", "-m", "2"], ["ACTGAC", "ACCTG"]])
+def test_main_resumeOtherAlignment(change, capsys, tmp_path):
+    options = ["-gp", "-1", "-mm", "-1", "--outOfCore", str(tmp_path), "-w", "1", "-ts", "2"]
+    sys.argv = ["globalAlignment.py", "ACTGAC", "ACCTGA", "-m", "1", *options]
+    main()
+    capsys.readouterr()
+
+    sys.argv = ["globalAlignment.py", "-m", "1", *change, *options, "--resume"]
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "the checkpoint belongs to a different alignment" in capsys.readouterr().err
+
+def test_main_resumeMissingMatrix(capsys, tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTGAC", "ACCTGA", "-gp", "-1", "-m", "1", "-mm", "-1", "--outOfCore", str(tmp_path), "-w", "1", "-ts", "2"]
+    main()
+    capsys.readouterr()
+    (tmp_path / "directionMatrix.dat").unlink()
+
+    sys.argv.append("--resume")
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "directionMatrix.dat is missing" in capsys.readouterr().err
+
+def test_main_resumeWithoutCheckpoint(tmp_path):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "--outOfCore", str(tmp_path), "--resume", "-gp", "-1", "-m", "1", "-mm", "-1"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+def test_main_band(capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--band", "--bandWidth", "0"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert """[[0 -- -- -- --]
+ [-- 1 -- -- --]
+ [-- -- 2 -- --]
+ [-- -- -- 3 --]
+ [-- -- -- -- 2]]""" in out
+    assert out.endswith("ACTG\n|||·\nACTC\n\nAlignment score: 2\n")
+    assert err == ''
+
+def test_main_bandOutOfCore(capsys, tmp_path, monkeypatch):
+    monkeypatch.setattr(BandedMatrix, "masked", lambda self: pytest.fail("the banded matrix was expanded"))
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--band", "--outOfCore", str(tmp_path)]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out == "First sequence: ACTG\nSecond sequence: ACTC\nACTG\n|||·\nACTC\n\nAlignment score: 2\n"
+    assert err == ''
+
+@pytest.mark.parametrize("flag", ["--sampleAlignment", "--countAlignments"])
+def test_main_bandWithCounts(flag, capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--band", flag]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--band can't be used with --sampleAlignment or --countAlignments" in capsys.readouterr().err
+
+def test_main_bandWidthNegative(capsys):
+    sys.argv = ["globalAlignment.py", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1", "--band", "--bandWidth", "-1"]
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "the half-width of the band can't be negative" in capsys.readouterr().err
+
+def test_main_bandBeforeSequences(capsys):
+    sys.argv = ["globalAlignment.py", "-bd", "ACTG", "ACTC", "-gp", "-1", "-m", "1", "-mm", "-1"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out.startswith("First sequence: ACTG\nSecond sequence: ACTC\n")
+    assert out.endswith("Alignment score: 2\n")
+    assert err == ''
+
+
+
+# BandedMatrix, fillMatrixBanded, alignBanded
+def test_BandedMatrix():
+    matrix = BandedMatrix((3, 5), -1, 2, np.int64, -9)
+    matrix.data[1, 0] = 7 # cell (1, 0)
+    matrix.data[2, 3] = 8 # cell (2, 4)
+
+    assert matrix.columns(0) == (0, 3)
+    assert matrix.columns(2) == (1, 5)
+    assert matrix[1, 0] == 7 and matrix[2, 4] == 8
+    assert matrix[2, 0] == -9 and matrix[0, 4] == -9 and matrix[3, 0] == -9
+    assert np.asarray(matrix).tolist() == [[-9, -9, -9, -9, -9], [7, -9, -9, -9, -9], [-9, -9, -9, -9, 8]]
+    assert matrix.masked().mask.tolist() == [[False, False, False, True, True], [False, False, False, False, True], [True, False, False, False, False]]
+
+@pytest.mark.parametrize("seq1, seq2, bandWidth", [("ACTG", "ACTC", 0), ("ACTTGGA", "AG", 1), ("AA", "AACAGAAGTCAA", 2), ("GATTACA", "GCATGCA", 20)])
+def test_fillMatrixBanded_sameAsFullInBand(seq1, seq2, bandWidth):
+    args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2)
+    scoreMatrix, directionMatrix = fillMatrixRows(calculateAntidiagonals(args), args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    bandedScores, bandedDirections = fillMatrixBanded(args, bandWidth)
+
+    # the cells whose three neighbours are all in the band are the same as in the full matrices
+    for y in range(1, args.shape[0]):
+        first, stop = bandedScores.columns(y)
+        for x in range(max(1, first + 1), stop - 1):
+            assert bandedScores[y, x] == scoreMatrix[y, x]
+            assert bandedDirections[y, x] == directionMatrix[y, x]
+
+def test_alignBanded_random():
+    rng = np.random.default_rng(5)
+    for _ in range(50):
+        seq1 = "".join(rng.choice(list("ACGT"), rng.integers(1, 15)))
+        seq2 = "".join(rng.choice(list("ACGT"), rng.integers(1, 15)))
+        args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2, gapPenalty=-2, match=1, misMatch=-1)
+        scoreMatrix, directionMatrix = fillMatrixRows(calculateAntidiagonals(args), args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+        score, _, bandedDirections, _ = alignBanded(args, bandWidth=0)
+
+        assert score == getScore(args, scoreMatrix)
+        assert traceback(bandedDirections, args) == traceback(directionMatrix, args)
+        assert countAlignments(np.asarray(bandedDirections)) == countAlignments(directionMatrix)
+
+def test_alignBanded_widens():
+    args = MockArgs(shape=(13, 13), seq1 = "AAAACCCCGGGG", seq2 = "CCCCGGGGTTTT") # the best path is 4 diagonals away
+
+    score, scoreMatrix, _, bandWidth = alignBanded(args, bandWidth=1)
+
+    assert bandWidth > 1 and scoreMatrix.lowest == -bandWidth
+    assert score == calculateScoreOnly(args) == 0
+
+def test_alignBanded_invalidWidth():
+    args = MockArgs(shape=(3, 3), seq1 = "AC", seq2 = "AC")
+    with pytest.raises(ValueError):
+        alignBanded(args, bandWidth=-1)
+
+
 
 # traceback
 def test_traceback_2x2():
@@ -396,6 +1178,744 @@ def test_traceback_3x10():
 
     assert alignments == expectedAlignments
 
+# iterateAlignments
+def test_iterateAlignments_sameOrderAsTraceback():
+    args = MockArgs(shape=(13, 3), seq1 = "AA", seq2 = "AACAGAAGTCAA")
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    generator = iterateAlignments(directionMatrix, args)
+
+    assert next(generator) == ('AA----------', 'AACAGAAGTCAA')
+    assert [('AA----------', 'AACAGAAGTCAA'), *generator] == traceback(directionMatrix, args)
+
+@pytest.mark.parametrize("maxAlignments", [1, 2, 5, 21, 100])
+def test_iterateAlignments_max(maxAlignments):
+    args = MockArgs(shape=(13, 3), seq1 = "AA", seq2 = "AACAGAAGTCAA")
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    alignments = list(iterateAlignments(directionMatrix, args, maxAlignments))
+
+    assert alignments == traceback(directionMatrix, args)[:maxAlignments]
+    assert alignments == traceback(directionMatrix, args, maxAlignments)
+
+def test_iterateAlignments_invalidMax():
+    args = MockArgs(shape=(2, 2), seq1 = "A", seq2 = "A")
+    with pytest.raises(ValueError):
+        next(iterateAlignments(createMatrix(args, isDirectionMatrix=True), args, 0))
+
+def test_iterateAlignments_long():
+    rng = np.random.default_rng(2)
+    seq1 = "".join(rng.choice(list("ACGT"), 1500))
+    seq2 = seq1[:750] + seq1[751:]
+    args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2)
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    for aligned1, aligned2 in iterateAlignments(directionMatrix, args):
+        assert aligned1 == seq1
+        assert aligned2.replace('-', '') == seq2
+        assert aligned2.count('-') == 1
+
+def test_pathToAlignment():
+    args = MockArgs(seq1 = "ACTA", seq2 = "A")
+
+    assert pathToAlignment(0, 3, (DIAG_FLAG, 1, 4, None), args) == ("ACTA", "---A")
+    assert pathToAlignment(0, 2, (DIAG_FLAG, 1, 3, (LEFT_FLAG, 1, 4, None)), args) == ("ACTA", "--A-")
+    assert pathToAlignment(1, 0, None, MockArgs(seq1 = "", seq2 = "G")) == ("-", "G")
+
+
+# countAlignments, countMatrix, sampleAlignment
+@pytest.mark.parametrize("seq1, seq2", [("A", "A"), ("ACTA", "A"), ("C", "TCAC"), ("CGTAAACGT", "TA"), ("AA", "AACAGAAGTCAA"), ("ACA", "AGAAG"), ("AAAAAAAA", "AAAA")])
+def test_countAlignments(seq1, seq2):
+    args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2)
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    expected = len(traceback(directionMatrix, args))
+
+    assert countAlignments(directionMatrix) == expected
+    assert countMatrix(directionMatrix)[-1, -1] == expected
+
+def test_countAlignments_border():
+    args = MockArgs(shape=(1, 4), seq1 = "ACT", seq2 = "")
+    assert countAlignments(createMatrix(args, isDirectionMatrix=True)) == 1
+
+def test_countAlignments_bigNumbers():
+    # no match is possible and mismatches and gaps cost nothing: every path is optimal
+    args = MockArgs(shape=(61, 61), seq1 = "A" * 60, seq2 = "C" * 60, gapPenalty=0, match=1, misMatch=0)
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+    count = countAlignments(directionMatrix)
+
+    assert count > 2 ** 64
+    assert count == countMatrix(directionMatrix)[-1, -1]
+
+def test_sampleAlignment_uniform():
+    args = MockArgs(shape=(13, 3), seq1 = "AA", seq2 = "AACAGAAGTCAA")
+    antidiag = calculateAntidiagonals(args)
+    _, directionMatrix = fillMatrixVectorized(antidiag, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+    alignments = traceback(directionMatrix, args)
+    generator = random.Random(5)
+    counts = countMatrix(directionMatrix)
+
+    samples = [sampleAlignment(directionMatrix, args, generator, counts) for _ in range(2100)]
+
+    assert set(samples) == set(alignments)
+    assert all(50 < samples.count(alignment) < 150 for alignment in alignments) # 100 expected for each of the 21 alignments
+
+
+
+# hirschberg
+@pytest.mark.parametrize("workers, baseCells", [(1, 0), (1, 16), (3, 0), (2, HIRSCHBERG_BASE_CELLS)])
+def test_hirschberg_optimal(workers, baseCells):
+    rng = np.random.default_rng(11)
+    seq1 = "".join(rng.choice(list("ACGT"), 37))
+    seq2 = "".join(rng.choice(list("ACGT"), 29))
+    args = MockArgs(seq1 = seq1, seq2 = seq2, gapPenalty=-2, match=1, misMatch=-1)
+    args.workers = workers
+
+    aligned1, aligned2 = hirschberg(args, baseCells)
+
+    assert aligned1.replace('-', '') == seq1
+    assert aligned2.replace('-', '') == seq2
+    assert alignmentScore((aligned1, aligned2), args) == calculateScoreOnly(args)
+
+def test_hirschberg_sameAsTraceback():
+    args = MockArgs(seq1 = "ACTG", seq2 = "ACTC")
+    args.workers = 1
+    assert hirschberg(args, baseCells=0) == ('ACTG', 'ACTC')
+
+def test_alignSmall():
+    args = MockArgs()
+    assert alignSmall("C", "TCAC", args) in [('-C--', 'TCAC'), ('---C', 'TCAC')]
+    assert alignSmall("", "TC", args) == ('--', 'TC')
+
+def test_alignmentScore():
+    args = MockArgs(gapPenalty=-2, match=3, misMatch=-1)
+    assert alignmentScore(("G-ATTACA", "GCAT-GCA"), args) == 3 - 2 + 3 + 3 - 2 - 1 + 3 + 3
+
+
+# readFasta
+def test_readFasta(tmp_path):
+    path = tmp_path / "sequences.fasta"
+    path.write_bytes(b"\n>chr1 first\r\nACGT\r\nac gt\r\n\n>empty\n>chr2\nTTA")
+
+    records = list(readFasta(str(path)))
+
+    assert [(label, sequence.dtype, sequenceText(sequence)) for label, sequence in records] == [("chr1 first", np.uint8, "ACGTACGT"), ("empty", np.uint8, ""), ("chr2", np.uint8, "TTA")]
+
+def test_readFasta_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules["globalAlignment"], "FASTA_BLOCK_SIZE", 3) # lines split across blocks
+    path = tmp_path / "sequences.fasta"
+    path.write_text(">long\nACGTA\nCGTAC\nG\n")
+
+    assert [sequenceText(sequence) for _, sequence in readFasta(str(path))] == ["ACGTACGTACG"]
+
+def test_readFasta_notFasta(tmp_path):
+    path = tmp_path / "sequences.txt"
+    path.write_text("ACGT\n")
+
+    with pytest.raises(ValueError):
+        list(readFasta(str(path)))
+
+def test_readFasta_closedEarly(tmp_path):
+    path = tmp_path / "sequences.fasta"
+    path.write_text(">a\nAC\n>b\nGT\n")
+
+    records = readFasta(str(path))
+    label, sequence = next(records)
+    records.close() # the file map is released even if the records are not all read
+
+    assert (label, sequenceText(sequence)) == ("a", "AC")
+
+def test_checkSequence_array():
+    assert sequenceText(checkSequence(np.frombuffer(b"ACGT", dtype=np.uint8), label = "first sequence")) == "ACGT"
+
+    with pytest.raises(NucleotideException):
+        checkSequence(np.frombuffer(b"ACNT", dtype=np.uint8), label = "first sequence")
+
+    with pytest.raises(EmptySequenceException):
+        checkSequence(np.zeros(0, dtype=np.uint8), label = "first sequence")
+
+def test_alignSequences_arrays():
+    assert alignSequences(np.frombuffer(b"ACTA", dtype=np.uint8), np.frombuffer(b"A", dtype=np.uint8), MockArgs()) == (-2, [('ACTA', 'A---'), ('ACTA', '---A')])
+
+
+# isUnitCost, bitParallelScoreRow, BitParallelDirections
+def test_isUnitCost():
+    assert isUnitCost(MockArgs(gapPenalty=-1, match=0, misMatch=-1))
+    assert isUnitCost(MockArgs(gapPenalty=-2, match=2, misMatch=-1))
+    assert not isUnitCost(MockArgs(gapPenalty=-1, match=1, misMatch=-1))
+    assert not isUnitCost(MockArgs(gapPenalty=0, match=0, misMatch=0))
+
+@pytest.mark.parametrize("length1, length2", [(1, 1), (13, 7), (70, 130), (200, 64)])
+def test_bitParallelScoreRow_sameAsLastScoreRow(length1, length2):
+    rng = np.random.default_rng(length1)
+    codes1, codes2 = sequenceCodes("".join(rng.choice(list("ACGT"), length1))), sequenceCodes("".join(rng.choice(list("ACGT"), length2)))
+    args = MockArgs(gapPenalty=-2, match=2, misMatch=-1)
+
+    assert bitParallelScoreRow(codes1, codes2, args).tolist() == lastScoreRow(codes1, codes2, args)[0].tolist()
+
+def test_BitParallelDirections_sameAsFillMatrix():
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        seq1 = "".join(rng.choice(list("ACGT"), rng.integers(1, 12)))
+        seq2 = "".join(rng.choice(list("ACGT"), rng.integers(1, 12)))
+        args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2, gapPenalty=-1, match=0, misMatch=-1)
+        scoreMatrix, directionMatrix = fillMatrixRows(calculateAntidiagonals(args), args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))
+
+        bitDirections = BitParallelDirections(args)
+
+        assert bitDirections.score(args) == getScore(args, scoreMatrix)
+        assert [[bitDirections[y, x] for x in range(args.shape[1])] for y in range(args.shape[0])] == directionMatrix.tolist()
+
+def test_calculateScoreOnly_unitCost():
+    args = MockArgs(seq1 = "ACTTGGA", seq2 = "AG", gapPenalty=-1, match=0, misMatch=-1)
+    args.workers = 1
+    assert calculateScoreOnly(args) == -5
+
+def test_hirschberg_unitCost():
+    args = MockArgs(seq1 = "GATTACAGATTACA", seq2 = "TTACAGATTACAGA", gapPenalty=-1, match=0, misMatch=-1)
+    args.workers = 1
+
+    alignment = hirschberg(args, baseCells=0)
+
+    assert alignmentScore(alignment, args) == -4
+
+
+
+# alignSequences, readPairs, alignBatch
+def test_alignSequences():
+    assert alignSequences("ACTA", "A", MockArgs()) == (-2, [('ACTA', 'A---'), ('ACTA', '---A')])
+
+    args = MockArgs()
+    args.maxAlignments = 1
+    assert alignSequences("ACTA", "A", args) == (-2, [('ACTA', 'A---')])
+
+def test_alignSequences_minScore():
+    args = MockArgs()
+    args.minScore = -2
+    assert alignSequences("ACTA", "A", args) == (-2, [('ACTA', 'A---'), ('ACTA', '---A')])
+
+    args.minScore = -1
+    assert alignSequences("ACTA", "A", args) == (None, [])
+
+    args = MockArgs(gapPenalty=-1, match=0, misMatch=-1)
+    args.minScore = -2
+    assert alignSequences("ACTA", "A", args) == (None, [])
+    args.minScore = -3
+    assert alignSequences("ACTA", "A", args) == (-3, [('ACTA', 'A---'), ('ACTA', '---A')])
+
+def test_fillMatrixRowsAbove_stopsEarly():
+    args = MockArgs(shape=(41, 41), seq1 = "A" * 40, seq2 = "C" * 40)
+    scoreMatrix, directionMatrix = createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True)
+
+    assert not fillMatrixRowsAbove(args, 0, scoreMatrix, directionMatrix)
+    assert not directionMatrix[-1, 1:].any() # the last row was never reached
+
+def test_fillMatrixRowsAbove_random():
+    rng = np.random.default_rng(9)
+    for _ in range(40):
+        seq1 = "".join(rng.choice(list("ACGT"), rng.integers(1, 15)))
+        seq2 = "".join(rng.choice(list("ACGT"), rng.integers(1, 15)))
+        args = MockArgs(shape=(len(seq2) + 1, len(seq1) + 1), seq1 = seq1, seq2 = seq2, gapPenalty=-2, match=2, misMatch=-1)
+        score = getScore(args, fillMatrixRows(None, args, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True))[0])
+
+        for minScore in (score - 1, score, score + 1):
+            assert fillMatrixRowsAbove(args, minScore, createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True)) == (score >= minScore)
+
+def test_alignSequences_unitCost():
+    args = MockArgs(gapPenalty=-1, match=0, misMatch=-1)
+    assert alignSequences("ACTA", "A", args) == (-3, [('ACTA', 'A---'), ('ACTA', '---A')])
+
+def test_bitParallelColumnsAbove_stopsEarly(monkeypatch):
+    computed = []
+    bitParallelColumns = sys.modules["globalAlignment"].bitParallelColumns
+    monkeypatch.setattr(sys.modules["globalAlignment"], "bitParallelColumns", lambda *columnArgs: (computed.append(x) or x for x in bitParallelColumns(*columnArgs)))
+    args = MockArgs(gapPenalty=-1, match=0, misMatch=-1)
+
+    assert bitParallelColumnsAbove(sequenceCodes("A" * 300), sequenceCodes("C" * 300), args, -100) is None
+    assert len(computed) == 129 # stopped at the third bound, on column 128
+
+@pytest.mark.parametrize("boundColumns", [1, 3])
+def test_bitParallelColumnsAbove_random(boundColumns, monkeypatch):
+    monkeypatch.setattr(sys.modules["globalAlignment"], "BIT_PARALLEL_BOUND_COLUMNS", boundColumns)
+    rng = np.random.default_rng(5)
+    args = MockArgs(gapPenalty=-2, match=2, misMatch=-1)
+    for _ in range(40):
+        codes1, codes2 = sequenceCodes("".join(rng.choice(list("ACGT"), rng.integers(1, 15)))), sequenceCodes("".join(rng.choice(list("ACGT"), rng.integers(1, 15))))
+        columns = list(bitParallelColumns(codes1, codes2))
+        score = int(bitParallelScoreRow(codes1, codes2, args)[-1])
+
+        for minScore in (score - 1, score, score + 1):
+            result = bitParallelColumnsAbove(codes1, codes2, args, minScore)
+            assert result == columns if score >= minScore else result in (None, columns)
+
+def test_readPairs_fasta(tmp_path):
+    path = tmp_path / "pairs.fasta"
+    path.write_text(">read1\nACGT\nAC\n>ref1\nACG\n>read2\nTT\n\n>ref2\nT\n")
+
+    assert [(label, sequenceText(seq1), sequenceText(seq2)) for label, seq1, seq2 in readPairs(str(path))] == [("read1/ref1", "ACGTAC", "ACG"), ("read2/ref2", "TT", "T")]
+
+def test_readPairs_fastaOdd(tmp_path):
+    path = tmp_path / "pairs.fasta"
+    path.write_text(">read1\nACGT\n")
+
+    with pytest.raises(ValueError):
+        list(readPairs(str(path)))
+
+def test_readPairs_tsv(tmp_path):
+    path = tmp_path / "pairs.tsv"
+    path.write_text("# comment\nACGT\tACG\n\nfirst\tTT\tT\n")
+
+    assert list(readPairs(str(path))) == [("pair 2", "ACGT", "ACG"), ("first", "TT", "T")]
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_alignBatch_ordered(workers, monkeypatch):
+    monkeypatch.setattr(sys.modules["globalAlignment"], "BATCH_CHUNK_CELLS", 20) # several chunks even for short pairs
+    pairs = [("a", "A", "A"), ("b", "ACTA", "a"), ("c", "C", "TCAC"), ("d", "CGTAAACGT", "TA")]
+    args = MockArgs()
+    args.workers = workers
+
+    results = list(alignBatch(pairs, args))
+
+    assert [result[:3] for result in results] == [(0, "a", 1), (1, "b", -2), (2, "c", -2), (3, "d", -5)]
+    assert results[1][3] == [('ACTA', 'A---'), ('ACTA', '---A')]
+
+def test_alignBatch_unordered():
+    pairs = [("short", "A", "A"), ("long", "CGTAAACGT", "TA")]
+    args = MockArgs()
+    args.workers = 1
+
+    results = list(alignBatch(pairs, args, ordered=False))
+
+    assert [result[1] for result in results] == ["long", "short"] # the longest pairs start first
+
+def test_AlignmentCache_encode():
+    alignment = ("AC-TG", "A-GT-")
+    moves = AlignmentCache.encode(alignment)
+
+    assert unpackSequence(moves).tolist() == [0, 2, 1, 0, 2]
+    assert AlignmentCache.decode(moves, "ACTG", "AGT") == alignment
+
+def test_AlignmentCache_key():
+    args = MockArgs()
+
+    assert AlignmentCache.key("ACG", "AC", args) == AlignmentCache.key(np.frombuffer(b"ACG", dtype=np.uint8), "AC", args)
+    assert AlignmentCache.key("ACG", "AC", args) != AlignmentCache.key("AC", "GAC", args)
+    assert AlignmentCache.key("ACG", "AC", args) != AlignmentCache.key("ACG", "AC", MockArgs(gapPenalty=-2))
+
+def test_AlignmentCache_align(monkeypatch):
+    cache = AlignmentCache()
+    args = MockArgs()
+    expected = alignSequences("ACTTG", "ATG", args)
+
+    assert cache.align("ACTTG", "ATG", args) == expected
+    monkeypatch.setattr(sys.modules["globalAlignment"], "alignSequences", None) # the second request must not align again
+    assert cache.align("ACTTG", "ATG", args) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_AlignmentCache_evicts():
+    args = MockArgs()
+    cache = AlignmentCache(maxBytes = 2 * (RESULT_ENTRY_BYTES + 1))
+    for seq in ("A", "C", "G"):
+        cache.align(seq, seq, args)
+
+    assert cache.evictions == 1
+    assert cache.size <= cache.maxBytes
+    assert cache.get(cache.key("A", "A", args), "A", "A") is None
+    assert cache.get(cache.key("G", "G", args), "G", "G") == (1, [("G", "G")])
+
+def test_AlignmentCache_disk(tmp_path):
+    args = MockArgs()
+    args.minScore = 5
+    AlignmentCache(directory = str(tmp_path)).align("ACG", "TTT", args)
+    cache = AlignmentCache(directory = str(tmp_path))
+
+    assert cache.get(cache.key("ACG", "TTT", args), "ACG", "TTT") == (None, [])
+    assert cache.diskHits == 1
+
+def test_AlignmentCache_diskEvicts(tmp_path):
+    args = MockArgs()
+    cache = AlignmentCache(directory = str(tmp_path))
+    cache.align("A", "A", args)
+    fileBytes = cache.diskSize
+
+    cache = AlignmentCache(maxBytes = 0, directory = str(tmp_path), maxDiskBytes = 3 * fileBytes)
+    assert cache.diskSize == fileBytes # the files already in the directory are counted
+    path = lambda seq: tmp_path / (cache.key(seq, seq, args) + ".npz")
+    cache.align("C", "C", args)
+    cache.align("G", "G", args)
+    for seq, modified in (("A", 1), ("C", 2), ("G", 3)):
+        os.utime(path(seq), (modified, modified))
+    cache.align("A", "A", args) # a disk hit, so "A" is now the most recently used
+    cache.align("T", "T", args)
+
+    assert cache.diskEvictions == 2 # down to three quarters of the bound
+    assert sorted(tmp_path.iterdir()) == sorted(path(seq) for seq in ("A", "T"))
+    assert cache.diskSize == 2 * fileBytes
+
+def test_alignBatch_cache():
+    args = MockArgs()
+    args.workers = 1
+    cache = AlignmentCache()
+    pairs = [("a", "ACTA", "AA"), ("b", "GG", "G"), ("c", "ACTA", "AA")]
+    expected = [(0, "a", *alignSequences("ACTA", "AA", args)), (1, "b", *alignSequences("GG", "G", args)),
+                (2, "c", *alignSequences("ACTA", "AA", args))]
+
+    assert list(alignBatch(pairs, args, cache = cache)) == expected
+    assert (cache.hits, cache.misses) == (1, 2) # the repeated pair is a hit
+    assert list(alignBatch(pairs, args, cache = cache)) == expected
+    assert (cache.hits, cache.misses) == (4, 2)
+
+def test_fillMatricesBatched():
+    pairs = [("ACTGA", "AG"), ("TT", "GATTC"), ("A", "A")]
+    codes1 = np.full((3, 5), INVALID_CODE, dtype=np.uint8)
+    codes2 = np.full((3, 5), INVALID_CODE, dtype=np.uint8)
+    for pair, (seq1, seq2) in enumerate(pairs):
+        codes1[pair, :len(seq1)], codes2[pair, :len(seq2)] = sequenceCodes(seq1), sequenceCodes(seq2)
+
+    scoreMatrices, directionMatrices, reached = fillMatricesBatched(codes1, codes2, MockArgs())
+
+    assert reached.all()
+    assert scoreMatrices.shape == directionMatrices.shape == (3, 6, 6)
+    for pair, (seq1, seq2) in enumerate(pairs):
+        scoreMatrix, directionMatrix = fullMatrices(seq1, seq2, MockArgs())
+        assert (scoreMatrices[pair, :len(seq2) + 1, :len(seq1) + 1] == scoreMatrix).all()
+        assert (directionMatrices[pair, :len(seq2) + 1, :len(seq1) + 1] == directionMatrix).all()
+
+def test_fillMatricesBatched_minScore():
+    pairs = [("ACTGACTG", "ACTGACTG"), ("AAAAAAAA", "CCCCCCCC"), ("ACGT", "TTTTTTTT")]
+    codes1 = np.full((3, 8), INVALID_CODE, dtype=np.uint8)
+    codes2 = np.full((3, 8), INVALID_CODE, dtype=np.uint8)
+    for pair, (seq1, seq2) in enumerate(pairs):
+        codes1[pair, :len(seq1)], codes2[pair, :len(seq2)] = sequenceCodes(seq1), sequenceCodes(seq2)
+
+    scoreMatrices, directionMatrices, reached = fillMatricesBatched(codes1, codes2, MockArgs(), minScore = 8)
+    assert reached.tolist() == [True, False, False]
+    assert scoreMatrices[0, 8, 8] == 8
+
+    _, directionMatrices, reached = fillMatricesBatched(codes1[1:], codes2[1:], MockArgs(), minScore = 8)
+    assert not reached.any()
+    assert not directionMatrices[:, 2:, 1:].any() # every pair is rejected after the first row, the next ones are never filled
+
+@pytest.mark.parametrize("minScore", [None, -3, 4])
+def test_alignPairsBatched(minScore):
+    generator = random.Random(6)
+    args = MockArgs(gapPenalty=-2, match=3, misMatch=-1)
+    args.maxAlignments, args.minScore = 5, minScore
+    pairs = [("".join(generator.choices("ACGT", k=generator.randint(1, 12))), "".join(generator.choices("ACGT", k=generator.randint(1, 12)))) for _ in range(30)]
+
+    assert alignPairsBatched(pairs, args) == [alignSequences(seq1, seq2, args) for seq1, seq2 in pairs]
+
+def test_alignPairsBatched_unitCost(monkeypatch):
+    monkeypatch.setattr(sys.modules["globalAlignment"], "fillMatricesBatched", lambda *fillArgs: pytest.fail("unit-cost pairs were filled with integers"))
+    args = MockArgs(gapPenalty=-1, match=0, misMatch=-1)
+    args.minScore = -2
+    pairs = [("ACGTA", "ACTA"), ("ACGTA", "TTTT"), ("AC", "AC")]
+
+    assert alignPairsBatched(pairs, args) == [alignSequences(seq1, seq2, args) for seq1, seq2 in pairs]
+
+def test_alignChunk_groups(monkeypatch):
+    batched = []
+    monkeypatch.setattr(sys.modules["globalAlignment"], "alignPairsBatched", lambda pairs, args: batched.append(pairs) or [alignSequences(*pair, args) for pair in pairs])
+    initBatchWorker(MockArgs())
+    chunk = [(0, "a", "ACGT" * 10, "ACG"), (1, "b", "ACG", "AC"), (2, "c", "AC", "ACGT")]
+
+    results = alignChunk(chunk)
+
+    assert batched == [[("ACG", "AC"), ("AC", "ACGT")]] # the long pair has a bucket of its own
+    assert [result[0] for result in results] == [0, 1, 2]
+    assert results[1][2:] == alignSequences("ACG", "AC", MockArgs())
+
+def test_alignBatch_bucketsBeforeChunks(monkeypatch):
+    monkeypatch.setattr(sys.modules["globalAlignment"], "BATCH_CHUNK_CELLS", 50) # a single short pair per chunk
+    monkeypatch.setattr(sys.modules["globalAlignment"], "BATCHED_CHUNK_CELLS", 200)
+    batched = []
+    monkeypatch.setattr(sys.modules["globalAlignment"], "alignPairsBatched", lambda pairs, args: batched.append(len(pairs)) or [alignSequences(*pair, args) for pair in pairs])
+    generator = random.Random(4)
+    pairs = [(f"p{index}", "".join(generator.choices("ACGT", k=5)), "".join(generator.choices("ACGT", k=5 if index % 3 else 40))) for index in range(12)]
+    args = MockArgs()
+    args.workers = 1
+
+    results = list(alignBatch(pairs, args))
+
+    assert sorted(batched) == [3, 5] # the 8 short pairs of the whole input fill workspaces of up to 200 cells, the long ones are aligned alone
+    assert [result[2:] for result in results] == [alignSequences(seq1, seq2, args) for _, seq1, seq2 in pairs]
+
+def test_alignBatch_invalid():
+    with pytest.raises(NucleotideException):
+        list(alignBatch([("bad", "ACXT", "A")], MockArgs()))
+
+
+
+# QueryProfile, searchDatabase
+@pytest.mark.parametrize("match, misMatch, gapPenalty", [(1, -1, -1), (2, -1, -2)]) # the second one is unit-cost
+def test_QueryProfile_score(match, misMatch, gapPenalty):
+    generator = random.Random(5)
+    args = MockArgs(gapPenalty=gapPenalty, match=match, misMatch=misMatch)
+    query = "".join(generator.choices("ACGT", k=20))
+    profile = QueryProfile(query, args)
+
+    assert profile.unitCost == isUnitCost(args)
+    for _ in range(10):
+        target = "".join(generator.choices("ACGT", k=generator.randint(1, 30)))
+        assert profile.score(sequenceCodes(target)) == alignSequences(query, target, args)[0]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_searchDatabase(workers):
+    args = MockArgs()
+    args.workers = workers
+    targets = [("far", "TTTT"), ("exact", "ACTG"), ("close", "ACG"), ("tie", "ACTC")]
+
+    hits = searchDatabase("actg", targets, args, top=3)
+
+    assert [hit[:3] for hit in hits] == [(1, "exact", 4), (2, "close", 2), (3, "tie", 2)] # ties in input order
+    assert hits[0][3] == [("ACTG", "ACTG")]
+
+def test_searchDatabase_minScore():
+    args = MockArgs()
+    args.minScore = 3
+
+    assert [hit[1] for hit in searchDatabase("ACTG", [("far", "TTTT"), ("exact", "ACTG"), ("close", "ACG")], args)] == ["exact"]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_searchDatabase_invalid(workers):
+    args = MockArgs()
+    args.workers = workers
+    with pytest.raises(NucleotideException):
+        searchDatabase("ACTG", [("good", "ACG"), ("bad", "AXGT")], args)
+    with pytest.raises(ValueError):
+        searchDatabase("ACTG", [("good", "ACG")], MockArgs(), top=0)
+
+def test_exceptions_pickle():
+    for exception in (NucleotideException("X", "AXGT", "bad", 1), EmptyLabelException("ACGT"), EmptySequenceException("first sequence")):
+        copy = pickle.loads(pickle.dumps(exception))
+        assert type(copy) is type(exception) and str(copy) == str(exception) and copy.__dict__ == exception.__dict__
+
+
+# fillBorderBlock, IncrementalAligner
+def fullMatrices(seq1, seq2, args):
+    args.seq1, args.seq2, args.shape = seq1, seq2, (len(seq2) + 1, len(seq1) + 1)
+    scoreMatrix, directionMatrix = createMatrix(args, isDirectionMatrix=False), createMatrix(args, isDirectionMatrix=True)
+    return fillMatrixRows(None, args, scoreMatrix, directionMatrix)
+
+@pytest.mark.parametrize("seq1, seq2", [("ACTGA", "AG"), ("AG", "ACTGA")])
+def test_fillBorderBlock(seq1, seq2):
+    args = MockArgs()
+    scoreMatrix, directionMatrix = fullMatrices(seq1, seq2, args)
+
+    directions, lastRow, lastColumn = fillBorderBlock(sequenceCodes(seq1), sequenceCodes(seq2), args, scoreMatrix[0], scoreMatrix[1:, 0])
+
+    assert (directions == directionMatrix[1:, 1:]).all()
+    assert lastRow.tolist() == scoreMatrix[-1].tolist()
+    assert lastColumn.tolist() == scoreMatrix[1:, -1].tolist()
+
+def test_IncrementalAligner_extend():
+    aligner = IncrementalAligner("ACT", "", MockArgs())
+
+    assert aligner.score == -3
+    assert aligner.extend(suffix2 = "AC") == 1
+    assert aligner.extend("G", "TTG") == 3
+    assert aligner.alignments() == [("ACT-G", "ACTTG"), ("AC-TG", "ACTTG")]
+
+def test_IncrementalAligner_sameAsFull():
+    generator = random.Random(3)
+    args = MockArgs(gapPenalty=-2, match=2, misMatch=-1)
+    aligner = IncrementalAligner("", "", args)
+    for _ in range(20):
+        aligner.extend("".join(generator.choices("ACGT", k=generator.randint(0, 3))), "".join(generator.choices("ACGT", k=generator.randint(0, 3))))
+
+        scoreMatrix, directionMatrix = fullMatrices(aligner.args.seq1, aligner.args.seq2, args)
+
+        assert aligner.score == scoreMatrix[-1, -1]
+        assert (aligner.directionMatrix == directionMatrix).all()
+
+def test_IncrementalAligner_dropsDirections():
+    args = MockArgs()
+    args.workers = 1
+    aligner = IncrementalAligner("ACTG", "ACG", args, maxCells=30)
+
+    assert aligner.directionMatrix is not None
+    aligner.extend("TA", "TA")
+
+    assert aligner.directionMatrix is None
+    assert aligner.score == getScore(aligner.args, fullMatrices("ACTGTA", "ACGTA", MockArgs())[0])
+    assert aligner.alignments() == [hirschberg(aligner.args)]
+
+def test_IncrementalAligner_invalid():
+    aligner = IncrementalAligner("A", "A", MockArgs())
+
+    with pytest.raises(NucleotideException):
+        aligner.extend("AX")
+    assert aligner.args.seq1 == "A"
+
+
+# benchmark
+@pytest.mark.parametrize("kind", benchmark.KINDS)
+def test_makePair(kind):
+    seq1, seq2 = benchmark.makePair(kind, 200, seed=1)
+
+    assert (seq1, seq2) == benchmark.makePair(kind, 200, seed=1)
+    assert (seq1, seq2) != benchmark.makePair(kind, 200, seed=2)
+    assert len(seq1) == 200
+    assert checkSequence(seq2, "second sequence") == seq2
+
+def test_makePair_kinds():
+    seq1, seq2 = benchmark.makePair("similar", 1000, seed=0)
+    assert abs(len(seq1) - len(seq2)) <= 10
+    seq1, seq2 = benchmark.makePair("repetitive", 100, seed=0)
+    assert len(seq2) == 90 and seq1.startswith(seq2)
+    with pytest.raises(ValueError):
+        benchmark.makePair("unknown", 10, seed=0)
+
+def test_isMeasured():
+    assert benchmark.isMeasured("random", 10, "process", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+    assert not benchmark.isMeasured("random", 100, "process", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+    assert not benchmark.isMeasured("random", 10_000, "rows", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+    assert benchmark.isMeasured("random", 10_000, "scoreOnly", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+    assert benchmark.isMeasured("similar", 100_000, "banded", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+    assert not benchmark.isMeasured("random", 100_000, "banded", benchmark.FULL_MAX_CELLS, benchmark.LINEAR_MAX_CELLS)
+
+@pytest.mark.parametrize("mode", ["rows", "scoreOnly", "banded"])
+def test_runMode(mode):
+    records = benchmark.runMode("similar", 50, 0, mode, {"match": 1, "misMatch": -1, "gapPenalty": -2, "workers": 1})
+
+    assert records
+    for record in records:
+        assert record["wall"] >= 0 and record["peakRss"] > 0 and record["peakRssIncrease"] >= 0
+    if mode == "rows":
+        assert [record["phase"] for record in records] == ["createMatrix", "calculateAntidiagonals", "fillMatrix", "traceback", "countAlignments"]
+        assert records[2]["cells"] == 51 * len(benchmark.makePair("similar", 50, 0)[1]) + 51
+
+def test_runBenchmarks():
+    results = benchmark.runBenchmarks([10], ["random"], ["rows", "scoreOnly"], {"match": 1, "misMatch": -1, "gapPenalty": -2, "workers": 1})
+
+    assert results["meta"]["seed"] == 0
+    assert [(record["case"], record["mode"], record["phase"]) for record in results["results"]] == [
+        ("random-10", "rows", phase) for phase in ("createMatrix", "calculateAntidiagonals", "fillMatrix", "traceback", "countAlignments")
+    ] + [("random-10", "scoreOnly", "calculateScoreOnly")]
+    json.dumps(results)
+
+def test_compareResults():
+    record = {"case": "random-10", "mode": "rows", "phase": "fillMatrix", "peakRssIncrease": 1000}
+    old = {"results": [{**record, "wall": 1.0}, {**record, "phase": "traceback", "wall": 1.0}, {**record, "mode": "pool", "wall": 1.0}]}
+    new = {"results": [{**record, "wall": 1.5}, {**record, "phase": "traceback", "wall": 0.5}, {**record, "mode": "tiled", "wall": 1.0}]}
+
+    statuses = [(comparison["mode"], comparison["phase"], comparison["status"]) for comparison in benchmark.compareResults(old, new)]
+
+    assert statuses == [("rows", "fillMatrix", "regression"), ("rows", "traceback", "faster"), ("pool", "fillMatrix", "missing"), ("tiled", "fillMatrix", "new")]
+    assert benchmark.compareResults(old, new, threshold=1.0)[0]["status"] == "ok"
+
+def test_compareResults_failedMode():
+    record = {"case": "random-10", "peakRssIncrease": 1000, "wall": 1.0}
+    old = {"results": [{**record, "mode": "rows", "phase": "fillMatrix"}, {**record, "mode": "rows", "phase": "traceback"},
+                       {"case": "random-10", "mode": "pool", "error": "MemoryError: "}]}
+    new = {"results": [{"case": "random-10", "mode": "rows", "error": "the process exited with code -9"},
+                       {**record, "mode": "pool", "phase": "fillMatrix"},
+                       {"case": "random-10", "mode": "tiled", "error": "ValueError: "}]}
+
+    comparisons = benchmark.compareResults(old, new)
+
+    assert [(comparison["mode"], comparison["phase"], comparison["status"]) for comparison in comparisons] == [
+        ("rows", None, "regression"), ("pool", "fillMatrix", "new"), ("tiled", None, "error")]
+    assert comparisons[0]["old"] == 2.0
+    assert comparisons[0]["error"] == "the process exited with code -9"
+
+def test_compareResults_memory():
+    record = {"case": "random-10", "mode": "rows", "wall": 1.0}
+    old = {"results": [{**record, "phase": "createMatrix", "peakRss": 10 << 20, "peakRssIncrease": 8 << 20},
+                       {**record, "phase": "fillMatrix", "peakRss": 11 << 20, "peakRssIncrease": 1 << 20}]}
+    new = {"results": [{**record, "phase": "createMatrix", "peakRss": 20 << 20, "peakRssIncrease": 18 << 20},
+                       {**record, "phase": "fillMatrix", "peakRss": 21 << 20, "peakRssIncrease": 1 << 20}]}
+
+    comparisons = benchmark.compareResults(old, new)
+
+    assert [comparison["status"] for comparison in comparisons] == ["regression", "ok"] # the later phase isn't flagged
+    assert comparisons[0]["peakRssIncrease"] == (8 << 20, 18 << 20)
+
+
+# RunStats
+def test_RunStats_disabled():
+    stats = RunStats()
+    iterator = iter([1, 2])
+
+    assert stats.phase("fill") is stats.phase("traceback")
+    assert stats.iterate("traceback", iterator) is iterator
+    stats.count("cellsFilled", 10)
+    assert stats.asDict() == {"phases": {}, "counters": {}}
+
+def test_RunStats_nestedPhases(monkeypatch):
+    clock = iter([0.0, 1.0, 3.0, 10.0]) # outer start, inner start, inner end, outer end
+    monkeypatch.setattr(time, "perf_counter", lambda: next(clock))
+    stats = RunStats(enabled=True)
+
+    with stats.phase("printAlignments"):
+        with stats.phase("traceback"):
+            pass
+
+    assert stats.phases["traceback"]["wall"] == 2.0
+    assert stats.phases["printAlignments"]["wall"] == 8.0 # without the nested phase
+    assert stats.phases["printAlignments"]["calls"] == 1
+
+def test_RunStats_iterateAndCount():
+    stats = RunStats(enabled=True)
+
+    assert list(stats.iterate("traceback", iter("ab"))) == ["a", "b"]
+    stats.count("cellsFilled", 10)
+    stats.count("cellsFilled")
+
+    assert stats.phases["traceback"]["calls"] == 3 # the last call finds the end
+    assert json.loads(stats.toJson())["counters"] == {"cellsFilled": 11}
+    stats.reset()
+    assert stats.asDict() == {"phases": {}, "counters": {}} and stats.enabled
+
+def test_RunStats_traceback(monkeypatch):
+    stats = RunStats(enabled=True)
+    monkeypatch.setattr(sys.modules["globalAlignment"], "runStats", stats)
+    args = MockArgs(shape=(2, 3), seq1="AA", seq2="A")
+    directionMatrix = np.array([[0, 4, 4], [2, 1, 5]], dtype=np.uint8)
+
+    assert len(traceback(directionMatrix, args)) == 2
+    assert stats.counters == {"tracebackBranches": 4, "alignmentsEmitted": 2}
+
+def test_RunStats_scoreOnlyUnitCost(monkeypatch):
+    stats = RunStats(enabled=True)
+    monkeypatch.setattr(sys.modules["globalAlignment"], "runStats", stats)
+    args = MockArgs(seq1 = "ACTTGGA", seq2 = "AG", gapPenalty=-1, match=0, misMatch=-1)
+    args.workers = 1
+
+    assert calculateScoreOnly(args) == -5
+    assert stats.counters == {"cellsFilled": 24}
+
+def test_main_profile(capsys, tmp_path):
+    path = tmp_path / "profile.json"
+    sys.argv = ["globalAlignment.py", "ACTG", "AG", "-gp", "-1", "-m", "1", "-mm", "-1", "-e", "rows", "--profile", "--profileJson", str(path)]
+    main()
+
+    out, err = capsys.readouterr()
+    stats = json.loads(path.read_text())
+
+    assert "Alignment score: 0" in out
+    assert err.startswith("Phase")
+    assert set(stats["phases"]) == {"checkSequence", "createMatrix", "calculateAntidiagonals", "fillMatrix", "traceback", "printMatrices", "printAlignments"}
+    assert stats["counters"]["cellsFilled"] == 15
+    assert stats["counters"]["alignmentsEmitted"] == 1
+    assert not runStats.enabled
+
+def test_main_profileBeforeSequences(capsys, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sys.argv = ["globalAlignment.py", "--profile", "ACTG", "AG", "-gp", "-1", "-m", "1", "-mm", "-1", "-e", "rows"]
+    main()
+
+    out, err = capsys.readouterr()
+
+    assert out.startswith("First sequence: ACTG\nSecond sequence: AG\n")
+    assert err.startswith("Phase")
+    assert list(tmp_path.iterdir()) == [] # no JSON without --profileJson
 
 
 # printPossibleAlignments